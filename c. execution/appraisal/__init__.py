@@ -8,7 +8,28 @@ Scripts:
 - setup_sheets.py: Create Google Sheets for tracking
 - receive_order.py: Step 1 - Validate and log incoming orders
 - find_appraisers.py: Step 2 - Query panel and rank candidates
+- assign_appraisers.py: Step 2 (batch) - Capacity-aware candidates for many orders
 - send_rfp.py: Step 3 - Send RFP emails to appraisers
 - collect_quotes.py: Step 4 - Record and rank quotes
+- inbound_quotes.py: Step 4 - Record quotes from RFP reply emails (IMAP, Maildir, mbox)
 - send_engagement.py: Step 5 - Engage winner, decline others
+- pipeline.py: Steps 1-3 and 4-5 in one process, with resumable checkpoints
+- service.py: Resident HTTP service running steps 1-5 with warm clients and caches
+
+Shared modules:
+- sheets_utils.py: Read/write helpers used by every step
+- storage.py: Storage backends (Google Sheets or local SQLite)
+- archive.py: Hot/cold archival of finished orders and their quotes
+- ids.py: Time-ordered, collision-free order and quote IDs
+- rate_limit.py: Token bucket, backoff and request coalescing
+- panel_cache.py: Cached appraiser panels, revalidated against Drive
+- panel_model.py: Parsed panel with a (state, property_type) index
+- scoring.py: Vectorized appraiser and quote scoring with per-client weights
+- business_calendar.py: Business-day due dates and SLAs with per-client/state holidays
+- mail_transport.py: Pooled, persistent SMTP connections for all senders
+- outbox.py: Durable email outbox and background mail worker
+- scheduler.py: Durable deadline timers - summary at the quotes deadline, then auto-engage
+- email_templates.py: Compiled email templates with per-client overrides
+- bench_mail.py: Offline mail throughput benchmark against a local SMTP sink
+- bench_startup.py: Cold-start time budget for every CLI
 """
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Hot/cold archival of the Orders and Quotes tabs.
+
+Every scan of Orders or Quotes (duplicate checks, quote lookups, batch
+assignment) pays for the whole history, while the working set is the few
+dozen open orders. Finished orders - by default delivered, closed or
+cancelled at least APPRAISAL_ARCHIVE_AFTER_DAYS ago - are moved with their
+quotes into yearly archive tabs ("Orders Archive 2025", "Quotes Archive
+2025") next to the active tabs, so those only hold live work. Archive tabs
+are ordinary tabs: they work on either storage backend and stay browsable
+in the spreadsheet.
+
+Rows are copied to the archive before they are removed from the active
+tabs (quotes before their order), and rows already in the archive are not
+copied again, so an interrupted run is simply repeated. Removing rows from
+a Google Sheet shifts the rows below them: archive while no other step is
+writing, e.g. from a nightly cron.
+
+History goes through one API that looks in the active tab first and then
+the archives: find_order, find_quotes and read_history.
+
+Usage:
+    python archive.py --dry-run                 # List orders that would be archived
+    python archive.py                           # Archive finished orders
+    python archive.py --min-age-days 0          # ...however recently finished
+    python archive.py --find ORD-2024-12345     # Look up an order, archived or not
+
+Environment:
+    APPRAISAL_ARCHIVE_STATUSES=delivered,closed,cancelled
+    APPRAISAL_ARCHIVE_AFTER_DAYS=30
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.sheets_utils import (
+    ORDERS_SHEET_ID, QUOTES_SHEET_ID,
+    read_sheet, find_row_by_id, ReadBatch, WriteBatch,
+    ORDERS_COLUMNS, QUOTES_COLUMNS
+)
+from appraisal.storage import get_backend
+
+ARCHIVE_STATUSES = {
+    s.strip() for s in os.getenv('APPRAISAL_ARCHIVE_STATUSES', 'delivered,closed,cancelled').split(',')
+    if s.strip()
+}
+ARCHIVE_AFTER_DAYS = float(os.getenv('APPRAISAL_ARCHIVE_AFTER_DAYS', 30))
+
+# Active tab -> spreadsheet holding it and its archives
+ARCHIVED_TABS = {
+    'Orders': ORDERS_SHEET_ID,
+    'Quotes': QUOTES_SHEET_ID,
+}
+
+
+def archive_tab(sheet_name: str, year: int) -> str:
+    """Name of the archive tab for a year ("Orders" -> "Orders Archive 2025")."""
+    return f"{sheet_name} Archive {year}"
+
+
+def archive_tabs(sheet_name: str) -> list[str]:
+    """Existing archive tabs of an active tab, newest first."""
+    spreadsheet_id = ARCHIVED_TABS[sheet_name]
+    pattern = re.compile(rf'^{re.escape(sheet_name)} Archive (\d{{4}})$')
+    years = [int(m.group(1)) for m in map(pattern.match, get_backend().list_sheets(spreadsheet_id)) if m]
+    return [archive_tab(sheet_name, year) for year in sorted(years, reverse=True)]
+
+
+def _finished_on(order: dict) -> date | None:
+    """Best known completion date of an order: delivered, else due, else created."""
+    for field in ('delivered_at', 'due_date', 'created_at'):
+        try:
+            return date.fromisoformat((order.get(field) or '')[:10])
+        except ValueError:
+            continue
+    return None
+
+
+def _columns(rows: list[dict], standard: list[str]) -> list[str]:
+    """Standard columns, then any extra ones the rows carry, in first-seen order."""
+    extra = {}
+    for row in rows:
+        for c in row:
+            if c and c not in standard:
+                extra.setdefault(c, None)
+    return standard + list(extra)
+
+
+# ── Archival ──────────────────────────────────────────────────────────────────
+
+def archive_orders(min_age_days: float = ARCHIVE_AFTER_DAYS, dry_run: bool = False) -> dict:
+    """
+    Move finished orders and their quotes to the yearly archive tabs.
+
+    Args:
+        min_age_days: Only archive orders finished at least this long ago
+        dry_run: Report what would move without changing anything
+
+    Returns:
+        Dict with counts per archive year
+    """
+    reads = ReadBatch()
+    reads.rows(ORDERS_SHEET_ID, 'Orders')
+    reads.rows(QUOTES_SHEET_ID, 'Quotes')
+    orders, quotes = reads.load()
+
+    cutoff = date.today() - timedelta(days=min_age_days)
+    quotes_by_order: dict[str, list[dict]] = {}
+    for q in quotes:
+        # Rows are removed by ID, so quotes without one stay where they are
+        if q.get('quote_id'):
+            quotes_by_order.setdefault(q.get('order_id'), []).append(q)
+
+    # year -> (orders, quotes)
+    plan: dict[int, tuple[list[dict], list[dict]]] = {}
+    for order in orders:
+        if order.get('status') not in ARCHIVE_STATUSES or not order.get('order_id'):
+            continue
+        finished = _finished_on(order)
+        if finished is None and min_age_days > 0:
+            continue
+        if finished is not None and finished > cutoff:
+            continue
+        year = (finished or date.today()).year
+        year_orders, year_quotes = plan.setdefault(year, ([], []))
+        year_orders.append(order)
+        year_quotes.extend(quotes_by_order.get(order['order_id'], []))
+
+    summary = {
+        'success': True,
+        'orders': sum(len(o) for o, _ in plan.values()),
+        'quotes': sum(len(q) for _, q in plan.values()),
+        'by_year': {
+            year: {'orders': len(o), 'quotes': len(q)}
+            for year, (o, q) in sorted(plan.items())
+        },
+        'dry_run': dry_run,
+    }
+    if dry_run:
+        summary['order_ids'] = [o['order_id'] for year_orders, _ in plan.values() for o in year_orders]
+        return summary
+    if not plan:
+        return summary
+
+    backend = get_backend()
+    order_columns = _columns(orders, ORDERS_COLUMNS)
+    quote_columns = _columns(quotes, QUOTES_COLUMNS)
+
+    # Copy first - skipping rows an interrupted run already copied
+    reads = ReadBatch()
+    for year in plan:
+        backend.ensure_sheet(ORDERS_SHEET_ID, archive_tab('Orders', year), order_columns)
+        backend.ensure_sheet(QUOTES_SHEET_ID, archive_tab('Quotes', year), quote_columns)
+        reads.rows(ORDERS_SHEET_ID, archive_tab('Orders', year), columns=['order_id'])
+        reads.rows(QUOTES_SHEET_ID, archive_tab('Quotes', year), columns=['quote_id'])
+    archived = reads.load()
+
+    batch = WriteBatch()
+    for i, (year, (year_orders, year_quotes)) in enumerate(plan.items()):
+        have_orders = {r['order_id'] for r in archived[2 * i]}
+        have_quotes = {r['quote_id'] for r in archived[2 * i + 1]}
+        for order in year_orders:
+            if order['order_id'] not in have_orders:
+                batch.append_row(ORDERS_SHEET_ID, archive_tab('Orders', year), order, order_columns)
+        for quote in year_quotes:
+            if quote['quote_id'] not in have_quotes:
+                batch.append_row(QUOTES_SHEET_ID, archive_tab('Quotes', year), quote, quote_columns)
+
+    failed = [r for r in batch.flush() if r['status'] != 'written']
+    if failed:
+        return {
+            'success': False,
+            'errors': [f"Failed to copy rows to the archive: {failed[0].get('error')}"]
+        }
+
+    # Then remove them from the active tabs - quotes first, so an order
+    # never leaves while its quotes stay behind
+    summary['quotes_removed'] = backend.delete_rows_by_id(
+        QUOTES_SHEET_ID, 'Quotes', 'quote_id',
+        [q['quote_id'] for _, year_quotes in plan.values() for q in year_quotes]
+    )
+    summary['orders_removed'] = backend.delete_rows_by_id(
+        ORDERS_SHEET_ID, 'Orders', 'order_id',
+        [o['order_id'] for year_orders, _ in plan.values() for o in year_orders]
+    )
+    return summary
+
+
+# ── History ───────────────────────────────────────────────────────────────────
+
+def read_history(sheet_name: str, columns: list[str] = None) -> list[dict]:
+    """
+    Read an active tab ('Orders' or 'Quotes') and all its archives in one
+    round-trip. Active rows come first, then archives newest first.
+    """
+    spreadsheet_id = ARCHIVED_TABS[sheet_name]
+    reads = ReadBatch()
+    for tab in [sheet_name] + archive_tabs(sheet_name):
+        reads.rows(spreadsheet_id, tab, columns=columns)
+    return [row for rows in reads.load() for row in rows]
+
+
+def find_order(order_id: str) -> tuple[str, dict] | None:
+    """Find an order, active or archived. Returns (tab name, order) or None."""
+    found = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+    if found:
+        return ('Orders', found[1])
+    for tab in archive_tabs('Orders'):
+        found = find_row_by_id(ORDERS_SHEET_ID, tab, 'order_id', order_id)
+        if found:
+            return (tab, found[1])
+    return None
+
+
+def find_quotes(order_id: str) -> list[dict]:
+    """Get all quotes for an order, looking in the archives if none are active."""
+    quotes = read_sheet(QUOTES_SHEET_ID, 'Quotes!A:Z')
+    matches = [q for q in quotes if q.get('order_id') == order_id]
+    if matches:
+        return matches
+
+    tabs = archive_tabs('Quotes')
+    if not tabs:
+        return []
+    reads = ReadBatch()
+    for tab in tabs:
+        reads.rows(QUOTES_SHEET_ID, tab)
+    # An order's quotes are archived together, into one tab
+    for rows in reads.load():
+        matches = [q for q in rows if q.get('order_id') == order_id]
+        if matches:
+            return matches
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive finished appraisal orders and their quotes")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be archived")
+    parser.add_argument("--min-age-days", type=float, default=ARCHIVE_AFTER_DAYS,
+                        help=f"Only archive orders finished this many days ago (default: {ARCHIVE_AFTER_DAYS:g})")
+    parser.add_argument("--find", metavar="ORDER_ID", help="Look up an order and its quotes, archived or not")
+    args = parser.parse_args()
+
+    if args.find:
+        found = find_order(args.find)
+        if not found:
+            result = {'success': False, 'errors': [f'Order not found: {args.find}']}
+        else:
+            tab, order = found
+            result = {'success': True, 'sheet_name': tab, 'order': order, 'quotes': find_quotes(args.find)}
+        print(json.dumps(result, indent=2))
+        sys.exit(0 if result['success'] else 1)
+
+    result = archive_orders(min_age_days=args.min_age_days, dry_run=args.dry_run)
+    print(json.dumps(result, indent=2))
+
+    if result.get('success'):
+        verb = 'Would archive' if args.dry_run else 'Archived'
+        print(f"\n✓ {verb} {result['orders']} order(s) and {result['quotes']} quote(s)", file=sys.stderr)
+        sys.exit(0)
+    else:
+        print(f"\n✗ Failed: {result.get('errors')}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Step 2 (batch): Choose RFP candidates for many orders at once.
+
+find_appraisers.py ranks each order on its own against the panel's
+current_workload, so a batch of similar orders all go to the same top
+appraisers and push them over capacity. This script solves one
+capacity-constrained assignment across every order in the batch instead:
+
+- Each order gets up to --limit distinct qualified appraisers
+- Each appraiser receives at most (capacity - current_workload) RFPs
+- As many RFPs as possible are sent, and no reshuffling of RFPs between
+  appraisers could lower the total ranking score (see scoring.py, with
+  per-client weights)
+
+It is solved as a min-cost flow. Orders with the same client, state and
+property type have identical candidates and costs, so they share one node;
+this keeps the graph small for thousands of orders × thousands of
+appraisers. When capacity runs short, Rush orders are served first. Each
+group's RFPs are then dealt out round-robin, so every order gets distinct
+appraisers.
+
+Requires numpy.
+
+Usage:
+    python assign_appraisers.py --pending
+    python assign_appraisers.py --order-ids ORD-2024-12345 ORD-2024-12346 --limit 3
+
+Returns JSON with a ranked candidate list per order.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.sheets_utils import ORDERS_SHEET_ID, read_sheet
+from appraisal.find_appraisers import get_appraiser_panel
+from appraisal.scoring import get_client_weights, numpy_or_none
+
+ORDER_FIELDS = ['order_id', 'status', 'property_state', 'property_type', 'client_id', 'urgency']
+URGENCY_PRIORITY = {'Super Rush': 0, 'Rush': 1}
+
+# Scores are converted to integer costs so the solver's arithmetic is exact
+COST_SCALE = 10000
+
+# Dijkstra steps taken past the first route, to prove more routes shortest per search
+SEARCH_EXTRA_STEPS = 8
+
+
+# ── Min-cost flow ──
+
+def _solve_flow(
+    group_candidates: list[list[tuple]],
+    sizes: list[int],
+    capacities: list[int],
+    limit: int,
+    priorities: list[int] = None
+) -> list[list[int]]:
+    """
+    Min-cost flow: source -> group (limit per order), group -> appraiser
+    (one per order), appraiser -> sink (spare capacity).
+
+    Successive shortest paths with Dijkstra on reduced costs. The residual
+    graph is held as numpy arrays over the group -> appraiser edges, indexed
+    by group (and, for edges carrying RFPs, by appraiser), so each Dijkstra
+    step relaxes every edge out of the nodes it settles at once and touches
+    no others.
+
+    Groups are served in priority tiers (lowest first; all one tier when
+    priorities is None), so Rush orders claim capacity before the rest. A
+    tier's groups are searched from together, and each search runs a few
+    steps past the first route to the sink: every route shorter than its
+    frontier is then known, and they are pushed shortest first for as long
+    as the ones before them were used up. That way one search feeds a few
+    RFPs instead of one. Later tiers may reroute an earlier tier's RFPs to
+    other appraisers but never take them away.
+
+    When a search finds no path, nothing it reached can reach the sink, and
+    no later augmentation can change that (no residual edge leaves the
+    region), so those nodes are skipped from then on. Every group ends up
+    either satisfied or cut off, so each tier's flow is maximal; reduced
+    costs stay non-negative throughout, so it is min-cost for the RFPs it
+    delivers.
+
+    Returns:
+        RFPs per (group, candidate), aligned with group_candidates
+    """
+    np = numpy_or_none()
+    n_groups, n_appraisers = len(sizes), len(capacities)
+    inf = np.inf
+
+    # One edge per (group, appraiser); a repeated candidate gets no RFPs
+    edge_g, edge_a, edge_cost, slots = [], [], [], []
+    for g, edges in enumerate(group_candidates):
+        seen = set()
+        row = []
+        for c, _, _, node in edges:
+            if node in seen:
+                row.append(-1)
+                continue
+            seen.add(node)
+            row.append(len(edge_g))
+            edge_g.append(g)
+            edge_a.append(node)
+            edge_cost.append(c)
+        slots.append(row)
+    if not edge_g:
+        return [[0] * len(row) for row in slots]
+
+    edge_g = np.asarray(edge_g, dtype=np.int64)
+    edge_a = np.asarray(edge_a, dtype=np.int64)
+    edge_cost = np.asarray(edge_cost, dtype=float)
+    # Edges are listed group by group; g_start[g] is group g's first
+    g_start = np.searchsorted(edge_g, np.arange(n_groups + 1))
+    size = np.asarray(sizes, dtype=np.int64)
+    edge_cap = size[edge_g]
+    flow = np.zeros(len(edge_g), dtype=np.int64)
+    demand = size * limit
+    spare = np.asarray(capacities, dtype=np.int64)
+
+    # Potentials keep reduced costs c(u, v) + p[u] - p[v] >= 0 on every
+    # residual group <-> appraiser and appraiser -> sink edge
+    pot_g = np.zeros(n_groups)
+    pot_a = np.full(n_appraisers, inf)
+    np.minimum.at(pot_a, edge_a, edge_cost)
+    pot_a[~np.isfinite(pot_a)] = 0
+    pot_t = pot_a.min()
+
+    # Edge each node was reached by in the current search
+    pred_a = np.full(n_appraisers, -1)
+    pred_g = np.full(n_groups, -1)
+    dead_g = np.zeros(n_groups, dtype=bool)
+    dead_a = np.zeros(n_appraisers, dtype=bool)
+
+    def edges_of(start, nodes) -> np.ndarray:
+        """Positions of every edge of the given nodes, from a start-offset table."""
+        first, count = start[nodes], start[nodes + 1] - start[nodes]
+        return np.repeat(first - np.cumsum(count) + count, count) + np.arange(count.sum())
+
+    def relax(nodes, lengths, via, dist, key, pred) -> np.ndarray:
+        """Lower dist at nodes (repeats allowed) to lengths where shorter; returns the mask of improved nodes."""
+        shortest = np.full(len(dist), inf)
+        np.minimum.at(shortest, nodes, lengths)
+        better = shortest < dist
+        if better.any():
+            winners = better[nodes] & (lengths == shortest[nodes])
+            pred[nodes[winners]] = via[winners]
+            dist[better] = key[better] = shortest[better]
+        return better
+
+    def shortest_path(sources) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Dijkstra from the source groups, carried a few steps past the first
+        route to the sink. Returns the appraisers whose tree paths are proven
+        shortest routes (every node closer than the frontier is settled),
+        the routes' lengths, shortest first (both empty if the sink can't be
+        reached), and the groups' and appraisers' distances.
+        """
+        pred_a.fill(-1)
+        pred_g.fill(-1)
+        dist_g = np.full(n_groups, inf)
+        dist_g[sources] = -pot_g[sources]
+        dist_a = np.full(n_appraisers, inf)
+        to_sink = np.full(n_appraisers, inf)   # route length via each appraiser
+        key_g, key_a = dist_g.copy(), dist_a.copy()   # inf once settled
+        done_g, done_a = dead_g.copy(), dead_a.copy()
+        key_g[done_g] = inf
+        best_t, extra_steps = inf, 0
+        # Backward edges exist only where RFPs flow; index those by appraiser
+        carrying = np.flatnonzero(flow > 0)
+        carrying = carrying[np.argsort(edge_a[carrying], kind='stable')]
+        carrying_start = np.searchsorted(edge_a[carrying], np.arange(n_appraisers + 1))
+
+        while True:
+            d = min(key_g.min(), key_a.min())
+            if d >= best_t:
+                if d == inf or extra_steps == SEARCH_EXTRA_STEPS:
+                    break
+                extra_steps += 1
+
+            # Settle every node at the minimum distance at once - potentials
+            # leave many exact ties, so this cuts the steps by orders of magnitude
+            settle_g = np.flatnonzero(key_g == d)
+            if len(settle_g):
+                key_g[settle_g], done_g[settle_g] = inf, True
+                out = edges_of(g_start, settle_g)
+                out = out[(flow[out] < edge_cap[out]) & ~done_a[edge_a[out]]]
+                lengths = d + edge_cost[out] + pot_g[edge_g[out]] - pot_a[edge_a[out]]
+                better = relax(edge_a[out], lengths, out, dist_a, key_a, pred_a)
+                # Relax appraiser -> sink right away, so a zero-length
+                # path ends the search without settling every tie
+                better &= spare > 0
+                if better.any():
+                    to_sink[better] = dist_a[better] + pot_a[better] - pot_t
+                    best_t = min(best_t, to_sink.min())
+                continue
+
+            settle_a = np.flatnonzero(key_a == d)
+            key_a[settle_a], done_a[settle_a] = inf, True
+            back = carrying[edges_of(carrying_start, settle_a)]
+            back = back[~done_g[edge_g[back]]]
+            if len(back):
+                lengths = d - edge_cost[back] + pot_a[edge_a[back]] - pot_g[edge_g[back]]
+                relax(edge_g[back], lengths, back, dist_g, key_g, pred_g)
+
+        if best_t == inf:
+            dead_g[:], dead_a[:] = done_g, done_a
+            return np.array([], dtype=np.int64), np.array([]), dist_g, dist_a
+
+        ends = np.flatnonzero(to_sink <= min(d, to_sink[np.isfinite(to_sink)].max()))
+        ends = ends[np.argsort(to_sink[ends], kind='stable')]
+        return ends, to_sink[ends], dist_g, dist_a
+
+    def augment(end: int):
+        """Push the tree path's bottleneck (possibly 0 by now) from its source group to the sink."""
+        steps = []
+        pushed, a = spare[end], end
+        while True:
+            e = pred_a[a]
+            steps.append((e, 1))
+            pushed = min(pushed, edge_cap[e] - flow[e])
+            g = edge_g[e]
+            back = pred_g[g]
+            if back < 0:
+                pushed = min(pushed, demand[g])
+                break
+            steps.append((back, -1))
+            pushed = min(pushed, flow[back])
+            a = edge_a[back]
+
+        for e, sign in steps:
+            flow[e] += sign * pushed
+        demand[g] -= pushed
+        spare[end] -= pushed
+
+    priorities = np.zeros(n_groups, dtype=np.int64) if priorities is None else np.asarray(priorities)
+    for tier in np.unique(priorities):
+        groups = np.flatnonzero(priorities == tier)
+        while True:
+            sources = groups[(demand[groups] > 0) & ~dead_g[groups]]
+            if not len(sources):
+                break
+            ends, lengths, dist_g, dist_a = shortest_path(sources)
+            if not len(ends):
+                break
+            # Each tree path stays a shortest route while every route shorter
+            # than it has been used up; once one is left with spare capacity
+            # (its path or source ran dry), the longer ones wait for a new search
+            held, pushed_to = inf, lengths[0]
+            for end, length in zip(ends, lengths):
+                if length > held:
+                    break
+                augment(end)
+                pushed_to = length
+                if spare[end] > 0:
+                    held = min(held, length)
+            # Nodes beyond the longest route pushed are as good as unreached
+            pot_g += np.minimum(dist_g, pushed_to)
+            pot_a += np.minimum(dist_a, pushed_to)
+            pot_t += pushed_to
+
+    return [[int(flow[e]) if e >= 0 else 0 for e in row] for row in slots]
+
+
+# ── Assignment ──
+
+def get_pending_orders(order_ids: list[str] = None) -> list[dict]:
+    """Load orders to assign: the given IDs, or every order still 'pending'."""
+    if not ORDERS_SHEET_ID:
+        raise ValueError("APPRAISAL_ORDERS_SHEET_ID not configured in .env")
+
+    orders = read_sheet(ORDERS_SHEET_ID, 'Orders!A:Z', columns=ORDER_FIELDS)
+    if order_ids:
+        wanted = set(order_ids)
+        return [o for o in orders if o.get('order_id') in wanted]
+    return [o for o in orders if o.get('status') == 'pending']
+
+
+def assign_appraisers(orders: list[dict], limit: int = 5) -> dict:
+    """
+    Choose RFP candidates for a batch of orders without exceeding capacity.
+
+    Args:
+        orders: Order dicts (order_id, property_state, property_type, client_id, urgency)
+        limit: Max appraisers per order
+
+    Returns:
+        Dict with one assignment (ranked candidate list) per order
+    """
+    if numpy_or_none() is None:
+        return {
+            'success': False,
+            'errors': ['numpy is required for batch assignment (pip install numpy)']
+        }
+
+    errors = []
+    groups = {}   # (client_id, state, type) -> group info, most urgent first
+    panels = {}   # client_id -> (PanelModel, panel_source)
+
+    for order in sorted(orders, key=lambda o: URGENCY_PRIORITY.get(o.get('urgency'), 2)):
+        order_id = order.get('order_id')
+        state = (order.get('property_state') or '').upper()
+        property_type = order.get('property_type') or ''
+        client_id = order.get('client_id') or None
+        if not state or not property_type:
+            errors.append(f'{order_id}: property_state and property_type are required')
+            continue
+
+        if client_id not in panels:
+            try:
+                panels[client_id] = get_appraiser_panel(client_id)
+            except Exception as e:
+                return {
+                    'success': False,
+                    'errors': [f'Failed to load appraiser panel: {str(e)}']
+                }
+
+        key = (client_id, state, property_type)
+        if key not in groups:
+            groups[key] = {'client_id': client_id, 'state': state, 'type': property_type, 'orders': []}
+        groups[key]['orders'].append(order)
+
+    # Every group's candidates, cheapest first, as integer costs
+    appraiser_nodes = {}   # appraiser_id -> index into appraisers
+    appraisers = []
+    group_candidates = []
+    for group in groups.values():
+        panel, panel_source = panels[group['client_id']]
+        group['panel_source'] = panel_source
+        candidates = panel.candidates(group['state'], group['type'])
+        scores = panel.scores(candidates, get_client_weights(group['client_id'])) if candidates else []
+        edges = []
+        for a, score in zip(candidates, scores):
+            if a.appraiser_id not in appraiser_nodes:
+                appraiser_nodes[a.appraiser_id] = len(appraisers)
+                appraisers.append(a)
+            edges.append((int(round(float(score) * COST_SCALE)), a.position, a, appraiser_nodes[a.appraiser_id]))
+        edges.sort(key=lambda edge: edge[:2])
+        group_candidates.append(edges)
+
+    sizes = [len(group['orders']) for group in groups.values()]
+    capacities = []
+    for a in appraisers:
+        workload = a.workload if a.workload is not None else 0
+        capacity = a.capacity if a.capacity is not None else 5
+        capacities.append(max(0, capacity - workload))
+
+    priorities = [URGENCY_PRIORITY.get(group['orders'][0].get('urgency'), 2) for group in groups.values()]
+    used = _solve_flow(group_candidates, sizes, capacities, limit, priorities) if groups else []
+
+    # Deal each group's RFPs out to its orders: cheapest appraisers first,
+    # unit j to order j mod n, so no order gets the same appraiser twice
+    assignments = []
+    load = {}
+    for group, edges, counts in zip(groups.values(), group_candidates, used):
+        group_orders = group['orders']
+        per_order = [[] for _ in group_orders]
+        unit = 0
+        for (_, _, a, _), n in zip(edges, counts):
+            for _ in range(n):
+                per_order[unit % len(group_orders)].append(a)
+                unit += 1
+            if n:
+                load[a.appraiser_id] = load.get(a.appraiser_id, 0) + n
+
+        for order, chosen in zip(group_orders, per_order):
+            candidates = [dict(a.row, rank=i + 1) for i, a in enumerate(chosen)]
+            assignments.append({
+                'order_id': order.get('order_id'),
+                'candidates': candidates,
+                'returned_count': len(candidates),
+                'panel_source': group['panel_source'],
+            })
+
+    return {
+        'success': True,
+        'assignments': assignments,
+        'order_count': len(assignments),
+        'total_rfps': sum(load.values()),
+        'unfilled_orders': [a['order_id'] for a in assignments if a['returned_count'] < limit],
+        'appraiser_load': load,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Choose RFP candidates for many orders without exceeding appraiser capacity"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pending", action="store_true", help="Assign every order with status 'pending'")
+    source.add_argument("--order-ids", nargs="+", help="Specific order IDs to assign")
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=5,
+        help="Max candidates per order (default: 5)"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        orders = get_pending_orders(args.order_ids)
+    except Exception as e:
+        result = {'success': False, 'errors': [f'Failed to load orders: {str(e)}']}
+    else:
+        result = assign_appraisers(orders, limit=args.limit)
+
+    print(json.dumps(result, indent=2))
+
+    if result['success']:
+        print(
+            f"\n✓ Assigned {result['total_rfps']} RFP(s) across {result['order_count']} order(s)",
+            file=sys.stderr
+        )
+        sys.exit(0)
+    else:
+        print(f"\n✗ Failed: {result['errors']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Offline mail throughput benchmark.
+
+Starts a local SMTP sink with configurable latency and failure injection,
+seeds a throwaway SQLite store with orders, an appraiser panel and quotes,
+then drives the real workflow steps against it for every order:
+
+    send_rfp_emails -> send_summary_to_client -> engage_appraiser
+
+and reports messages/sec, connection counts (sink-side and pool
+handshakes), and per-step and per-message latency percentiles. Nothing
+touches Google Sheets or a real mail server, so it runs anywhere and can
+be used to catch throughput regressions.
+
+The sink is a minimal in-process SMTP server (EHLO, AUTH PLAIN, MAIL,
+RCPT, DATA, RSET, NOOP, QUIT) - no TLS, so the transport runs with
+SMTP_STARTTLS=false.
+
+Usage:
+    python bench_mail.py --orders 200 --appraisers 40
+    python bench_mail.py --orders 100 --workers 8 --latency 0.05
+    python bench_mail.py --orders 100 --fail-rate 0.02 --drop-rate 0.01
+    python bench_mail.py --orders 100 --outbox      # Queue, then time the worker drain
+
+Run it as a script: the storage, sheet and SMTP settings are pointed at
+the sink and a temporary database before the workflow modules load.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+STATES = ['IL', 'TX', 'CA', 'NY', 'FL', 'OH', 'GA', 'PA']
+PROPERTY_TYPES = ['Office', 'Retail', 'Industrial', 'Multifamily']
+
+
+# ── SMTP sink ──
+
+class SMTPSink:
+    """
+    In-process SMTP server that accepts and discards mail.
+
+    latency is added before each DATA reply and connect_latency before the
+    greeting. Each message fails with a transient 451 with probability
+    fail_rate, or has its connection dropped without a reply with
+    probability drop_rate.
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        fail_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        seed: int = None
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.stats = {'connections': 0, 'accepted': 0, 'failed': 0, 'dropped': 0}
+        self._random = random.Random(seed)
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self) -> tuple[str, int]:
+        """Start serving on a background thread. Returns (host, port)."""
+        self._thread = threading.Thread(target=self._serve, name='smtp-sink', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self.host, self.port
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats['connections'] += 1
+
+        async def reply(line: str):
+            writer.write(line.encode() + b'\r\n')
+            await writer.drain()
+
+        try:
+            if self.connect_latency:
+                await asyncio.sleep(self.connect_latency)
+            await reply('220 sink ESMTP ready')
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors='replace').strip().split(' ', 1)[0].upper()
+
+                if command == 'EHLO':
+                    await reply('250-sink\r\n250-AUTH PLAIN\r\n250-8BITMIME\r\n250 SMTPUTF8')
+                elif command == 'HELO':
+                    await reply('250 sink')
+                elif command == 'AUTH':
+                    await reply('235 2.7.0 Authentication successful')
+                elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                    await reply('250 2.0.0 OK')
+                elif command == 'DATA':
+                    await reply('354 End data with <CR><LF>.<CR><LF>')
+                    while True:
+                        data = await reader.readline()
+                        if not data or data == b'.\r\n':
+                            break
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    roll = self._random.random()
+                    if roll < self.drop_rate:
+                        self.stats['dropped'] += 1
+                        break
+                    if roll < self.drop_rate + self.fail_rate:
+                        self.stats['failed'] += 1
+                        await reply('451 4.3.0 Injected failure')
+                    else:
+                        self.stats['accepted'] += 1
+                        await reply('250 2.0.0 Queued')
+                elif command == 'QUIT':
+                    await reply('221 2.0.0 Bye')
+                    break
+                else:
+                    await reply('502 5.5.2 Command not recognized')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# ── Fixtures ──
+
+def configure_environment(host: str, port: int, db_path: str, outbox: bool):
+    """Point storage, timers, sheets and SMTP at the benchmark before the workflow loads."""
+    os.environ.update({
+        'APPRAISAL_STORAGE': 'sqlite',
+        'APPRAISAL_SQLITE_PATH': db_path,
+        'APPRAISAL_SCHEDULER_PATH': os.path.join(os.path.dirname(db_path), 'scheduler.db'),
+        'APPRAISAL_MIRROR_TO_SHEETS': 'false',
+        'APPRAISAL_ORDERS_SHEET_ID': 'bench-orders',
+        'APPRAISAL_PANEL_SHEET_ID': 'bench-panel',
+        'APPRAISAL_QUOTES_SHEET_ID': 'bench-quotes',
+        'APPRAISAL_MAIL_DELIVERY': 'outbox' if outbox else 'direct',
+        'SMTP_HOST': host,
+        'SMTP_PORT': str(port),
+        'SMTP_USER': 'bench@example.com',
+        'SMTP_PASSWORD': 'bench',
+        'SMTP_STARTTLS': 'false',
+    })
+
+
+def seed(n_orders: int, n_appraisers: int, quotes_per_order: int, rng: random.Random) -> list[str]:
+    """Load orders, a panel and quotes into the benchmark store. Returns the order IDs."""
+    from appraisal.storage import get_backend
+    from appraisal.sheets_utils import (
+        ORDERS_SHEET_ID, PANEL_SHEET_ID, QUOTES_SHEET_ID,
+        ORDERS_COLUMNS, PANEL_COLUMNS, QUOTES_COLUMNS
+    )
+
+    panel = [
+        {
+            'appraiser_id': f'APP-{i:04d}',
+            'name': f'Appraiser {i}',
+            'email': f'appraiser{i}@example.com',
+            'company': 'Bench Valuation',
+            'states': ','.join(rng.sample(STATES, 3)),
+            'property_types': ','.join(rng.sample(PROPERTY_TYPES, 2)),
+            'current_workload': str(rng.randint(0, 2)),
+            'capacity': '10',
+            'avg_fee': str(rng.randint(2500, 6000)),
+            'avg_turnaround_days': str(rng.randint(7, 21)),
+            'quality_score': str(rng.choice([4.0, 4.5, 5.0])),
+            'active': 'TRUE',
+        }
+        for i in range(n_appraisers)
+    ]
+
+    orders = []
+    quotes = []
+    for i in range(n_orders):
+        order_id = f'ORD-BENCH-{i:05d}'
+        orders.append({
+            'order_id': order_id,
+            'status': 'pending',
+            'property_address': f'{100 + i} Main St',
+            'property_city': 'Springfield',
+            'property_state': rng.choice(STATES),
+            'property_type': rng.choice(PROPERTY_TYPES),
+            'loan_amount': str(rng.randint(1, 20) * 500000),
+            'loan_purpose': 'Purchase',
+            'scope': 'Full Narrative',
+            'urgency': 'Standard',
+            'client_id': '',
+            'contact_name': 'Bench Client',
+            'contact_email': f'client{i}@example.com',
+        })
+        for j, a in enumerate(rng.sample(panel, min(quotes_per_order, len(panel)))):
+            quotes.append({
+                'quote_id': f'Q-BENCH-{i:05d}-{j}',
+                'order_id': order_id,
+                'appraiser_id': a['appraiser_id'],
+                'appraiser_name': a['name'],
+                'appraiser_email': a['email'],
+                'fee': str(rng.randint(2500, 6000)),
+                'turnaround_days': str(rng.randint(7, 21)),
+                'submitted_at': '2024-01-15T09:00:00',
+                'selected': 'FALSE',
+            })
+
+    backend = get_backend()
+    backend.import_rows(PANEL_SHEET_ID, 'Appraiser Panel', panel, PANEL_COLUMNS)
+    backend.import_rows(ORDERS_SHEET_ID, 'Orders', orders, ORDERS_COLUMNS)
+    backend.import_rows(QUOTES_SHEET_ID, 'Quotes', quotes, QUOTES_COLUMNS)
+    return [o['order_id'] for o in orders]
+
+
+# ── Measurement ──
+
+def percentiles(samples: list[float]) -> dict:
+    """p50/p95/p99/max of latencies in seconds, reported in milliseconds."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+    return {
+        'count': len(ordered),
+        'p50_ms': at(0.50),
+        'p95_ms': at(0.95),
+        'p99_ms': at(0.99),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def _statuses(step: str, result: dict) -> list[str]:
+    """Per-message statuses from a step's result, in the shape its CLI returns."""
+    if step == 'send_rfp':
+        return [r['status'] for r in result.get('results', [])]
+    if step == 'engagement':
+        results = result.get('results', {})
+        entries = ([results['engagement']] if results.get('engagement') else []) + results.get('declines', [])
+        return [e['status'] for e in entries]
+    if 'queued_to' in result:
+        return ['duplicate' if result.get('duplicate') else 'queued']
+    return ['sent' if result.get('success') else 'failed']
+
+
+def run_benchmark(
+    n_orders: int = 100,
+    n_appraisers: int = 40,
+    quotes_per_order: int = 5,
+    workers: int = 1,
+    latency: float = 0.0,
+    connect_latency: float = 0.0,
+    fail_rate: float = 0.0,
+    drop_rate: float = 0.0,
+    outbox: bool = False,
+    seed_value: int = 7
+) -> dict:
+    sink = SMTPSink(
+        latency=latency, connect_latency=connect_latency,
+        fail_rate=fail_rate, drop_rate=drop_rate, seed=seed_value
+    )
+    host, port = sink.start()
+    workdir = tempfile.mkdtemp(prefix='bench_mail_')
+    configure_environment(host, port, os.path.join(workdir, 'bench.db'), outbox)
+
+    # Workflow modules read their settings at import time
+    from appraisal import mail_transport
+    from appraisal.send_rfp import send_rfp_emails
+    from appraisal.collect_quotes import send_summary_to_client
+    from appraisal.send_engagement import engage_appraiser
+
+    rng = random.Random(seed_value)
+    order_ids = seed(n_orders, n_appraisers, quotes_per_order, rng)
+
+    # Time every message the pooled transport sends
+    message_latency = []
+    original_send = mail_transport.SMTPPool.send
+
+    def timed_send(pool, msg):
+        started = time.perf_counter()
+        try:
+            return original_send(pool, msg)
+        finally:
+            message_latency.append(time.perf_counter() - started)
+
+    mail_transport.SMTPPool.send = timed_send
+
+    steps = {
+        'send_rfp': lambda order_id: send_rfp_emails(order_id),
+        'summary': lambda order_id: send_summary_to_client(order_id),
+        'engagement': lambda order_id: engage_appraiser(order_id, auto=True),
+    }
+    step_latency = {name: [] for name in steps}
+    statuses = {}
+    errors = []
+    lock = threading.Lock()
+
+    def run_order(order_id: str):
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                result = step(order_id)
+            except Exception as e:
+                result = {'success': False, 'errors': [str(e)]}
+            elapsed = time.perf_counter() - started
+            with lock:
+                step_latency[name].append(elapsed)
+                if not result.get('success'):
+                    errors.append(f"{name} {order_id}: {result.get('errors')}")
+                for status in _statuses(name, result):
+                    statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run_order, order_ids))
+        workflow_seconds = time.perf_counter() - started
+
+        drain = None
+        if outbox:
+            from appraisal.outbox import get_outbox
+            drain_started = time.perf_counter()
+            drain = get_outbox().drain()
+            drain['seconds'] = round(time.perf_counter() - drain_started, 3)
+            drain['messages_per_sec'] = round(drain['sent'] / drain['seconds'], 1) if drain['seconds'] else None
+
+        total_seconds = time.perf_counter() - started
+    finally:
+        mail_transport.SMTPPool.send = original_send
+        mail_transport.close_pools()
+        sink.stop()
+
+    accepted = sink.stats['accepted']
+    return {
+        'success': True,
+        'config': {
+            'orders': n_orders,
+            'appraisers': n_appraisers,
+            'quotes_per_order': quotes_per_order,
+            'workers': workers,
+            'latency': latency,
+            'connect_latency': connect_latency,
+            'fail_rate': fail_rate,
+            'drop_rate': drop_rate,
+            'delivery': 'outbox' if outbox else 'direct',
+            'smtp_max_concurrency': mail_transport.SMTP_MAX_CONCURRENCY,
+        },
+        'messages_accepted': accepted,
+        'messages_per_sec': round(accepted / total_seconds, 1) if total_seconds else None,
+        'workflow_seconds': round(workflow_seconds, 3),
+        'total_seconds': round(total_seconds, 3),
+        'connections': {
+            'sink': sink.stats['connections'],
+            'pool_handshakes': sum(p.connects for p in mail_transport._pools.values()),
+        },
+        'injected': {'failed': sink.stats['failed'], 'dropped': sink.stats['dropped']},
+        'statuses': statuses,
+        'step_latency': {name: percentiles(samples) for name, samples in step_latency.items()},
+        'message_latency': percentiles(message_latency),
+        'outbox_drain': drain,
+        'errors': errors[:20],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark appraisal email throughput against a local SMTP sink")
+    parser.add_argument("--orders", type=int, default=100, help="Orders to run through the workflow (default: 100)")
+    parser.add_argument("--appraisers", type=int, default=40, help="Appraisers on the panel (default: 40)")
+    parser.add_argument("--quotes", type=int, default=5, help="Quotes per order (default: 5)")
+    parser.add_argument("--workers", type=int, default=1, help="Orders processed concurrently (default: 1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the sink waits before each DATA reply")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="Seconds the sink waits before its greeting")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of messages answered with 451")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of messages whose connection is dropped")
+    parser.add_argument("--outbox", action="store_true", help="Queue through the outbox, then time the drain")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        n_orders=args.orders,
+        n_appraisers=args.appraisers,
+        quotes_per_order=args.quotes,
+        workers=args.workers,
+        latency=args.latency,
+        connect_latency=args.connect_latency,
+        fail_rate=args.fail_rate,
+        drop_rate=args.drop_rate,
+        outbox=args.outbox,
+        seed_value=args.seed
+    )
+
+    print(json.dumps(result, indent=2))
+    print(
+        f"\n✓ {result['messages_accepted']} message(s) at {result['messages_per_sec']}/s over "
+        f"{result['connections']['sink']} connection(s)",
+        file=sys.stderr
+    )
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget for the appraisal CLIs.
+
+Every webhook that shells out to a step pays the interpreter start plus
+everything the script imports before it does any work. Heavy dependencies
+are imported on the code paths that use them - the Google client stack on
+the first Sheets call, smtplib on the first SMTP send, imaplib on the first
+IMAP read, the ranking stack only when appraisers are picked automatically -
+and this benchmark keeps it that way.
+
+Each CLI is started with --help (imports and argument parsing, no I/O)
+in fresh interpreters; the median wall time is checked against the
+budget, and one extra `python -X importtime` run lists the slowest
+top-level imports and fails the CLI if a deferred module was loaded.
+
+Usage:
+    python bench_startup.py                       # All CLIs, default budget
+    python bench_startup.py --runs 10 --budget-ms 150
+    python bench_startup.py send_rfp collect_quotes
+
+Environment:
+    APPRAISAL_STARTUP_BUDGET_MS=250
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APPRAISAL_DIR = Path(__file__).parent
+
+STARTUP_BUDGET_MS = float(os.getenv('APPRAISAL_STARTUP_BUDGET_MS', 250))
+
+CLIS = [
+    'receive_order', 'find_appraisers', 'assign_appraisers', 'send_rfp',
+    'collect_quotes', 'send_engagement', 'archive', 'ids', 'outbox',
+    'panel_cache', 'email_templates', 'setup_sheets', 'service', 'pipeline', 'scheduler',
+    'business_calendar', 'inbound_quotes',
+]
+
+# Modules no CLI may load before it does real work
+DEFERRED = ['googleapiclient', 'google.oauth2', 'google_auth_oauthlib', 'smtplib', 'imaplib', 'numpy']
+
+
+def time_cli(name: str, runs: int) -> list[float]:
+    """Wall time in ms of `python <name>.py --help`, once per run."""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(APPRAISAL_DIR / f'{name}.py'), '--help'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def import_profile(name: str) -> tuple[dict[str, float], set[str]]:
+    """
+    Import times of one --help run: (top-level module -> cumulative ms,
+    every module imported).
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(APPRAISAL_DIR / f'{name}.py'), '--help'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False
+    )
+    top_level = {}
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            _self, cumulative, module = line[len('import time:'):].split('|')
+            cumulative_us = int(cumulative)
+        except ValueError:
+            continue    # The header line
+        loaded.add(module.strip())
+        if not module[1:].startswith(' '):
+            top_level[module.strip()] = cumulative_us / 1000
+    return top_level, loaded
+
+
+def run_benchmark(clis: list[str], runs: int = 5, budget_ms: float = STARTUP_BUDGET_MS) -> dict:
+    """Time each CLI's cold start and check it against the budget."""
+    results = {}
+    for name in clis:
+        samples = time_cli(name, runs)
+        top_level, loaded = import_profile(name)
+        deferred = sorted(
+            m for m in loaded if any(m == d or m.startswith(d + '.') for d in DEFERRED)
+        )
+        median = statistics.median(samples)
+        results[name] = {
+            'median_ms': round(median, 1),
+            'min_ms': round(min(samples), 1),
+            'within_budget': median <= budget_ms and not deferred,
+            'slowest_imports': {
+                m: round(ms, 1) for m, ms in sorted(top_level.items(), key=lambda kv: -kv[1])[:5]
+            },
+        }
+        if deferred:
+            results[name]['deferred_modules_loaded'] = deferred
+
+    return {
+        'success': all(r['within_budget'] for r in results.values()),
+        'budget_ms': budget_ms,
+        'runs': runs,
+        'python': sys.version.split()[0],
+        'clis': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check appraisal CLI cold-start times against a budget")
+    parser.add_argument("clis", nargs="*", help="CLIs to check (default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per CLI (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help=f"Median startup budget per CLI (default: {STARTUP_BUDGET_MS:g})")
+    args = parser.parse_args()
+
+    unknown = [c for c in args.clis if c not in CLIS]
+    if unknown:
+        print(f"Error: unknown CLI(s): {', '.join(unknown)}. Choose from: {', '.join(CLIS)}", file=sys.stderr)
+        sys.exit(1)
+
+    result = run_benchmark(args.clis or CLIS, runs=max(1, args.runs), budget_ms=args.budget_ms)
+    print(json.dumps(result, indent=2))
+
+    over = [name for name, r in result['clis'].items() if not r['within_budget']]
+    if not over:
+        print(f"\n✓ All {len(result['clis'])} CLI(s) start within {args.budget_ms:g} ms", file=sys.stderr)
+        sys.exit(0)
+    else:
+        print(f"\n✗ Over budget: {', '.join(over)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
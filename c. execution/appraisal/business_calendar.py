@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Business-day calendars for due dates and SLAs.
+
+Turnaround is quoted in business days: weekends and holidays don't count.
+Holidays are the US federal holidays (on their observed dates: Saturday
+holidays move to Friday, Sunday ones to Monday) plus any configured for
+the property's state or the client, following the CLIENT_PANEL_<client_id>
+convention:
+
+    APPRAISAL_HOLIDAYS=us_federal              # Base set: us_federal or none
+    APPRAISAL_EXTRA_HOLIDAYS=12-24             # Added to every calendar
+    HOLIDAYS_TX=03-02,2027-04-02               # Orders for Texas properties
+    HOLIDAYS_BANK_001=2026-11-27               # Orders from client BANK-001
+
+Entries are YYYY-MM-DD (that date) or MM-DD (every year), comma-separated.
+
+Each calendar precomputes two tables over the years in use - the business
+days in order, and for every date the number of business days before it -
+so adding business days or counting them between two dates is a pair of
+index lookups, however long the turnaround. The tables grow on demand.
+add_business_days_many runs the same lookups for a whole column of dates
+at once (numpy when installed), for SLA due dates across every open order.
+
+Usage:
+    python business_calendar.py --add 10                       # 10 business days from today
+    python business_calendar.py --add 10 --from 2026-11-20 --state TX --client BANK-001
+    python business_calendar.py --holidays 2027 [--state TX] [--client BANK-001]
+    python business_calendar.py --sla                          # SLA due dates of open orders
+
+Environment:
+    APPRAISAL_SLA_DAYS={"Standard": 14, "Rush": 7, "Super Rush": 5}
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+BASE_HOLIDAYS = os.getenv('APPRAISAL_HOLIDAYS', 'us_federal').lower()
+
+# Business days allowed per urgency level (the upper end of each range)
+DEFAULT_SLA_DAYS = {'Standard': 14, 'Rush': 7, 'Super Rush': 5}
+
+# Orders whose SLA no longer applies
+CLOSED_STATUSES = ('delivered', 'closed', 'cancelled')
+
+# Years covered when a calendar is first used, around the current year
+INITIAL_YEARS_BEFORE = 1
+INITIAL_YEARS_AFTER = 3
+
+
+# ── Holidays ──
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The nth `weekday` (0 = Monday) of a month; n = -1 for the last."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Federal observance: Saturday holidays move to Friday, Sunday to Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def us_federal_holidays(year: int) -> list[date]:
+    """The federal holidays of a year, on their observed dates."""
+    fixed = [(1, 1), (6, 19), (7, 4), (11, 11), (12, 25)]
+    holidays = [_observed(date(year, month, day)) for month, day in fixed]
+    holidays += [
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 10, 0, 2),   # Columbus Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+    ]
+    # New Year's Day on a Saturday is observed on December 31st before
+    if date(year + 1, 1, 1).weekday() == 5:
+        holidays.append(date(year, 12, 31))
+    return sorted(d for d in holidays if d.year == year)
+
+
+def parse_holidays(value: str) -> tuple[set[date], set[tuple[int, int]]]:
+    """Parse 'YYYY-MM-DD,MM-DD,...' into (dates, annual (month, day) pairs)."""
+    dates, annual = set(), set()
+    for entry in (value or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            if entry.count('-') == 2:
+                dates.add(date.fromisoformat(entry))
+            else:
+                month, day = (int(part) for part in entry.split('-'))
+                date(2000, month, day)      # Validates, leap day included
+                annual.add((month, day))
+        except ValueError:
+            print(f"Warning: ignoring holiday {entry!r} (use YYYY-MM-DD or MM-DD)", file=sys.stderr)
+    return dates, annual
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.fromisoformat(str(value)).date()
+
+
+# ── Calendar ──
+
+class BusinessCalendar:
+    """Monday-Friday business days minus a holiday set, with O(1) arithmetic."""
+
+    def __init__(
+        self,
+        holidays: Iterable[date] = (),
+        annual: Iterable[tuple[int, int]] = (),
+        federal: bool = True
+    ):
+        self.federal = federal
+        self._dates = frozenset(holidays)
+        self._annual = frozenset(annual)
+        self._lock = threading.Lock()
+        self._years = None
+        # (ordinal of the first date covered, business days before each
+        # covered date, ordinals of the covered business days) - swapped as
+        # one tuple so readers never see half of a rebuild
+        self._tables = None
+
+    def holidays(self, year: int) -> list[date]:
+        """Every holiday of a year on this calendar."""
+        days = set(us_federal_holidays(year)) if self.federal else set()
+        days.update(d for d in self._dates if d.year == year)
+        for month, day in self._annual:
+            if month != 2 or day != 29 or year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+                days.add(date(year, month, day))
+        return sorted(days)
+
+    def _build(self, first_year: int, last_year: int):
+        """Precompute the tables for January 1st first_year to December 31st last_year."""
+        closed = set()
+        for year in range(first_year, last_year + 1):
+            closed.update(d.toordinal() for d in self.holidays(year))
+        first = date(first_year, 1, 1).toordinal()
+        last = date(last_year, 12, 31).toordinal()
+        before, days = [], []
+        for ordinal in range(first, last + 1):
+            before.append(len(days))
+            # date.fromordinal(1) is a Monday, so ordinal % 7 is 0 on Sundays
+            if ordinal % 7 not in (0, 6) and ordinal not in closed:
+                days.append(ordinal)
+        before.append(len(days))    # For the day after the last
+        self._years = (first_year, last_year)
+        self._tables = (first, before, days)
+
+    def _cover(self, *ordinals: int) -> tuple[int, list[int], list[int]]:
+        """The tables, grown if needed to span these dates (plus the day after each)."""
+        low = date.fromordinal(min(ordinals)).year
+        high = date.fromordinal(max(ordinals) + 1).year
+        with self._lock:
+            if self._years is None:
+                this_year = date.today().year
+                self._build(min(low, this_year - INITIAL_YEARS_BEFORE), max(high, this_year + INITIAL_YEARS_AFTER))
+            elif low < self._years[0] or high > self._years[1]:
+                self._build(min(low, self._years[0]), max(high, self._years[1] + 1))
+            return self._tables
+
+    def is_business_day(self, day) -> bool:
+        ordinal = _as_date(day).toordinal()
+        first, before, _ = self._cover(ordinal)
+        return before[ordinal + 1 - first] > before[ordinal - first]
+
+    def add_business_days(self, start, days: int) -> date:
+        """
+        The date `days` business days after `start` (start itself never
+        counts, as with the turnaround on an engagement letter). 0 is start.
+        """
+        start = _as_date(start)
+        if days <= 0:
+            return start
+        ordinal = start.toordinal()
+        first, before, business = self._cover(ordinal)
+        while True:
+            index = before[ordinal + 1 - first] + days - 1
+            if index < len(business):
+                return date.fromordinal(business[index])
+            first, before, business = self._cover(business[-1] + 366)
+
+    def business_days_between(self, start, end) -> int:
+        """Business days after `start` up to and including `end` (negative if end is earlier)."""
+        start, end = _as_date(start).toordinal(), _as_date(end).toordinal()
+        first, before, _ = self._cover(start, end)
+        return before[end + 1 - first] - before[start + 1 - first]
+
+    def add_business_days_many(self, starts: Sequence, days: Sequence[int] | int) -> list[date]:
+        """add_business_days for a column of dates (and turnarounds) at once."""
+        if not starts:
+            return []
+        ordinals = [_as_date(s).toordinal() for s in starts]
+        counts = [days] * len(ordinals) if isinstance(days, int) else [int(d) for d in days]
+        # Business days run at least one per 3 calendar days (long holiday runs aside)
+        first, before, business = self._cover(*ordinals, max(o + 3 * max(n, 0) for o, n in zip(ordinals, counts)))
+        while max(before[o + 1 - first] + n for o, n in zip(ordinals, counts)) > len(business):
+            first, before, business = self._cover(business[-1] + 366)
+
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
+        if np is None:
+            return [
+                date.fromordinal(business[before[o + 1 - first] + n - 1]) if n > 0 else date.fromordinal(o)
+                for o, n in zip(ordinals, counts)
+            ]
+
+        ordinal_arr = np.asarray(ordinals, dtype=np.int64)
+        count_arr = np.asarray(counts, dtype=np.int64)
+        index = np.asarray(before, dtype=np.int64)[ordinal_arr + 1 - first] + count_arr - 1
+        result = np.where(count_arr > 0, np.asarray(business, dtype=np.int64)[np.clip(index, 0, None)], ordinal_arr)
+        return [date.fromordinal(int(o)) for o in result]
+
+
+def _holiday_env(key: str) -> tuple[set[date], set[tuple[int, int]]]:
+    return parse_holidays(os.getenv(f"HOLIDAYS_{key.upper().replace('-', '_').replace(' ', '_')}", ''))
+
+
+@lru_cache(maxsize=256)
+def get_calendar(client_id: str = None, state: str = None) -> BusinessCalendar:
+    """The calendar for a client's orders in a state (both optional), cached."""
+    dates, annual = parse_holidays(os.getenv('APPRAISAL_EXTRA_HOLIDAYS', ''))
+    for key in (state, client_id):
+        if key:
+            extra_dates, extra_annual = _holiday_env(key)
+            dates |= extra_dates
+            annual |= extra_annual
+    return BusinessCalendar(dates, annual, federal=BASE_HOLIDAYS == 'us_federal')
+
+
+def calendar_for_order(order: dict) -> BusinessCalendar:
+    return get_calendar(order.get('client_id') or None, (order.get('property_state') or '').upper() or None)
+
+
+# ── SLAs ──
+
+def get_sla_days() -> dict:
+    """Business days allowed per urgency level, with APPRAISAL_SLA_DAYS overrides."""
+    sla = dict(DEFAULT_SLA_DAYS)
+    override = os.getenv('APPRAISAL_SLA_DAYS')
+    if override:
+        try:
+            sla.update({k: int(v) for k, v in json.loads(override).items()})
+        except (ValueError, TypeError, AttributeError):
+            pass  # Malformed override - keep defaults
+    return sla
+
+
+def sla_due_dates(orders: list[dict]) -> list[str | None]:
+    """
+    SLA due date (YYYY-MM-DD) of each order: its urgency's business days
+    after created_at, on the order's calendar. None where created_at is
+    missing or unreadable. One vectorized pass per calendar.
+    """
+    sla = get_sla_days()
+    groups: dict[tuple, list[int]] = {}
+    starts: dict[int, date] = {}
+    for i, order in enumerate(orders):
+        try:
+            starts[i] = _as_date(order.get('created_at'))
+        except (TypeError, ValueError):
+            continue
+        key = (order.get('client_id') or None, (order.get('property_state') or '').upper() or None)
+        groups.setdefault(key, []).append(i)
+
+    due: list[str | None] = [None] * len(orders)
+    for (client_id, state), indexes in groups.items():
+        days = [sla.get(orders[i].get('urgency') or 'Standard', sla['Standard']) for i in indexes]
+        results = get_calendar(client_id, state).add_business_days_many([starts[i] for i in indexes], days)
+        for i, result in zip(indexes, results):
+            due[i] = result.isoformat()
+    return due
+
+
+def open_order_slas() -> dict:
+    """SLA due dates of every open order, earliest first."""
+    from appraisal.sheets_utils import ORDERS_SHEET_ID, ReadBatch
+
+    reads = ReadBatch()
+    reads.rows(ORDERS_SHEET_ID, 'Orders', columns=[
+        'order_id', 'status', 'client_id', 'property_state', 'urgency', 'created_at', 'due_date'
+    ])
+    orders = [o for o in reads.load()[0] if o.get('order_id') and o.get('status') not in CLOSED_STATUSES]
+
+    today = date.today().isoformat()
+    rows = [
+        {
+            'order_id': order['order_id'],
+            'status': order.get('status'),
+            'urgency': order.get('urgency') or 'Standard',
+            'sla_due': due,
+            'overdue': bool(due and due < today),
+        }
+        for order, due in zip(orders, sla_due_dates(orders))
+    ]
+    rows.sort(key=lambda r: (r['sla_due'] is None, r['sla_due'] or ''))
+    return {
+        'success': True,
+        'open_orders': len(rows),
+        'overdue': sum(r['overdue'] for r in rows),
+        'orders': rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Business-day due dates and SLAs")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--add", type=int, metavar="DAYS", help="Date DAYS business days after --from")
+    action.add_argument("--holidays", type=int, metavar="YEAR", help="List a year's holidays")
+    action.add_argument("--sla", action="store_true", help="SLA due dates of every open order")
+    parser.add_argument("--from", dest="start", default=None, help="Start date (default: today)")
+    parser.add_argument("--client", default=None, help="Client ID (adds HOLIDAYS_<client_id>)")
+    parser.add_argument("--state", default=None, help="Property state (adds HOLIDAYS_<state>)")
+    args = parser.parse_args()
+
+    calendar = get_calendar(args.client, args.state.upper() if args.state else None)
+
+    if args.add is not None:
+        try:
+            start = _as_date(args.start) if args.start else date.today()
+        except ValueError:
+            print(f"Error: invalid --from date: {args.start}", file=sys.stderr)
+            sys.exit(1)
+        result = {
+            'success': True,
+            'from': start.isoformat(),
+            'business_days': args.add,
+            'due_date': calendar.add_business_days(start, args.add).isoformat(),
+        }
+    elif args.holidays is not None:
+        result = {'success': True, 'year': args.holidays,
+                  'holidays': [d.isoformat() for d in calendar.holidays(args.holidays)]}
+    else:
+        result = open_order_slas()
+
+    print(json.dumps(result, indent=2))
+
+    if args.sla:
+        print(f"\n✓ {result['open_orders']} open order(s), {result['overdue']} past SLA", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
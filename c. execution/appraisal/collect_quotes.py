@@ -20,14 +20,8 @@ from __future__ import annotations
 import argparse
 import json
 import sys
-import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from pathlib import Path
 from datetime import datetime
-import random
-import string
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -36,25 +30,53 @@ load_dotenv()
 
 from appraisal.sheets_utils import (
     ORDERS_SHEET_ID, QUOTES_SHEET_ID, PANEL_SHEET_ID,
-    read_sheet, find_row_by_id, append_row, update_row,
+    read_sheet, find_row_by_id, ReadBatch, WriteBatch,
     ORDERS_COLUMNS, QUOTES_COLUMNS
 )
+from appraisal.panel_cache import get_panel_model, cached_panel_model, store_panel
+from appraisal.scoring import get_client_weights, quote_scores, top_k
+from appraisal.mail_transport import send_email
+from appraisal.outbox import outbox_enabled
+from appraisal.email_templates import summary_email
+from appraisal.ids import new_quote_id
 
 
 def generate_quote_id() -> str:
-    """Generate unique quote ID."""
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    random_part = ''.join(random.choices(string.ascii_uppercase, k=4))
-    return f"Q-{timestamp}-{random_part}"
+    """Generate a unique, time-ordered quote ID: Q-<16 chars> (see ids.py)."""
+    return new_quote_id()
 
 
 def get_appraiser(appraiser_id: str) -> dict | None:
     """Get appraiser details by ID."""
-    appraisers = read_sheet(PANEL_SHEET_ID, 'Appraiser Panel!A:Z')
-    for a in appraisers:
-        if a.get('appraiser_id') == appraiser_id:
-            return a
-    return None
+    return get_panel_model(PANEL_SHEET_ID).get(appraiser_id)
+
+
+def load_quote_context(order_ids: list[str]) -> dict:
+    """
+    Load what recording quotes needs in one read round-trip: the orders,
+    the appraiser panel (unless cached) and the quotes already on file.
+
+    Returns:
+        Dict with orders (order_id -> (row_index, order) or None), panel
+        (PanelModel) and quotes (order_id and appraiser_id of every quote)
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    reads = ReadBatch()
+    for order_id in order_ids:
+        reads.row(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+    quotes_read = reads.rows(QUOTES_SHEET_ID, 'Quotes', columns=['order_id', 'appraiser_id'])
+    panel = cached_panel_model(PANEL_SHEET_ID)
+    if panel is None:
+        reads.rows(PANEL_SHEET_ID, 'Appraiser Panel')
+
+    loaded = reads.load()
+    if panel is None:
+        panel = store_panel(PANEL_SHEET_ID, loaded[quotes_read + 1])
+    return {
+        'orders': dict(zip(order_ids, loaded[:len(order_ids)])),
+        'quotes': loaded[quotes_read],
+        'panel': panel
+    }
 
 
 def record_quote(
@@ -77,78 +99,127 @@ def record_quote(
     Returns:
         Dict with result
     """
+    return record_quotes([{
+        'order_id': order_id,
+        'appraiser_id': appraiser_id,
+        'fee': fee,
+        'turnaround_days': turnaround_days,
+        'notes': notes
+    }])[0]
 
-    # Verify order exists
-    order_result = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
-    if not order_result:
-        return {
-            'success': False,
-            'errors': [f'Order not found: {order_id}']
-        }
 
-    # Get appraiser details
-    appraiser = get_appraiser(appraiser_id)
-    if not appraiser:
-        return {
-            'success': False,
-            'errors': [f'Appraiser not found: {appraiser_id}']
-        }
+def record_quotes(submissions: list[dict]) -> list[dict]:
+    """
+    Record many quote submissions with one read and one write round-trip
+    (inbound_quotes.py records parsed email replies this way).
 
-    # Check for duplicate quote
-    existing_quotes = read_sheet(QUOTES_SHEET_ID, 'Quotes!A:Z')
-    for q in existing_quotes:
-        if q.get('order_id') == order_id and q.get('appraiser_id') == appraiser_id:
-            return {
+    Args:
+        submissions: Dicts with order_id, appraiser_id, fee,
+            turnaround_days and optionally notes
+
+    Returns:
+        One result per submission, in order, as from record_quote
+    """
+    if not submissions:
+        return []
+
+    # One read for everything the step needs, one write for its result
+    context = load_quote_context([s['order_id'] for s in submissions])
+    on_file = {(q.get('order_id'), q.get('appraiser_id')) for q in context['quotes']}
+
+    results: list[dict | None] = [None] * len(submissions)
+    batch = WriteBatch()
+    appended = []       # (submission index, write position, quote)
+    advancing = {}      # order_id -> (row_index, order) moving to quotes_received
+
+    for i, submission in enumerate(submissions):
+        order_id = submission['order_id']
+        appraiser_id = submission['appraiser_id']
+
+        # Verify order exists
+        order_result = context['orders'].get(order_id)
+        if not order_result:
+            results[i] = {
                 'success': False,
-                'errors': [f'Quote already exists from {appraiser.get("name")} for order {order_id}']
+                'errors': [f'Order not found: {order_id}']
             }
+            continue
 
-    # Create quote record
-    quote = {
-        'quote_id': generate_quote_id(),
-        'order_id': order_id,
-        'appraiser_id': appraiser_id,
-        'appraiser_name': appraiser.get('name', ''),
-        'appraiser_email': appraiser.get('email', ''),
-        'fee': str(fee),
-        'turnaround_days': str(turnaround_days),
-        'notes': notes,
-        'submitted_at': datetime.now().isoformat(),
-        'selected': ''
-    }
+        # Get appraiser details
+        appraiser = context['panel'].get(appraiser_id)
+        if not appraiser:
+            results[i] = {
+                'success': False,
+                'errors': [f'Appraiser not found: {appraiser_id}']
+            }
+            continue
 
-    # Save to sheet
-    try:
-        append_row(QUOTES_SHEET_ID, 'Quotes', quote, QUOTES_COLUMNS)
-    except Exception as e:
-        return {
-            'success': False,
-            'errors': [f'Failed to save quote: {str(e)}']
+        # Check for duplicate quote (on file, or earlier in this batch)
+        if (order_id, appraiser_id) in on_file:
+            results[i] = {
+                'success': False,
+                'errors': [f'Quote already exists from {appraiser.get("name")} for order {order_id}'],
+                'duplicate': True
+            }
+            continue
+        on_file.add((order_id, appraiser_id))
+
+        # Create quote record
+        quote = {
+            'quote_id': generate_quote_id(),
+            'order_id': order_id,
+            'appraiser_id': appraiser_id,
+            'appraiser_name': appraiser.get('name', ''),
+            'appraiser_email': appraiser.get('email', ''),
+            'fee': str(submission['fee']),
+            'turnaround_days': str(submission['turnaround_days']),
+            'notes': submission.get('notes', ''),
+            'submitted_at': datetime.now().isoformat(),
+            'selected': ''
         }
+        appended.append((i, batch.append_row(QUOTES_SHEET_ID, 'Quotes', quote, QUOTES_COLUMNS), quote))
+
+        if order_result[1].get('status') == 'rfp_sent':
+            advancing[order_id] = order_result
+
+    if not appended:
+        return results
 
-    # Update order status if needed
-    row_index, order = order_result
-    if order.get('status') == 'rfp_sent':
+    # Save quotes and advance order statuses in one write round-trip.
+    # The quotes are queued first so no status moves without its quote.
+    for row_index, order in advancing.values():
         order['status'] = 'quotes_received'
-        try:
-            update_row(ORDERS_SHEET_ID, 'Orders', row_index, order, ORDERS_COLUMNS)
-        except Exception as e:
-            pass  # Non-critical, continue
+        batch.update_row(ORDERS_SHEET_ID, 'Orders', row_index, order, ORDERS_COLUMNS)
 
-    return {
-        'success': True,
-        'quote_id': quote['quote_id'],
-        'quote': quote
-    }
+    write_results = batch.flush()
+    for i, position, quote in appended:
+        if write_results[position]['status'] != 'written':
+            results[i] = {
+                'success': False,
+                'errors': [f"Failed to save quote: {write_results[position].get('error')}"],
+                'retry': True
+            }
+        else:
+            results[i] = {
+                'success': True,
+                'quote_id': quote['quote_id'],
+                'quote': quote
+            }
+    # Order status update failure is non-critical
 
+    return results
 
-def get_quotes_for_order(order_id: str) -> list[dict]:
-    """Get all quotes for an order."""
+
+def get_quotes_for_order(order_id: str, include_archived: bool = False) -> list[dict]:
+    """Get all quotes for an order - also from the archive tabs with include_archived (see archive.py)."""
+    if include_archived:
+        from appraisal.archive import find_quotes
+        return find_quotes(order_id)
     all_quotes = read_sheet(QUOTES_SHEET_ID, 'Quotes!A:Z')
     return [q for q in all_quotes if q.get('order_id') == order_id]
 
 
-def rank_quotes(quotes: list[dict]) -> list[dict]:
+def rank_quotes(quotes: list[dict], weights: dict = None, limit: int = None) -> list[dict]:
     """
     Rank quotes by value.
 
@@ -156,25 +227,26 @@ def rank_quotes(quotes: list[dict]) -> list[dict]:
     - Fee (normalized)
     - Turnaround time
     - Appraiser quality score (from panel)
+
+    Weights default to scoring.DEFAULT_QUOTE_WEIGHTS. With a limit, only
+    the top `limit` are selected and returned.
     """
 
     # Get appraiser quality scores
-    appraisers = read_sheet(PANEL_SHEET_ID, 'Appraiser Panel!A:Z')
-    quality_map = {a.get('appraiser_id'): float(a.get('quality_score', 3) or 3) for a in appraisers}
-
-    def score(q):
-        fee = float(q.get('fee', 5000) or 5000)
-        turnaround = int(q.get('turnaround_days', 14) or 14)
-        quality = quality_map.get(q.get('appraiser_id'), 3)
-
-        # Composite score (lower is better)
-        fee_score = fee / 500  # Normalize
-        turnaround_score = turnaround * 0.5
-        quality_bonus = (5 - quality) * 3  # Higher quality = lower score
-
-        return fee_score + turnaround_score + quality_bonus
-
-    ranked = sorted(quotes, key=score)
+    panel = get_panel_model(PANEL_SHEET_ID).by_id
+    quality_map = {}
+    for q in quotes:
+        a = panel.get(q.get('appraiser_id'))
+        if a:
+            quality_map[a.appraiser_id] = a.rank_quality if a.rank_quality is not None else 3.0
+
+    scores = quote_scores(
+        [float(q.get('fee', 5000) or 5000) for q in quotes],
+        [int(q.get('turnaround_days', 14) or 14) for q in quotes],
+        [quality_map.get(q.get('appraiser_id'), 3) for q in quotes],
+        weights,
+    )
+    ranked = [quotes[i] for i in top_k(scores, limit)]
 
     for i, q in enumerate(ranked):
         q['rank'] = i + 1
@@ -184,16 +256,23 @@ def rank_quotes(quotes: list[dict]) -> list[dict]:
     return ranked
 
 
-def get_quote_summary(order_id: str) -> dict:
+def get_quote_summary(
+    order_id: str,
+    order_result: tuple[int, dict] = None,
+    quotes: list[dict] = None
+) -> dict:
     """
     Get ranked quote summary for an order.
 
+    order_result ((row_index, order)) and the order's quotes are read
+    unless the caller passes them in.
+
     Returns:
         Dict with order details, ranked quotes, and recommendation
     """
 
     # Get order
-    order_result = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+    order_result = order_result or find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
     if not order_result:
         return {
             'success': False,
@@ -203,7 +282,8 @@ def get_quote_summary(order_id: str) -> dict:
     _, order = order_result
 
     # Get quotes
-    quotes = get_quotes_for_order(order_id)
+    if quotes is None:
+        quotes = get_quotes_for_order(order_id)
     if not quotes:
         return {
             'success': True,
@@ -214,7 +294,7 @@ def get_quote_summary(order_id: str) -> dict:
         }
 
     # Rank quotes
-    ranked = rank_quotes(quotes)
+    ranked = rank_quotes(quotes, get_client_weights(order.get('client_id'), 'quote'))
 
     return {
         'success': True,
@@ -227,64 +307,29 @@ def get_quote_summary(order_id: str) -> dict:
     }
 
 
-def format_summary_email(summary: dict) -> tuple[str, str]:
-    """Format quote summary as email content."""
-
-    order_id = summary.get('order_id')
-    address = summary.get('property_address', 'N/A')
-    quotes = summary.get('quotes', [])
-
-    subject = f"Appraisal Quotes Ready - Order #{order_id}"
-
-    # Build quote table
-    table_rows = []
-    for q in quotes:
-        rec = "★ RECOMMENDED" if q.get('recommended') else ""
-        table_rows.append(
-            f"  {q.get('appraiser_name', 'N/A'):<25} ${float(q.get('fee', 0)):>8,.0f}    {q.get('turnaround_days', 'N/A'):>3} days    {q.get('quality_score', 'N/A')}    {rec}"
-        )
-
-    table = "\n".join(table_rows)
-
-    recommended = summary.get('recommended')
-    rec_text = ""
-    if recommended:
-        rec_text = f"""
-RECOMMENDATION
-─────────────────────────────────
-We recommend {recommended.get('appraiser_name')} based on their combination of
-competitive fee (${float(recommended.get('fee', 0)):,.0f}), turnaround ({recommended.get('turnaround_days')} days),
-and quality rating ({recommended.get('quality_score')}/5.0).
-"""
-
-    body = f"""Quote summary for Order #{order_id}
-
-PROPERTY
-─────────────────────────────────
-{address}
-
-QUOTES RECEIVED ({len(quotes)})
-─────────────────────────────────
-  {"Appraiser":<25} {"Fee":>10}    {"Time":>8}    Rating
-
-{table}
-{rec_text}
-NEXT STEPS
-─────────────────────────────────
-Reply to this email with your selection, or we will proceed with the
-recommended appraiser if no response is received within 24 hours.
-
-Best regards,
-{os.getenv('COMPANY_NAME', 'Appraisal Management')} Order Desk
-"""
-
+def format_summary_email(summary: dict, client_id: str = None) -> tuple[str, str]:
+    """Format quote summary as email content (templates/quote_summary.*)."""
+    subject, body, _ = summary_email(summary, client_id)
     return subject, body
 
 
-def send_summary_to_client(order_id: str, dry_run: bool = False) -> dict:
-    """Send quote summary email to client."""
+def send_summary_to_client(
+    order_id: str,
+    dry_run: bool = False,
+    order_result: tuple[int, dict] = None,
+    quotes: list[dict] = None
+) -> dict:
+    """Send quote summary email to client (see get_quote_summary for the optional inputs)."""
+
+    # The order is read once, for both the summary and the client's address
+    order_result = order_result or find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+    if not order_result:
+        return {
+            'success': False,
+            'errors': [f'Order not found: {order_id}']
+        }
 
-    summary = get_quote_summary(order_id)
+    summary = get_quote_summary(order_id, order_result=order_result, quotes=quotes)
     if not summary.get('success'):
         return summary
 
@@ -295,13 +340,6 @@ def send_summary_to_client(order_id: str, dry_run: bool = False) -> dict:
         }
 
     # Get client email from order
-    order_result = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
-    if not order_result:
-        return {
-            'success': False,
-            'errors': [f'Order not found: {order_id}']
-        }
-
     _, order = order_result
     client_email = order.get('contact_email')
 
@@ -311,7 +349,7 @@ def send_summary_to_client(order_id: str, dry_run: bool = False) -> dict:
             'errors': ['No client email on order']
         }
 
-    subject, body = format_summary_email(summary)
+    subject, body, html = summary_email(summary, order.get('client_id'))
 
     if dry_run:
         return {
@@ -322,27 +360,26 @@ def send_summary_to_client(order_id: str, dry_run: bool = False) -> dict:
             'body': body
         }
 
-    # Send email
-    smtp_config = {
-        'host': os.getenv('SMTP_HOST'),
-        'port': int(os.getenv('SMTP_PORT', 587)),
-        'user': os.getenv('SMTP_USER'),
-        'password': os.getenv('SMTP_PASSWORD'),
-        'from_name': os.getenv('SENDER_NAME', 'Appraisal Order Desk')
-    }
+    # Queue in the outbox, or send now
+    if outbox_enabled():
+        key = f"summary:{order_id}:{len(summary.get('quotes', []))}"
+        with WriteBatch() as batch:
+            batch.queue_email(client_email, subject, body, key=key, html=html)
+        status = batch.results[0]['status']
+        if status not in ('written', 'duplicate'):
+            return {
+                'success': False,
+                'errors': [f"Failed to queue email: {batch.results[0].get('error')}"]
+            }
+        return {
+            'success': True,
+            'queued_to': client_email,
+            'duplicate': status == 'duplicate',
+            'quote_count': len(summary.get('quotes', []))
+        }
 
     try:
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = f"{smtp_config['from_name']} <{smtp_config['user']}>"
-        msg['To'] = client_email
-        msg.attach(MIMEText(body, 'plain'))
-
-        with smtplib.SMTP(smtp_config['host'], smtp_config['port']) as server:
-            server.starttls()
-            server.login(smtp_config['user'], smtp_config['password'])
-            server.send_message(msg)
-
+        send_email(client_email, subject, body, html=html)
     except Exception as e:
         return {
             'success': False,
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Email templates for the appraisal workflow.
+
+Each email is a set of files in templates/:
+
+    <name>.subject.txt    Subject line
+    <name>.txt            Plain-text body
+    <name>.html           HTML body (optional - sent as multipart/alternative)
+
+A client can override any of these files by placing its own copy in
+templates/clients/<client_id>/ (or under APPRAISAL_TEMPLATE_DIR, which is
+searched first); files it doesn't override fall back to the defaults.
+Templates are parsed once per process and cached.
+
+Syntax:
+    {field}                      Value from the context ('' if missing)
+    {field:,.0f}                 Value with a format spec, as in str.format
+    {#field}...{/field}          Rendered only if field is truthy; repeated
+                                 per item for a list of dicts, with each
+                                 item's keys in scope (once for a dict)
+    {{ and }}                    Literal braces
+
+Values in .html templates are HTML-escaped.
+
+render_batch renders one template for many recipients: the shared order
+context is built once and each recipient only adds its own fields.
+
+Usage:
+    python email_templates.py --list
+    python email_templates.py --render rfp --order-id ORD-2024-12345
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import threading
+from collections import ChainMap
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+TEMPLATE_DIR = Path(__file__).parent / 'templates'
+EXTRA_TEMPLATE_DIR = os.getenv('APPRAISAL_TEMPLATE_DIR')
+
+# Read once per process - shared by every template
+COMPANY_CONTEXT = {
+    'company_name': os.getenv('COMPANY_NAME', 'Appraisal Management'),
+    'company_email': os.getenv('COMPANY_EMAIL', ''),
+}
+
+_TOKEN = re.compile(r'\{\{|\}\}|\{([#/]?)([A-Za-z_]\w*)(?::([^{}]*))?\}')
+
+
+# ── Compilation ──
+
+class TemplateSyntaxError(ValueError):
+    pass
+
+
+def _compile(source: str, escape: bool = False) -> list:
+    """
+    Parse template source into nodes:
+    str (literal), (name, spec) (field), or (name, [nodes]) (section).
+    """
+    root: list = []
+    stack = [(None, root)]
+    pos = 0
+
+    for match in _TOKEN.finditer(source):
+        if match.start() > pos:
+            stack[-1][1].append(source[pos:match.start()])
+        pos = match.end()
+
+        token = match.group(0)
+        if token in ('{{', '}}'):
+            stack[-1][1].append(token[0])
+            continue
+
+        kind, name, spec = match.groups()
+        if kind == '#':
+            children: list = []
+            stack[-1][1].append((name, children))
+            stack.append((name, children))
+        elif kind == '/':
+            if stack[-1][0] != name:
+                raise TemplateSyntaxError(f'Unexpected {{/{name}}}')
+            stack.pop()
+        else:
+            stack[-1][1].append((name, spec or '', escape))
+
+    if len(stack) > 1:
+        raise TemplateSyntaxError(f'Unclosed {{#{stack[-1][0]}}}')
+    if pos < len(source):
+        root.append(source[pos:])
+    return root
+
+
+def _render(nodes: list, context, out: list):
+    for node in nodes:
+        if type(node) is str:
+            out.append(node)
+        elif len(node) == 3:
+            name, spec, escape = node
+            value = context.get(name)
+            if value is None:
+                continue
+            text = format(value, spec) if spec else str(value)
+            out.append(html.escape(text) if escape else text)
+        else:
+            name, children = node
+            value = context.get(name)
+            if not value:
+                continue
+            if isinstance(value, dict):
+                _render(children, context.new_child(value), out)
+            elif isinstance(value, (list, tuple)):
+                for item in value:
+                    _render(children, context.new_child(item) if isinstance(item, dict) else context, out)
+            else:
+                _render(children, context, out)
+
+
+class EmailTemplate:
+    """Compiled subject, plain-text and optional HTML parts of one email."""
+
+    __slots__ = ('name', 'subject', 'text', 'html')
+
+    def __init__(self, name: str, subject: str, text: str, html_source: str = None):
+        self.name = name
+        self.subject = _compile(subject.strip('\n'))
+        self.text = _compile(text)
+        self.html = _compile(html_source, escape=True) if html_source is not None else None
+
+    def render(self, context) -> tuple[str, str, str | None]:
+        """Render (subject, text, html) - html is None without an HTML part."""
+        if not isinstance(context, ChainMap):
+            context = ChainMap(context)
+        parts = []
+        for nodes in (self.subject, self.text, self.html):
+            if nodes is None:
+                parts.append(None)
+                continue
+            out: list = []
+            _render(nodes, context, out)
+            parts.append(''.join(out))
+        return parts[0], parts[1], parts[2]
+
+
+# ── Lookup ──
+
+_cache: dict[tuple, EmailTemplate] = {}
+_cache_lock = threading.Lock()
+
+
+def _search_dirs(client_id: str = None) -> list[Path]:
+    roots = [Path(EXTRA_TEMPLATE_DIR)] if EXTRA_TEMPLATE_DIR else []
+    roots.append(TEMPLATE_DIR)
+    dirs = []
+    if client_id:
+        dirs += [root / 'clients' / client_id for root in roots]
+    dirs += roots
+    return dirs
+
+
+def _read(name: str, suffix: str, client_id: str = None) -> str | None:
+    for directory in _search_dirs(client_id):
+        path = directory / f'{name}{suffix}'
+        if path.is_file():
+            return path.read_text(encoding='utf-8')
+    return None
+
+
+def get_template(name: str, client_id: str = None) -> EmailTemplate:
+    """Get a compiled template, with the client's overrides applied."""
+    key = (name, client_id or '')
+    template = _cache.get(key)
+    if template is None:
+        subject = _read(name, '.subject.txt', client_id)
+        text = _read(name, '.txt', client_id)
+        if subject is None or text is None:
+            raise FileNotFoundError(f'Email template not found: {name}')
+        template = EmailTemplate(name, subject, text, _read(name, '.html', client_id))
+        with _cache_lock:
+            _cache[key] = template
+    return template
+
+
+def clear_cache():
+    """Forget compiled templates, e.g. after editing the files."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def render(name: str, context: dict, client_id: str = None) -> tuple[str, str, str | None]:
+    """Render one email. Returns (subject, text, html)."""
+    return get_template(name, client_id).render(ChainMap(context, COMPANY_CONTEXT))
+
+
+def render_batch(
+    name: str,
+    shared: dict,
+    recipients: list[dict],
+    client_id: str = None
+) -> list[tuple[str, str, str | None]]:
+    """
+    Render one template for many recipients.
+
+    Args:
+        name: Template name
+        shared: Context common to every recipient (built once)
+        recipients: Per-recipient context, layered over `shared`
+        client_id: Client whose overrides apply
+
+    Returns:
+        (subject, text, html) per recipient, in order
+    """
+    template = get_template(name, client_id)
+    base = ChainMap(shared, COMPANY_CONTEXT)
+    return [template.render(base.new_child(r)) for r in recipients]
+
+
+# ── Workflow contexts ──
+
+def _amount(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def order_context(order: dict) -> dict:
+    """Fields of an order shared by every email about it."""
+    return {
+        'order_id': order.get('order_id', ''),
+        'property_address': order.get('property_address', ''),
+        'property_address_short': (order.get('property_address') or '')[:40],
+        'property_city': order.get('property_city', ''),
+        'property_state': order.get('property_state', ''),
+        'property_type': order.get('property_type', ''),
+        'property_type_label': order.get('property_type', 'Commercial'),
+        'scope': order.get('scope', 'Full Appraisal'),
+        'urgency': order.get('urgency', 'Standard'),
+        'loan_amount': _amount(order.get('loan_amount')),
+        'loan_purpose': order.get('loan_purpose', 'N/A'),
+        'contact_name': order.get('contact_name', 'N/A'),
+        'contact_email': order.get('contact_email', 'N/A'),
+        'special_instructions': order.get('special_instructions') or '',
+    }
+
+
+def _quote_context(quote: dict) -> dict:
+    return {
+        'appraiser_name': quote.get('appraiser_name', 'Appraiser'),
+        'fee': _amount(quote.get('fee')),
+        'turnaround_days': quote.get('turnaround_days'),
+        'quality_score': quote.get('quality_score'),
+    }
+
+
+def rfp_emails(order: dict, appraisers: list[dict], deadline: str) -> list[tuple[str, str, str | None]]:
+    """RFP emails for each appraiser, in order."""
+    shared = dict(order_context(order), deadline=deadline)
+    recipients = [{'appraiser_name': a.get('name', 'Appraiser')} for a in appraisers]
+    return render_batch('rfp', shared, recipients, order.get('client_id'))
+
+
+def engagement_email(order: dict, quote: dict, due_date: str) -> tuple[str, str, str | None]:
+    """Engagement letter for the selected quote."""
+    context = dict(order_context(order), **_quote_context(quote), due_date=due_date)
+    return render('engagement', context, order.get('client_id'))
+
+
+def decline_emails(order: dict, quotes: list[dict]) -> list[tuple[str, str, str | None]]:
+    """Decline notices for each quote, in order."""
+    recipients = [{'appraiser_name': q.get('appraiser_name', 'Appraiser')} for q in quotes]
+    return render_batch('decline', order_context(order), recipients, order.get('client_id'))
+
+
+def summary_email(summary: dict, client_id: str = None) -> tuple[str, str, str | None]:
+    """Quote summary for the client."""
+    quotes = [
+        dict(
+            _quote_context(q),
+            appraiser_name=q.get('appraiser_name', 'N/A'),
+            turnaround_days=q.get('turnaround_days', 'N/A'),
+            quality_score=q.get('quality_score', 'N/A'),
+            rec='★ RECOMMENDED' if q.get('recommended') else '',
+        )
+        for q in summary.get('quotes', [])
+    ]
+    recommended = summary.get('recommended')
+    context = {
+        'order_id': summary.get('order_id'),
+        'property_address': summary.get('property_address', 'N/A'),
+        'quotes': quotes,
+        'quote_count': len(quotes),
+        'recommended': dict(recommended, **_quote_context(recommended)) if recommended else None,
+    }
+    return render('quote_summary', context, client_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and preview appraisal email templates")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--list", action="store_true", help="List templates and client overrides")
+    action.add_argument("--render", metavar="NAME", help="Preview a template for an order (rfp, engagement, decline, quote_summary)")
+    parser.add_argument("--order-id", help="Order to preview with")
+    parser.add_argument("--client-id", help="Preview with this client's overrides")
+    args = parser.parse_args()
+
+    if args.list:
+        names = sorted({p.name.split('.')[0] for p in TEMPLATE_DIR.glob('*.txt')})
+        clients = sorted(p.name for p in (TEMPLATE_DIR / 'clients').glob('*') if p.is_dir())
+        result = {'success': True, 'templates': names, 'client_overrides': clients}
+    else:
+        if not args.order_id:
+            parser.error("--render requires --order-id")
+        from appraisal.sheets_utils import ORDERS_SHEET_ID, find_row_by_id
+        found = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', args.order_id)
+        if not found:
+            result = {'success': False, 'errors': [f'Order not found: {args.order_id}']}
+        else:
+            order = found[1]
+            if args.client_id:
+                order = dict(order, client_id=args.client_id)
+            sample_quote = {'appraiser_name': 'Sample Appraiser', 'fee': 3500, 'turnaround_days': 14, 'quality_score': 4.5}
+            if args.render == 'rfp':
+                subject, text, html_body = rfp_emails(order, [{'name': 'Sample Appraiser'}], '<deadline>')[0]
+            elif args.render == 'engagement':
+                subject, text, html_body = engagement_email(order, sample_quote, '<due date>')
+            elif args.render == 'decline':
+                subject, text, html_body = decline_emails(order, [sample_quote])[0]
+            else:
+                summary = {
+                    'order_id': order.get('order_id'),
+                    'property_address': order.get('property_address'),
+                    'quotes': [dict(sample_quote, recommended=True)],
+                    'recommended': sample_quote,
+                }
+                subject, text, html_body = summary_email(summary, order.get('client_id'))
+            result = {'success': True, 'subject': subject, 'text': text, 'html': html_body}
+
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['success'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@
 Step 2: Find and rank qualified appraisers for an order.
 Queries the appraiser panel, filters by qualifications, and ranks candidates.
 
+The order, the client panel and the master panel are fetched in parallel,
+so the lookup costs one round-trip of latency instead of three. Once the
+winning panel is known, the other fetch is cancelled.
+
 Usage:
     python find_appraisers.py --order-id ORD-2024-12345
     python find_appraisers.py --property-state IL --property-type Office
@@ -15,6 +19,7 @@ import argparse
 import json
 import sys
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -24,8 +29,83 @@ load_dotenv()
 
 from appraisal.sheets_utils import (
     PANEL_SHEET_ID, ORDERS_SHEET_ID,
-    read_sheet, find_row_by_id, get_client_panel_sheet_id
+    find_row_by_id, get_client_panel_sheet_id
 )
+from appraisal.panel_cache import get_panel_model
+from appraisal.panel_model import PanelModel
+from appraisal.scoring import get_client_weights
+
+
+# ── Concurrent resolution ──
+# Each fetch builds its own API client, so they are safe to run on threads.
+# A running fetch can't be interrupted; cancelling one that hasn't started
+# yet skips it, and a running one just has its result dropped (it still
+# warms the panel cache).
+
+_fetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('APPRAISAL_FETCH_WORKERS', 8)),
+    thread_name_prefix='find-appraisers'
+)
+
+
+def _load_client_panel(client_id: str) -> PanelModel | None:
+    """The client's own panel, or None if it has none or it is empty/unreadable."""
+    try:
+        panel = get_panel_model(get_client_panel_sheet_id(client_id))
+    except Exception:
+        return None  # Fall back to master panel
+    return panel if len(panel) else None
+
+
+def _load_master_panel() -> PanelModel:
+    if not PANEL_SHEET_ID:
+        raise ValueError("APPRAISAL_PANEL_SHEET_ID not configured in .env")
+    return get_panel_model(PANEL_SHEET_ID)
+
+
+def _start_client_panel(client_id: str = None) -> Future | None:
+    """Start fetching the client's panel, if the client has one."""
+    if client_id and get_client_panel_sheet_id(client_id):
+        return _fetch_pool.submit(_load_client_panel, client_id)
+    return None
+
+
+def _cancel(*futures: Future | None):
+    for future in futures:
+        if future is not None:
+            future.cancel()
+
+
+def _pick_panel(
+    client_id: str,
+    client_future: Future | None,
+    master_future: Future
+) -> tuple[PanelModel, str]:
+    """Wait for the winning panel: the client's if non-empty, else the master."""
+    if client_future is not None:
+        panel = client_future.result()
+        if panel is not None:
+            master_future.cancel()
+            return panel, f"client:{client_id}"
+    return master_future.result(), "master"
+
+
+def get_appraiser_panel(client_id: str = None) -> tuple[PanelModel, str]:
+    """
+    Load the compiled panel to search: the client's own panel if it has a
+    non-empty one, otherwise the master panel.
+
+    Both panels are fetched in parallel; the master fetch is cancelled if
+    the client panel wins.
+
+    Args:
+        client_id: Optional client ID to check for client-specific panel
+
+    Returns:
+        Tuple of (PanelModel, panel_source description)
+    """
+    master_future = _fetch_pool.submit(_load_master_panel)
+    return _pick_panel(client_id, _start_client_panel(client_id), master_future)
 
 
 def get_appraisers(client_id: str = None) -> tuple[list[dict], str]:
@@ -38,22 +118,8 @@ def get_appraisers(client_id: str = None) -> tuple[list[dict], str]:
     Returns:
         Tuple of (appraisers list, panel_source description)
     """
-    # Check for client-specific panel first
-    if client_id:
-        client_panel_id = get_client_panel_sheet_id(client_id)
-        if client_panel_id:
-            try:
-                appraisers = read_sheet(client_panel_id, 'Appraiser Panel!A:Z')
-                if appraisers:
-                    return appraisers, f"client:{client_id}"
-            except Exception:
-                pass  # Fall back to master panel
-
-    # Use master panel
-    if not PANEL_SHEET_ID:
-        raise ValueError("APPRAISAL_PANEL_SHEET_ID not configured in .env")
-
-    return read_sheet(PANEL_SHEET_ID, 'Appraiser Panel!A:Z'), "master"
+    panel, panel_source = get_appraiser_panel(client_id)
+    return [dict(a.row) for a in panel.appraisers], panel_source
 
 
 def get_order(order_id: str) -> dict | None:
@@ -82,51 +148,14 @@ def filter_appraisers(
     - Quality score >= 4.0
     - Not in exclusion list
     """
-    excluded_ids = excluded_ids or []
-    qualified = []
-
-    for a in appraisers:
-        # Skip inactive
-        if a.get('active', '').upper() != 'TRUE':
-            continue
-
-        # Skip excluded
-        if a.get('appraiser_id') in excluded_ids:
-            continue
-
-        # Check state coverage (comma-separated list)
-        states = [s.strip().upper() for s in a.get('states', '').split(',')]
-        if property_state.upper() not in states:
-            continue
-
-        # Check property type coverage
-        types = [t.strip() for t in a.get('property_types', '').split(',')]
-        if property_type not in types:
-            continue
+    return PanelModel(appraisers).filter(property_state, property_type, excluded_ids)
 
-        # Check capacity
-        try:
-            workload = int(a.get('current_workload', 0) or 0)
-            capacity = int(a.get('capacity', 5) or 5)
-            if workload >= capacity:
-                continue
-        except ValueError:
-            pass  # Skip capacity check if not numeric
-
-        # Check quality score
-        try:
-            quality = float(a.get('quality_score', 0) or 0)
-            if quality < 4.0:
-                continue
-        except ValueError:
-            pass  # Skip quality check if not numeric
-
-        qualified.append(a)
-
-    return qualified
 
-
-def rank_appraisers(appraisers: list[dict]) -> list[dict]:
+def rank_appraisers(
+    appraisers: list[dict],
+    weights: dict = None,
+    limit: int = None
+) -> list[dict]:
     """
     Rank appraisers by desirability.
 
@@ -135,24 +164,12 @@ def rank_appraisers(appraisers: list[dict]) -> list[dict]:
     - Turnaround time
     - Current workload ratio
     - Average fee (normalized)
-    """
-
-    def score(a):
-        quality = float(a.get('quality_score', 3) or 3)
-        turnaround = float(a.get('avg_turnaround_days', 14) or 14)
-        workload = int(a.get('current_workload', 0) or 0)
-        capacity = int(a.get('capacity', 5) or 5)
-        fee = float(a.get('avg_fee', 3000) or 3000)
-
-        # Composite score (lower is better)
-        quality_score = (5 - quality) * 10  # Quality inverted, weighted heavily
-        turnaround_score = turnaround * 0.5
-        workload_score = (workload / capacity) * 5 if capacity > 0 else 0
-        fee_score = fee / 1000  # Normalize fee
-
-        return quality_score + turnaround_score + workload_score + fee_score
 
-    ranked = sorted(appraisers, key=score)
+    Weights default to scoring.DEFAULT_APPRAISER_WEIGHTS. With a limit,
+    only the top `limit` are selected and returned.
+    """
+    panel = PanelModel(appraisers)
+    ranked = [a.row for a in panel.rank(panel.appraisers, weights, limit)]
 
     # Add rank to each
     for i, a in enumerate(ranked):
@@ -167,7 +184,8 @@ def find_appraisers_for_order(
     property_type: str = None,
     client_id: str = None,
     excluded_ids: list[str] = None,
-    limit: int = 5
+    limit: int = 5,
+    order: dict = None
 ) -> dict:
     """
     Main function to find appraisers for an order.
@@ -179,73 +197,89 @@ def find_appraisers_for_order(
         client_id: Client ID to check for client-specific panel
         excluded_ids: Appraiser IDs to exclude
         limit: Max number of candidates to return
+        order: The order row, if the caller already has it (not re-read)
 
     Returns:
         Dict with candidates list and metadata
     """
 
+    if not order_id and order is None and (not property_state or not property_type):
+        return {
+            'success': False,
+            'errors': ['property_state and property_type are required']
+        }
+
+    # Start the order and panel fetches together (checks for a
+    # client-specific panel first). Without an explicit client_id the
+    # client comes from the order, so its panel starts as soon as the
+    # order arrives - the master panel is already in flight by then.
+    order_future = _fetch_pool.submit(get_order, order_id) if order_id and order is None else None
+    master_future = _fetch_pool.submit(_load_master_panel)
+    client_future = _start_client_panel(client_id)
+
     # Get order details if order_id provided
-    if order_id:
-        order = get_order(order_id)
+    if order_future is not None:
+        try:
+            order = order_future.result()
+        except Exception:
+            _cancel(master_future, client_future)
+            raise
         if not order:
+            _cancel(master_future, client_future)
             return {
                 'success': False,
                 'errors': [f'Order not found: {order_id}']
             }
+    if order is not None:
         property_state = property_state or order.get('property_state')
         property_type = property_type or order.get('property_type')
-        client_id = client_id or order.get('client_id')
+        if not client_id:
+            client_id = order.get('client_id')
+            client_future = _start_client_panel(client_id)
 
     if not property_state or not property_type:
+        _cancel(master_future, client_future)
         return {
             'success': False,
             'errors': ['property_state and property_type are required']
         }
 
-    # Load appraisers (checks for client-specific panel first)
     try:
-        appraisers, panel_source = get_appraisers(client_id)
+        panel, panel_source = _pick_panel(client_id, client_future, master_future)
     except Exception as e:
         return {
             'success': False,
             'errors': [f'Failed to load appraiser panel: {str(e)}']
         }
 
-    if not appraisers:
+    if not len(panel):
         return {
             'success': False,
             'errors': ['No appraisers found in panel'],
             'panel_source': panel_source
         }
 
-    # Filter
-    qualified = filter_appraisers(
-        appraisers,
-        property_state,
-        property_type,
-        excluded_ids
-    )
+    # Filter (inverted index lookup on the compiled panel)
+    qualified = panel.candidates(property_state, property_type, excluded_ids)
 
     if not qualified:
         return {
             'success': True,
             'candidates': [],
-            'total_in_panel': len(appraisers),
+            'total_in_panel': len(panel),
             'qualified_count': 0,
             'panel_source': panel_source,
             'message': f'No qualified appraisers found for {property_type} in {property_state}'
         }
 
-    # Rank
-    ranked = rank_appraisers(qualified)
-
-    # Limit
-    candidates = ranked[:limit]
+    # Rank - scores every qualified appraiser, keeps only the top `limit`
+    top = panel.rank(qualified, get_client_weights(client_id), limit)
+    candidates = [dict(a.row, rank=i + 1) for i, a in enumerate(top)]
 
     return {
         'success': True,
         'candidates': candidates,
-        'total_in_panel': len(appraisers),
+        'total_in_panel': len(panel),
         'qualified_count': len(qualified),
         'returned_count': len(candidates),
         'panel_source': panel_source,
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Time-ordered, collision-free order and quote IDs.
+
+    ORD-2026-01JABX3K7QM4T8ZP      order
+    Q-01JABX3K9W2M4T8ZP0           quote
+
+After the prefix, an ID is 16 Crockford base32 characters:
+
+    10 chars  milliseconds since the epoch (sorts by time until year 10889)
+     4 chars  process shard - 20 random bits picked at process start
+     2 chars  sequence within the millisecond (1024 per ms, then the next
+              millisecond is borrowed)
+
+No coordination is needed: within a process IDs strictly increase, and
+two processes (webhook workers, cron jobs) only collide if they drew the
+same shard *and* allocate in the same millisecond with the same sequence.
+Forked workers draw a new shard.
+
+Because the alphabet sorts in ASCII order, IDs sort by creation time, so
+"orders since X" is a range scan: order_id >= id_floor('ORD', X). That
+holds only among IDs made here. Legacy IDs (ORD-2026-12345,
+Q-20260115090000-AB12) sort above or below a floor regardless of their
+age, so a range scan must skip IDs whose id_time() is None (ids_since does)
+and date legacy rows by their created_at / submitted_at instead.
+
+Usage:
+    python ids.py --order                  # Allocate an order ID
+    python ids.py --quote                  # Allocate a quote ID
+    python ids.py --decode ORD-2026-...    # When was this ID allocated?
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Iterable
+
+CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+TIME_CHARS = 10
+SHARD_BITS = 20
+SEQUENCE_BITS = 10
+TAIL_CHARS = (SHARD_BITS + SEQUENCE_BITS) // 5
+
+_ID_BODY = re.compile(rf'([{CROCKFORD}]{{{TIME_CHARS}}})([{CROCKFORD}]{{{TAIL_CHARS}}})$')
+
+
+def _encode(value: int, chars: int) -> str:
+    out = []
+    for _ in range(chars):
+        value, digit = divmod(value, 32)
+        out.append(CROCKFORD[digit])
+    return ''.join(reversed(out))
+
+
+def _decode(text: str) -> int:
+    value = 0
+    for ch in text:
+        value = value * 32 + CROCKFORD.index(ch)
+    return value
+
+
+class IdAllocator:
+    """Thread-safe source of (millisecond, shard + sequence) pairs for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reseed()
+
+    def _reseed(self):
+        self._shard = secrets.randbits(SHARD_BITS)
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next(self) -> tuple[int, int]:
+        with self._lock:
+            # Never step backwards, even if the wall clock does
+            ms = max(int(time.time() * 1000), self._last_ms)
+            if ms == self._last_ms:
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    # Sequence exhausted - borrow the next millisecond
+                    ms += 1
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = ms
+            return ms, (self._shard << SEQUENCE_BITS) | self._sequence
+
+
+_allocator = IdAllocator()
+if hasattr(os, 'register_at_fork'):
+    # A forked worker must not share its parent's shard
+    os.register_at_fork(after_in_child=_allocator._reseed)
+
+
+def new_id(prefix: str, with_year: bool = False) -> str:
+    """
+    Allocate an ID: "<prefix>-<body>", or "<prefix>-<YYYY>-<body>" with_year
+    (the year the ID was allocated, in local time).
+    """
+    ms, tail = _allocator.next()
+    body = _encode(ms, TIME_CHARS) + _encode(tail, TAIL_CHARS)
+    if with_year:
+        return f"{prefix}-{datetime.fromtimestamp(ms / 1000).year}-{body}"
+    return f"{prefix}-{body}"
+
+
+def new_order_id() -> str:
+    """Allocate an order ID: ORD-YYYY-<16 chars>."""
+    return new_id('ORD', with_year=True)
+
+
+def new_quote_id() -> str:
+    """Allocate a quote ID: Q-<16 chars>."""
+    return new_id('Q')
+
+
+def id_time(id_value: str) -> datetime | None:
+    """When an ID was allocated (local time), or None for IDs not made here."""
+    match = _ID_BODY.search(id_value or '')
+    if not match:
+        return None
+    return datetime.fromtimestamp(_decode(match.group(1)) / 1000)
+
+
+def id_floor(prefix: str, when: datetime) -> str:
+    """
+    The lowest ID that can be allocated at or after `when` - IDs compare
+    as strings, so id >= id_floor(...) selects every ID made here since
+    then (legacy IDs compare arbitrarily; see ids_since).
+    """
+    ms = int(when.timestamp() * 1000)
+    body = _encode(ms, TIME_CHARS) + CROCKFORD[0] * TAIL_CHARS
+    if prefix == 'ORD':
+        return f"{prefix}-{when.year}-{body}"
+    return f"{prefix}-{body}"
+
+
+def ids_since(id_values: Iterable[str], prefix: str, when: datetime) -> list[str]:
+    """The IDs allocated here at or after `when`, skipping legacy IDs."""
+    floor = id_floor(prefix, when)
+    return [v for v in id_values if v and v >= floor and id_time(v) is not None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocate and inspect appraisal order and quote IDs")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--order", action="store_true", help="Allocate an order ID")
+    action.add_argument("--quote", action="store_true", help="Allocate a quote ID")
+    action.add_argument("--decode", metavar="ID", help="Show when an ID was allocated")
+    args = parser.parse_args()
+
+    if args.decode:
+        allocated = id_time(args.decode)
+        if allocated is None:
+            result = {'success': False, 'errors': [f'Not a time-ordered ID: {args.decode}']}
+        else:
+            result = {'success': True, 'id': args.decode, 'allocated_at': allocated.isoformat()}
+    else:
+        result = {'success': True, 'id': new_order_id() if args.order else new_quote_id()}
+
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['success'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Step 4 (inbound): Record quotes from appraisers' replies to the RFP email.
+
+The RFP asks appraisers to reply with their fee and turnaround. This reads
+the replies from a mailbox, matches each one to its order (the order ID in
+the RFP subject, or in the quoted RFP) and appraiser (the sender's address
+on the panel), extracts fee and turnaround, and records the quotes through
+collect_quotes.record_quotes - one read and one write round-trip per batch.
+
+Extraction runs on the reply's own text (quoted RFP and signature
+removed) with patterns compiled once at import:
+    fee          "Fee: $3,500", "$3500.00", "3.5k", "3,500 USD"
+    turnaround   "10 business days", "8-10 days", "2 weeks", "14 calendar days"
+                 (ranges take the upper end; weeks and calendar days are
+                 converted to business days)
+    decline      "unavailable", "have to pass", "decline" ... with no fee
+
+Outcomes: recorded, duplicate (already on file), declined, unmatched (no
+order ID, unknown sender, unknown order), unparsed (no fee or turnaround)
+and failed (the write failed). IMAP replies and Maildir messages are
+marked seen once handled - unmatched and unparsed ones are also flagged
+for review - and failed ones are left for the next run. An mbox is read
+as-is; re-reading it is harmless, as quotes already on file are skipped.
+
+Usage:
+    python inbound_quotes.py --imap                      # Unseen replies in IMAP_FOLDER
+    python inbound_quotes.py --imap --watch 60           # ... every 60 seconds
+    python inbound_quotes.py --maildir ~/Mail/quotes     # Messages not yet seen
+    python inbound_quotes.py --mbox replies.mbox
+    python inbound_quotes.py --parse reply.eml           # Show what one reply yields
+    python inbound_quotes.py --imap --dry-run --limit 20
+
+Environment:
+    IMAP_HOST, IMAP_PORT=993, IMAP_USER, IMAP_PASSWORD   # User/password default to SMTP_*
+    IMAP_FOLDER=INBOX
+    INBOUND_BATCH_SIZE=100                               # Replies recorded per round-trip
+"""
+from __future__ import annotations
+
+import argparse
+import email
+import html
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+from email import policy
+from email.utils import parseaddr
+from pathlib import Path
+from typing import Iterator
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.sheets_utils import PANEL_SHEET_ID
+from appraisal.panel_cache import get_panel_model
+from appraisal.collect_quotes import record_quotes
+
+INBOUND_BATCH_SIZE = int(os.getenv('INBOUND_BATCH_SIZE', 100))
+IMAP_FETCH_CHUNK = 50
+
+# Quotes outside these bounds are taken as misreads, not quotes
+MIN_FEE, MAX_FEE = 100.0, 250000.0
+MAX_TURNAROUND_DAYS = 120
+
+# Outcomes that are final (mark seen) and that need a person (also flag)
+DONE = ('recorded', 'duplicate', 'declined')
+REVIEW = ('unmatched', 'unparsed')
+
+
+# ── Extraction ──
+
+ORDER_ID_RE = re.compile(r'\bORD-[A-Z0-9]+-[A-Z0-9]+\b')
+
+# Where the quoted original starts in a plain-text reply
+QUOTE_HEADER_RE = re.compile(
+    r'^[ \t]*(?:On\b[^\n]{0,200}(?:\n[^\n]{0,200})?\bwrote:'
+    r'|-{2,}\s*Original Message\s*-{2,}'
+    r'|_{10,}'
+    r'|From:[^\n]*\n[ \t]*(?:Sent|Date):)',
+    re.IGNORECASE | re.MULTILINE
+)
+SIGNATURE_RE = re.compile(r'^-- ?$', re.MULTILINE)
+
+# Where the quoted original starts in an HTML reply
+HTML_QUOTE_RE = re.compile(
+    r'<(?:blockquote|div[^>]*class="[^"]*(?:gmail_quote|OutlookMessageHeader|moz-cite-prefix)[^"]*")',
+    re.IGNORECASE
+)
+HTML_DROP_RE = re.compile(r'<(script|style)\b.*?</\1>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+HTML_BREAK_RE = re.compile(r'<(?:br|/p|/div|/tr|/li|/h\d)\b[^>]*>', re.IGNORECASE)
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+_AMOUNT = r'(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?\s*(k\b)?'
+FEE_PATTERNS = [
+    # "Fee: $3,500", "my quote is 3500", "price would be $3.5k" - only an amount
+    # right after the word, so "quote for 450 Main St is $3,500" is left to "$"
+    re.compile(
+        r'\b(?:fees?|quotes?|price|cost|charge|bid|rate)\b(?:\s*[:=-])?\s*'
+        r'(?:(?:is|are|of|at|would be|will be|comes to)\s+)?\$?\s*' + _AMOUNT,
+        re.IGNORECASE
+    ),
+    # "$3,500", "$ 3500.00"
+    re.compile(r'\$\s*' + _AMOUNT, re.IGNORECASE),
+    # "3,500 USD", "3500 dollars"
+    re.compile(_AMOUNT + r'\s*(?:usd|dollars)\b', re.IGNORECASE),
+    # "can do it for 4.2k" - last, as the k is the only sign it is money
+    re.compile(r'(?<![\w$.,])(\d{1,3})(\.\d{1,2})?\s*(k)\b', re.IGNORECASE),
+]
+
+_DURATION = r'(\d{1,3})(?:\s*(?:-|–|to)\s*(\d{1,3}))?\s*(business|working|calendar)?\s*(days?|weeks?)\b'
+TURNAROUND_PATTERNS = [
+    # "Turnaround: 10 business days", "can deliver the report in 8-10 days"
+    re.compile(r'\b(?:turn[\s-]?around|turn[\s-]?time|tat|deliver\w*|report|complete\w*)\b[^\d\n]{0,30}' + _DURATION,
+               re.IGNORECASE),
+    # "12 business days", "2 weeks"
+    re.compile(_DURATION, re.IGNORECASE),
+]
+
+DECLINE_RE = re.compile(
+    r"\b(?:declin\w*|unavailable|not available|unable to (?:take|accept|quote)"
+    r"|can(?:not|'t) (?:take|accept)|(?:have to|must|will) pass|pass on this|no bid|at capacity|too busy)\b",
+    re.IGNORECASE
+)
+
+
+def html_to_text(markup: str, quoted: bool = False) -> str:
+    """Visible text of an HTML email body - up to the quoted original, unless quoted."""
+    start = None if quoted else HTML_QUOTE_RE.search(markup)
+    if start:
+        markup = markup[:start.start()]
+    markup = HTML_BREAK_RE.sub('\n', HTML_DROP_RE.sub('', markup))
+    return html.unescape(HTML_TAG_RE.sub('', markup))
+
+
+def reply_text(text: str) -> str:
+    """The reply's own text: the quoted original, '>' lines and the signature removed."""
+    for pattern in (QUOTE_HEADER_RE, SIGNATURE_RE):
+        found = pattern.search(text)
+        if found:
+            text = text[:found.start()]
+    return '\n'.join(line for line in text.splitlines() if not line.lstrip().startswith('>')).strip()
+
+
+def extract_fee(text: str) -> float | None:
+    """The quoted fee, or None."""
+    for pattern in FEE_PATTERNS:
+        for found in pattern.finditer(text):
+            whole, fraction, thousands = found.groups()
+            fee = float(whole.replace(',', '') + (fraction or '')) * (1000 if thousands else 1)
+            if MIN_FEE <= fee <= MAX_FEE:
+                return fee
+    return None
+
+
+def extract_turnaround(text: str) -> int | None:
+    """The quoted turnaround in business days, or None."""
+    for pattern in TURNAROUND_PATTERNS:
+        for found in pattern.finditer(text):
+            low, high, kind, unit = found.groups()
+            days = int(high or low)
+            if unit.lower().startswith('week'):
+                days *= 5
+            elif kind and kind.lower() == 'calendar':
+                days = math.ceil(days * 5 / 7)
+            if 1 <= days <= MAX_TURNAROUND_DAYS:
+                return days
+    return None
+
+
+def parse_reply(raw: bytes) -> dict:
+    """
+    Parse one reply email.
+
+    Returns:
+        Dict with message_id, sender, subject, order_id, fee,
+        turnaround_days, declined and text (the reply's own text)
+    """
+    message = email.message_from_bytes(raw, policy=policy.default)
+    subject = str(message.get('Subject', ''))
+
+    body = message.get_body(preferencelist=('plain', 'html'))
+    full = ''
+    if body is not None:
+        try:
+            full = body.get_content()
+        except (LookupError, ValueError):
+            full = body.get_payload(decode=True).decode('utf-8', errors='replace')
+        if body.get_content_type() == 'text/html':
+            own = html_to_text(full)
+            full = html_to_text(full, quoted=True)
+        else:
+            own = full
+    else:
+        own = ''
+    text = reply_text(own)
+
+    # The subject names the order; client subjects may not, so then the
+    # reply itself, then the quoted RFP ("Order #: ...")
+    order_ids = ORDER_ID_RE.findall(subject) or ORDER_ID_RE.findall(text) or ORDER_ID_RE.findall(full)
+
+    fee = extract_fee(text)
+    return {
+        'message_id': str(message.get('Message-ID', '')).strip(),
+        'sender': parseaddr(str(message.get('From', '')))[1].lower(),
+        'reply_to': parseaddr(str(message.get('Reply-To', '')))[1].lower(),
+        'subject': subject,
+        'order_id': order_ids[0] if order_ids else None,
+        'fee': fee,
+        'turnaround_days': extract_turnaround(text),
+        'declined': fee is None and bool(DECLINE_RE.search(text)),
+        'text': text,
+    }
+
+
+# ── Mailbox sources ──
+
+class ImapSource:
+    """Unseen messages of an IMAP folder; handled ones are flagged \\Seen."""
+
+    name = 'imap'
+
+    def __init__(self, host: str = None, port: int = None, user: str = None, password: str = None, folder: str = None):
+        self.host = host or os.getenv('IMAP_HOST', '')
+        self.port = int(port or os.getenv('IMAP_PORT', 993))
+        self.user = user or os.getenv('IMAP_USER') or os.getenv('SMTP_USER', '')
+        self.password = password or os.getenv('IMAP_PASSWORD') or os.getenv('SMTP_PASSWORD', '')
+        self.folder = folder or os.getenv('IMAP_FOLDER', 'INBOX')
+        self._conn = None
+
+    def _connect(self):
+        import imaplib
+        if self.port == 993:
+            conn = imaplib.IMAP4_SSL(self.host, self.port)
+        else:
+            conn = imaplib.IMAP4(self.host, self.port)
+            conn.starttls()
+        conn.login(self.user, self.password)
+        conn.select(self.folder)
+        return conn
+
+    def messages(self, limit: int = None) -> Iterator[tuple[str, bytes]]:
+        if not self.host:
+            raise ValueError('IMAP_HOST is not set')
+        self._conn = self._connect()
+        _, data = self._conn.uid('SEARCH', None, 'UNSEEN')
+        uids = data[0].split()[:limit] if limit else data[0].split()
+        for start in range(0, len(uids), IMAP_FETCH_CHUNK):
+            chunk = b','.join(uids[start:start + IMAP_FETCH_CHUNK]).decode()
+            # PEEK leaves messages unseen until they are handled
+            _, fetched = self._conn.uid('FETCH', chunk, '(UID BODY.PEEK[])')
+            for part in fetched:
+                if isinstance(part, tuple):
+                    uid = re.search(rb'UID (\d+)', part[0])
+                    if uid:
+                        yield uid.group(1).decode(), part[1]
+
+    def mark(self, refs: list[str], review: bool = False):
+        if refs:
+            flags = '(\\Seen \\Flagged)' if review else '(\\Seen)'
+            self._conn.uid('STORE', ','.join(refs), '+FLAGS', flags)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.logout()
+            except Exception:
+                pass
+            self._conn = None
+
+
+class MaildirSource:
+    """Messages of a Maildir not yet seen (all with include_seen); handled ones move to cur/ as seen."""
+
+    name = 'maildir'
+
+    def __init__(self, path: str, include_seen: bool = False):
+        import mailbox
+        self._box = mailbox.Maildir(path, factory=None, create=False)
+        self.include_seen = include_seen
+
+    def messages(self, limit: int = None) -> Iterator[tuple[str, bytes]]:
+        count = 0
+        for key in self._box.keys():
+            if limit and count >= limit:
+                return
+            if not self.include_seen and 'S' in self._box.get_message(key).get_flags():
+                continue
+            count += 1
+            yield key, self._box.get_bytes(key)
+
+    def mark(self, refs: list[str], review: bool = False):
+        for key in refs:
+            message = self._box.get_message(key)
+            message.set_subdir('cur')
+            message.add_flag('SF' if review else 'S')
+            self._box[key] = message
+
+    def close(self):
+        self._box.close()
+
+
+class MboxSource:
+    """Every message of an mbox file, read-only."""
+
+    name = 'mbox'
+
+    def __init__(self, path: str):
+        import mailbox
+        if not Path(path).is_file():
+            raise FileNotFoundError(f'No such mbox: {path}')
+        self._box = mailbox.mbox(path, create=False)
+
+    def messages(self, limit: int = None) -> Iterator[tuple[str, bytes]]:
+        for count, key in enumerate(self._box.keys()):
+            if limit and count >= limit:
+                return
+            yield str(key), self._box.get_bytes(key)
+
+    def mark(self, refs: list[str], review: bool = False):
+        pass    # Re-reading is harmless: recorded quotes come back as duplicates
+
+    def close(self):
+        self._box.close()
+
+
+# ── Ingestion ──
+
+def _match(reply: dict, panel) -> dict:
+    """Attach the appraiser, and an outcome if the reply can't be recorded."""
+    appraiser = panel.find_by_email(reply['sender']) or (
+        panel.find_by_email(reply['reply_to']) if reply['reply_to'] else None
+    )
+    reply['appraiser_id'] = appraiser.get('appraiser_id') if appraiser else None
+
+    if not reply['order_id']:
+        reply.update(status='unmatched', reason='No order ID in the subject or quoted RFP')
+    elif not appraiser:
+        reply.update(status='unmatched', reason=f"Sender {reply['sender']} is not on the panel")
+    elif reply['declined']:
+        reply.update(status='declined')
+    elif reply['fee'] is None or reply['turnaround_days'] is None:
+        missing = [name for name in ('fee', 'turnaround_days') if reply[name] is None]
+        reply.update(status='unparsed', reason=f"No {' or '.join(missing)} found")
+    return reply
+
+
+def _record(batch: list[tuple[str, dict]]):
+    """Record a batch of matched replies in one round-trip; sets each one's outcome."""
+    results = record_quotes([
+        {
+            'order_id': reply['order_id'],
+            'appraiser_id': reply['appraiser_id'],
+            'fee': reply['fee'],
+            'turnaround_days': reply['turnaround_days'],
+            'notes': ' '.join(reply['text'].split())[:500],
+        }
+        for _, reply in batch
+    ])
+    for (_, reply), result in zip(batch, results):
+        if result.get('success'):
+            reply.update(status='recorded', quote_id=result['quote_id'])
+        elif result.get('duplicate'):
+            reply.update(status='duplicate')
+        elif result.get('retry'):
+            reply.update(status='failed', reason=result['errors'][0])
+        else:
+            reply.update(status='unmatched', reason=result['errors'][0])
+
+
+def ingest(source, limit: int = None, dry_run: bool = False, batch_size: int = INBOUND_BATCH_SIZE) -> dict:
+    """
+    Read replies from a mailbox source and record the quotes in them.
+
+    Args:
+        source: ImapSource, MaildirSource or MboxSource
+        limit: Read at most this many messages
+        dry_run: Parse and match only - record nothing, mark nothing
+        batch_size: Replies recorded (and marked) per round-trip
+
+    Returns:
+        Dict with counts per outcome and one summary per reply
+    """
+    panel = get_panel_model(PANEL_SHEET_ID)
+    counts = Counter()
+    summaries = []
+    pending: list[tuple[str, dict]] = []     # (ref, reply) of every reply not yet acknowledged
+
+    def settle():
+        to_record = [(ref, r) for ref, r in pending if 'status' not in r]
+        if to_record and not dry_run:
+            _record(to_record)
+        for _, reply in pending:
+            reply.setdefault('status', 'parsed')    # Dry run
+            counts[reply['status']] += 1
+            summaries.append({
+                k: reply.get(k) for k in (
+                    'message_id', 'sender', 'order_id', 'appraiser_id', 'fee',
+                    'turnaround_days', 'status', 'quote_id', 'reason'
+                ) if reply.get(k) is not None
+            })
+        if not dry_run:
+            source.mark([ref for ref, r in pending if r['status'] in DONE])
+            source.mark([ref for ref, r in pending if r['status'] in REVIEW], review=True)
+        pending.clear()
+
+    try:
+        for ref, raw in source.messages(limit):
+            try:
+                reply = _match(parse_reply(raw), panel)
+            except Exception as e:
+                reply = {'status': 'unparsed', 'reason': f'Unreadable message: {e}'}
+            pending.append((ref, reply))
+            if len(pending) >= batch_size:
+                settle()
+        settle()
+    finally:
+        source.close()
+
+    return {
+        'success': counts['failed'] == 0,
+        'source': source.name,
+        'processed': sum(counts.values()),
+        'counts': dict(counts),
+        'replies': summaries,
+        'dry_run': dry_run
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record appraiser quotes from RFP reply emails")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--imap", action="store_true", help="Read unseen replies over IMAP")
+    action.add_argument("--maildir", metavar="PATH", help="Read a Maildir")
+    action.add_argument("--mbox", metavar="PATH", help="Read an mbox file")
+    action.add_argument("--parse", metavar="FILE", help="Parse one .eml file and show the result")
+    parser.add_argument("--all", action="store_true", help="Maildir: include messages already seen")
+    parser.add_argument("--limit", type=int, help="Read at most this many messages")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="IMAP: keep polling at this interval")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and match without recording")
+    args = parser.parse_args()
+
+    if args.parse:
+        try:
+            result = {'success': True, **parse_reply(Path(args.parse).read_bytes())}
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(result, indent=2))
+        sys.exit(0)
+
+    def make_source():
+        if args.imap:
+            return ImapSource()
+        if args.maildir:
+            return MaildirSource(args.maildir, include_seen=args.all)
+        return MboxSource(args.mbox)
+
+    while True:
+        try:
+            result = ingest(make_source(), limit=args.limit, dry_run=args.dry_run)
+        except Exception as e:
+            result = {'success': False, 'errors': [str(e)]}
+        print(json.dumps(result, indent=2))
+
+        if result.get('processed') is not None:
+            counts = ', '.join(f"{n} {status}" for status, n in sorted(result['counts'].items())) or 'no replies'
+            print(f"\n{'✓' if result['success'] else '✗'} {counts}", file=sys.stderr)
+        else:
+            print(f"\n✗ Failed: {result.get('errors')}", file=sys.stderr)
+
+        if not (args.watch and args.imap):
+            sys.exit(0 if result['success'] else 1)
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
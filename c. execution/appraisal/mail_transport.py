@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Pooled SMTP transport shared by every appraisal sender.
+
+Opening an SMTP connection costs a TCP connect, a STARTTLS handshake and
+a login - more than sending the message itself. Connections are kept
+authenticated and reused across messages (and threads), one pool per
+server/account.
+
+A pooled connection the server has since dropped is detected when the
+send fails, discarded, and the message is resent once on a fresh
+connection. Failures on a fresh connection are raised to the caller.
+
+send_emails() fans a batch of messages out over a bounded thread pool, so
+sending to 20 recipients takes about as long as the slowest single send.
+At most SMTP_MAX_CONCURRENCY messages are in flight per server/account,
+however many batches run at once.
+
+Environment:
+    SMTP_POOL_SIZE=4            # Idle connections kept per server/account
+    SMTP_IDLE_TIMEOUT=60        # Seconds before an idle connection is closed
+    SMTP_MAX_MESSAGES=100       # Messages per connection before reconnecting
+    SMTP_TIMEOUT=30             # Socket timeout in seconds
+    SMTP_MAX_CONCURRENCY=10     # Messages in flight per server/account
+    SMTP_STARTTLS=true          # false only for local test servers
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # smtplib and email.mime are imported on first send: every step imports
+    # this module, but dry runs and queued (outbox) sends never connect
+    import smtplib
+    from email.message import Message
+    from email.mime.multipart import MIMEMultipart
+
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', 4))
+SMTP_IDLE_TIMEOUT = float(os.getenv('SMTP_IDLE_TIMEOUT', 60))
+SMTP_MAX_MESSAGES = int(os.getenv('SMTP_MAX_MESSAGES', 100))
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 30))
+SMTP_MAX_CONCURRENCY = max(1, int(os.getenv('SMTP_MAX_CONCURRENCY', 10)))
+
+# Reply codes meaning the server is closing or dropped the session
+DISCONNECT_CODES = {421}
+
+
+def get_smtp_config() -> dict:
+    """Get SMTP configuration from environment."""
+    return {
+        'host': os.getenv('SMTP_HOST'),
+        'port': int(os.getenv('SMTP_PORT', 587)),
+        'user': os.getenv('SMTP_USER'),
+        'password': os.getenv('SMTP_PASSWORD'),
+        'from_name': os.getenv('SENDER_NAME', 'Appraisal Order Desk'),
+        'starttls': os.getenv('SMTP_STARTTLS', 'true').lower() != 'false'
+    }
+
+
+class _Connection:
+    __slots__ = ('server', 'last_used', 'sent')
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPPool:
+    """
+    Thread-safe pool of authenticated SMTP connections to one server/account.
+
+    Connections are checked out for a single message and returned
+    afterwards; at most `size` idle ones are kept, and at most
+    `max_concurrency` sends (connecting included) run at once.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        starttls: bool = True,
+        size: int = SMTP_POOL_SIZE,
+        idle_timeout: float = SMTP_IDLE_TIMEOUT,
+        max_messages: int = SMTP_MAX_MESSAGES,
+        max_concurrency: int = SMTP_MAX_CONCURRENCY
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.max_concurrency = max_concurrency
+        self.connects = 0       # Handshakes performed, for diagnostics
+        self._idle: list[_Connection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _connect(self) -> _Connection:
+        import smtplib
+        server = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            if self.starttls:
+                server.starttls()
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._lock:
+            self.connects += 1
+        return _Connection(server)
+
+    def _checkout(self) -> tuple[_Connection, bool]:
+        """Get a connection: the most recently used idle one, or a new one."""
+        now = time.monotonic()
+        stale = []
+        conn = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.last_used < self.idle_timeout:
+                    conn = candidate
+                    break
+                stale.append(candidate)
+        for old in stale:
+            old.close()
+        if conn is not None:
+            return conn, True
+        return self._connect(), False
+
+    def _release(self, conn: _Connection):
+        conn.last_used = time.monotonic()
+        if conn.sent < self.max_messages:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(conn)
+                    return
+        conn.close()
+
+    def send(self, msg: Message):
+        """
+        Send one message on a pooled connection.
+
+        Raises the smtplib error if the message can't be delivered to the
+        server. A dropped pooled connection is replaced transparently.
+        Blocks while max_concurrency sends are already in flight.
+        """
+        with self._slots:
+            self._send(msg)
+
+    def _send(self, msg: Message):
+        import smtplib
+        conn, reused = self._checkout()
+        while True:
+            try:
+                conn.server.send_message(msg)
+            except smtplib.SMTPRecipientsRefused:
+                self._reset(conn)
+                raise
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code not in DISCONNECT_CODES:
+                    # The server answered, so the session is still usable
+                    self._reset(conn)
+                    raise
+                conn.close()
+                if not reused:
+                    raise
+            except OSError:
+                # Dropped connection (SMTPServerDisconnected, socket errors)
+                conn.close()
+                if not reused:
+                    raise
+            else:
+                conn.sent += 1
+                self._release(conn)
+                return
+            # Stale pooled connection - retry once on a fresh one
+            conn, reused = self._connect(), False
+
+    def _reset(self, conn: _Connection):
+        try:
+            conn.server.rset()
+        except Exception:
+            conn.close()
+            return
+        self._release(conn)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# ── Shared pools ──
+
+_pools: dict[tuple, SMTPPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(smtp_config: dict = None) -> SMTPPool:
+    """Get the shared pool for an SMTP config (default: from the environment)."""
+    smtp_config = smtp_config or get_smtp_config()
+    if not all([smtp_config.get('host'), smtp_config.get('user'), smtp_config.get('password')]):
+        raise ValueError("SMTP configuration incomplete. Check SMTP_HOST, SMTP_USER, SMTP_PASSWORD in .env")
+
+    key = (
+        smtp_config['host'], smtp_config['port'], smtp_config['user'], smtp_config['password'],
+        smtp_config.get('starttls', True)
+    )
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SMTPPool(*key)
+        return pool
+
+
+def close_pools():
+    """Close all idle pooled connections (also run at interpreter exit)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(close_pools)
+
+
+def build_message(
+    to_email: str,
+    subject: str,
+    body: str,
+    smtp_config: dict,
+    html: str = None
+) -> MIMEMultipart:
+    """Build a message from the configured sender: plain text, plus HTML if given."""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = f"{smtp_config['from_name']} <{smtp_config['user']}>"
+    msg['To'] = to_email
+    msg.attach(MIMEText(body, 'plain'))
+    if html:
+        msg.attach(MIMEText(html, 'html'))
+    return msg
+
+
+def send_email(to_email: str, subject: str, body: str, smtp_config: dict = None, html: str = None) -> bool:
+    """Send a single email over the shared pooled connection."""
+    smtp_config = smtp_config or get_smtp_config()
+    pool = get_pool(smtp_config)
+    pool.send(build_message(to_email, subject, body, smtp_config, html))
+    return True
+
+
+def send_emails(
+    messages: list[tuple],
+    smtp_config: dict = None
+) -> list[Exception | None]:
+    """
+    Send many emails concurrently over the shared pool.
+
+    Args:
+        messages: (to_email, subject, body) or (to_email, subject, body, html) tuples
+        smtp_config: SMTP settings (default: from the environment)
+
+    Returns:
+        One entry per message, in order: None if it was sent, otherwise
+        the exception that stopped it.
+    """
+    if not messages:
+        return []
+    smtp_config = smtp_config or get_smtp_config()
+    try:
+        pool = get_pool(smtp_config)
+    except ValueError as e:
+        return [e] * len(messages)
+
+    def send_one(message: tuple) -> Exception | None:
+        to_email, subject, body, *html = message
+        try:
+            pool.send(build_message(to_email, subject, body, smtp_config, html[0] if html else None))
+        except Exception as e:
+            return e
+        return None
+
+    if len(messages) == 1:
+        return [send_one(messages[0])]
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(messages), pool.max_concurrency),
+        thread_name_prefix='smtp-send'
+    ) as executor:
+        return list(executor.map(send_one, messages))
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Durable outbox for appraisal emails, drained by a background worker.
+
+With APPRAISAL_MAIL_DELIVERY=outbox the workflow steps don't talk to SMTP
+at all: each email is queued through WriteBatch.queue_email together with
+the state change it announces, so the two land (or fail) as one unit of
+work, and the step returns as soon as the batch is written.
+
+- On SQLite storage the outbox is a table in the same database, written
+  in the same transaction as the rows.
+- On Google Sheets it is a local SQLite file, written only after the
+  batch's sheet writes succeeded.
+
+The worker claims due messages in batches, sends them concurrently over
+the pooled SMTP transport, and records the outcome:
+
+- Sent messages are kept (status 'sent') for the record.
+- Transient failures are retried with jittered exponential backoff.
+- Permanent failures (5xx replies, refused recipients) and messages out
+  of attempts are dead-lettered for an operator to inspect and retry.
+- Each message may carry an idempotency key (e.g. rfp:<order>:<appraiser>);
+  queuing the same key twice keeps only the first, so retried webhooks
+  don't send duplicates.
+- A claimed message is leased; if the worker dies mid-send, the lease
+  expires and another worker picks it up (at-least-once delivery).
+
+Usage:
+    python outbox.py --worker               # Drain continuously
+    python outbox.py --drain                # Drain what is due, then exit
+    python outbox.py --status               # Message counts by status
+    python outbox.py --dead                 # List dead letters
+    python outbox.py --retry-dead [ID ...]  # Requeue dead letters (all if no IDs)
+
+Environment:
+    APPRAISAL_MAIL_DELIVERY=direct|outbox
+    APPRAISAL_OUTBOX_PATH=.tmp/outbox.db    # Used with Google Sheets storage; relative
+                                            # to the repo root, not the cwd
+    OUTBOX_BATCH_SIZE=50
+    OUTBOX_MAX_ATTEMPTS=8
+    OUTBOX_RETRY_BASE=30                    # Seconds before the first retry
+    OUTBOX_LEASE=300                        # Seconds a claimed message is held
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.rate_limit import backoff_delay
+from appraisal.storage import REPO_ROOT, get_backend, resolve_data_path
+
+DEFAULT_OUTBOX_PATH = REPO_ROOT / '.tmp' / 'outbox.db'
+
+MAIL_DELIVERY = os.getenv('APPRAISAL_MAIL_DELIVERY', 'direct').lower()
+OUTBOX_PATH = resolve_data_path(os.getenv('APPRAISAL_OUTBOX_PATH'), DEFAULT_OUTBOX_PATH)
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 8))
+OUTBOX_RETRY_BASE = float(os.getenv('OUTBOX_RETRY_BASE', 30))
+OUTBOX_LEASE = float(os.getenv('OUTBOX_LEASE', 300))
+
+OUTBOX_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS _outbox (
+        id INTEGER PRIMARY KEY,
+        idempotency_key TEXT UNIQUE,
+        to_email TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        body TEXT NOT NULL,
+        html TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        last_error TEXT,
+        created_at TEXT NOT NULL,
+        sent_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS ix__outbox_due ON _outbox (status, next_attempt_at);
+'''
+
+
+def ensure_outbox_schema(conn: sqlite3.Connection):
+    """Create the outbox table, or add columns an older one lacks."""
+    conn.executescript(OUTBOX_SCHEMA)
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(_outbox)')}
+    if 'html' not in columns:
+        conn.execute('ALTER TABLE _outbox ADD COLUMN html TEXT')
+
+
+def outbox_enabled() -> bool:
+    """Whether workflow emails go through the outbox instead of straight to SMTP."""
+    return MAIL_DELIVERY == 'outbox'
+
+
+def insert_messages(conn: sqlite3.Connection, messages: list[dict]) -> list[bool]:
+    """
+    Insert messages into the outbox table on an open connection.
+
+    The caller owns the transaction, which is how queued emails share one
+    with the storage writes. Each message is a dict with to, subject, body
+    and optional html and key. Returns, per message, whether it was new (False
+    means its idempotency key was already queued).
+    """
+    now = time.time()
+    created = datetime.now().isoformat()
+    inserted = []
+    for m in messages:
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO _outbox '
+            '(idempotency_key, to_email, subject, body, html, next_attempt_at, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (m.get('key') or None, m['to'], m['subject'], m['body'], m.get('html'), now, created)
+        )
+        inserted.append(cursor.rowcount > 0)
+    return inserted
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether retrying a failed send can't help."""
+    import smtplib
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+class Outbox:
+    """SQLite-backed message queue. Safe to share between threads and processes."""
+
+    def __init__(self, path: str | Path = OUTBOX_PATH):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        ensure_outbox_schema(self._conn)
+        self._lock = threading.RLock()
+
+    def _write(self, fn):
+        """Run fn(conn) in one write transaction."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def enqueue(self, messages: list[dict]) -> list[bool]:
+        """Queue messages in one transaction. See insert_messages."""
+        return self._write(lambda conn: insert_messages(conn, messages))
+
+    def claim(self, limit: int = OUTBOX_BATCH_SIZE) -> list[dict]:
+        """Lease up to `limit` due messages, oldest first."""
+        def claim_due(conn):
+            now = time.time()
+            rows = conn.execute(
+                "SELECT id, idempotency_key, to_email, subject, body, html, attempts FROM _outbox "
+                "WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at, id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE _outbox SET status = 'sending', attempts = attempts + 1, next_attempt_at = ? "
+                "WHERE id = ?",
+                [(now + OUTBOX_LEASE, row[0]) for row in rows]
+            )
+            return [
+                {'id': r[0], 'key': r[1], 'to': r[2], 'subject': r[3], 'body': r[4], 'html': r[5],
+                 'attempts': r[6] + 1}
+                for r in rows
+            ]
+        return self._write(claim_due)
+
+    def record(self, outcomes: list[tuple[dict, Exception | None]]) -> dict:
+        """Record send outcomes for claimed messages in one transaction."""
+        counts = {'sent': 0, 'retried': 0, 'dead': 0}
+
+        def apply(conn):
+            now = time.time()
+            for message, error in outcomes:
+                if error is None:
+                    conn.execute(
+                        "UPDATE _outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+                        (datetime.now().isoformat(), message['id'])
+                    )
+                    counts['sent'] += 1
+                elif is_permanent(error) or message['attempts'] >= OUTBOX_MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE _outbox SET status = 'dead', last_error = ? WHERE id = ?",
+                        (str(error), message['id'])
+                    )
+                    counts['dead'] += 1
+                else:
+                    delay = backoff_delay(message['attempts'] - 1, base=OUTBOX_RETRY_BASE, cap=3600.0)
+                    conn.execute(
+                        "UPDATE _outbox SET status = 'pending', next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        (now + delay, str(error), message['id'])
+                    )
+                    counts['retried'] += 1
+
+        self._write(apply)
+        return counts
+
+    def drain_once(self, limit: int = OUTBOX_BATCH_SIZE, smtp_config: dict = None) -> dict:
+        """Claim one batch, send it concurrently, and record the outcomes."""
+        from appraisal.mail_transport import send_emails
+
+        claimed = self.claim(limit)
+        if not claimed:
+            return {'claimed': 0, 'sent': 0, 'retried': 0, 'dead': 0}
+        errors = send_emails([(m['to'], m['subject'], m['body'], m['html']) for m in claimed], smtp_config)
+        return {'claimed': len(claimed), **self.record(list(zip(claimed, errors)))}
+
+    def drain(self, limit: int = OUTBOX_BATCH_SIZE, smtp_config: dict = None) -> dict:
+        """Send everything that is due now, batch by batch."""
+        totals = {'claimed': 0, 'sent': 0, 'retried': 0, 'dead': 0}
+        while True:
+            counts = self.drain_once(limit, smtp_config)
+            for k in totals:
+                totals[k] += counts[k]
+            if counts['claimed'] < limit:
+                return totals
+
+    def run(self, stop: threading.Event = None, poll_interval: float = 1.0, limit: int = OUTBOX_BATCH_SIZE):
+        """Drain until `stop` is set, polling when the queue is idle."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                counts = self.drain_once(limit)
+            except Exception as e:
+                print(f"Warning: outbox drain failed: {e}", file=sys.stderr)
+                counts = {'claimed': 0}
+            if counts['claimed'] < limit:
+                stop.wait(poll_interval)
+
+    def status(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM _outbox GROUP BY status').fetchall()
+            due = self._conn.execute(
+                "SELECT COUNT(*) FROM _outbox WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?",
+                (time.time(),)
+            ).fetchone()[0]
+        counts = {'pending': 0, 'sending': 0, 'sent': 0, 'dead': 0}
+        counts.update(dict(rows))
+        counts['due'] = due
+        return counts
+
+    def dead_letters(self, limit: int = 100) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, idempotency_key, to_email, subject, attempts, last_error, created_at "
+                "FROM _outbox WHERE status = 'dead' ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        keys = ['id', 'key', 'to', 'subject', 'attempts', 'last_error', 'created_at']
+        return [dict(zip(keys, r)) for r in rows]
+
+    def retry_dead(self, ids: list[int] = None) -> int:
+        """Requeue dead letters (all of them when no IDs are given)."""
+        def requeue(conn):
+            sql = "UPDATE _outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'"
+            params = [time.time()]
+            if ids:
+                sql += f" AND id IN ({', '.join('?' for _ in ids)})"
+                params += list(ids)
+            return conn.execute(sql, params).rowcount
+        return self._write(requeue)
+
+
+# ── Shared outbox ──
+
+_outbox: Outbox | None = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """
+    Get the process-wide outbox: in the SQLite storage database when that
+    backend is in use (so queuing shares its transactions), otherwise in
+    APPRAISAL_OUTBOX_PATH.
+    """
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                backend = get_backend()
+                _outbox = Outbox(backend.path if backend.name == 'sqlite' else OUTBOX_PATH)
+    return _outbox
+
+
+def start_worker(poll_interval: float = 1.0) -> tuple[threading.Thread, threading.Event]:
+    """Drain the outbox on a daemon thread. Set the returned event to stop it."""
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=get_outbox().run,
+        kwargs={'stop': stop, 'poll_interval': poll_interval},
+        name='outbox-worker',
+        daemon=True
+    )
+    thread.start()
+    return thread, stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the appraisal email outbox")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--worker", action="store_true", help="Drain continuously")
+    action.add_argument("--drain", action="store_true", help="Drain what is due, then exit")
+    action.add_argument("--status", action="store_true", help="Message counts by status")
+    action.add_argument("--dead", action="store_true", help="List dead letters")
+    action.add_argument("--retry-dead", nargs="*", type=int, metavar="ID", help="Requeue dead letters")
+    parser.add_argument("--poll", type=float, default=1.0, help="Worker poll interval in seconds")
+    args = parser.parse_args()
+
+    outbox = get_outbox()
+
+    if args.worker:
+        print(f"Outbox worker draining {outbox.path} (Ctrl+C to stop)", file=sys.stderr)
+        try:
+            outbox.run(poll_interval=args.poll)
+        except KeyboardInterrupt:
+            pass
+        result = {'success': True, **outbox.status()}
+    elif args.drain:
+        result = {'success': True, **outbox.drain(), 'remaining': outbox.status()}
+    elif args.status:
+        result = {'success': True, **outbox.status()}
+    elif args.dead:
+        result = {'success': True, 'dead_letters': outbox.dead_letters()}
+    else:
+        result = {'success': True, 'requeued': outbox.retry_dead(args.retry_dead)}
+
+    print(json.dumps(result, indent=2))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
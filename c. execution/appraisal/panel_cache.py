@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Read-through cache for appraiser panels.
+
+A single order touches the panel several times (find appraisers, explicit
+RFP recipients, quote recording, quote ranking), and each used to download
+the whole 'Appraiser Panel' tab. Panels are cached per spreadsheet ID - the
+master panel and every client panel from get_client_panel_sheet_id - in
+memory and on disk, so separate CLI processes share them too.
+
+Within the TTL a cached panel is used as-is. Once it expires, the cache asks
+Drive for the spreadsheet's version and modified time; if neither changed,
+the entry is renewed without re-reading the sheet. Only a real change
+downloads the panel again.
+
+Usage:
+    python panel_cache.py --clear            # Drop all cached panels
+    python panel_cache.py --warm             # Pre-load the master panel
+
+Environment:
+    APPRAISAL_PANEL_CACHE_TTL=300            # Seconds before revalidating
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.sheets_utils import (
+    PANEL_SHEET_ID, read_sheet, get_file_version
+)
+from appraisal.storage import get_backend
+
+if TYPE_CHECKING:
+    # Imported on first use: it pulls in numpy, which get_panel doesn't need
+    from appraisal.panel_model import PanelModel
+
+PANEL_RANGE = 'Appraiser Panel!A:Z'
+PANEL_CACHE_TTL = float(os.getenv('APPRAISAL_PANEL_CACHE_TTL', 300))
+PANEL_CACHE_DIR = Path(__file__).parent.parent.parent / '.tmp' / 'panel_cache'
+
+# spreadsheet_id -> {'rows': [...], 'version': str, 'checked_at': float}
+_memory: dict[str, dict] = {}
+
+# spreadsheet_id -> (rows list the model was built from, PanelModel)
+_models: dict[str, tuple[list, PanelModel]] = {}
+_lock = threading.Lock()
+
+
+def _cache_file(spreadsheet_id: str) -> Path:
+    return PANEL_CACHE_DIR / f"{re.sub(r'[^A-Za-z0-9_-]', '_', spreadsheet_id)}.json"
+
+
+def _load_disk(spreadsheet_id: str) -> dict | None:
+    try:
+        with open(_cache_file(spreadsheet_id)) as f:
+            entry = json.load(f)
+        return entry if isinstance(entry.get('rows'), list) else None
+    except (OSError, ValueError):
+        return None
+
+
+def _save_disk(spreadsheet_id: str, entry: dict):
+    try:
+        PANEL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _cache_file(spreadsheet_id)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # Disk cache is best-effort
+
+
+def _get_entry(spreadsheet_id: str, refresh: bool = False) -> dict:
+    """Get the cache entry for a panel, revalidating or re-reading as needed."""
+    # Local storage is already fast and has no Drive version to check
+    if get_backend().name != 'sheets':
+        return {'rows': read_sheet(spreadsheet_id, PANEL_RANGE), 'version': '', 'checked_at': time.time()}
+
+    now = time.time()
+    with _lock:
+        entry = None if refresh else (_memory.get(spreadsheet_id) or _load_disk(spreadsheet_id))
+
+    version = None
+    if entry and now - entry['checked_at'] >= PANEL_CACHE_TTL:
+        # Expired - revalidate against Drive before re-reading the sheet
+        try:
+            version = get_file_version(spreadsheet_id)
+        except Exception:
+            version = ''
+        if version and version == entry['version']:
+            entry = dict(entry, checked_at=now)
+            _save_disk(spreadsheet_id, entry)
+        else:
+            entry = None
+
+    if entry is None:
+        if version is None:
+            try:
+                version = get_file_version(spreadsheet_id)
+            except Exception:
+                version = ''  # Can't revalidate - the entry will simply expire
+        entry = {
+            'rows': read_sheet(spreadsheet_id, PANEL_RANGE),
+            'version': version,
+            'checked_at': now,
+        }
+        _save_disk(spreadsheet_id, entry)
+
+    with _lock:
+        _memory[spreadsheet_id] = entry
+
+    return entry
+
+
+def get_panel(spreadsheet_id: str, refresh: bool = False) -> list[dict]:
+    """
+    Get all appraisers on a panel, from cache when possible.
+
+    Args:
+        spreadsheet_id: Spreadsheet holding the 'Appraiser Panel' tab
+        refresh: Skip the cache and re-read the sheet
+
+    Returns:
+        List of appraiser dicts. Each call gets its own copies, so callers
+        may annotate them (e.g. with a rank) freely.
+    """
+    return [dict(row) for row in _get_entry(spreadsheet_id, refresh)['rows']]
+
+
+def get_panel_model(spreadsheet_id: str, refresh: bool = False) -> PanelModel:
+    """Get a panel parsed and indexed for candidate lookup, built once per cached panel."""
+    return _model_for(spreadsheet_id, _get_entry(spreadsheet_id, refresh)['rows'])
+
+
+def cached_panel_model(spreadsheet_id: str) -> PanelModel | None:
+    """
+    Get a panel model only if the cache can serve it without any API call -
+    for steps that would rather fetch the panel in their own ReadBatch
+    (then handing the rows to store_panel) than make a separate read.
+    """
+    if get_backend().name != 'sheets':
+        return None
+    with _lock:
+        entry = _memory.get(spreadsheet_id)
+    if entry is None:
+        entry = _load_disk(spreadsheet_id)
+    if entry is None or time.time() - entry['checked_at'] >= PANEL_CACHE_TTL:
+        return None
+    with _lock:
+        _memory[spreadsheet_id] = entry
+    return _model_for(spreadsheet_id, entry['rows'])
+
+
+def store_panel(spreadsheet_id: str, rows: list[dict]) -> PanelModel:
+    """
+    Cache panel rows read elsewhere (e.g. in a ReadBatch) and return their
+    model. With no Drive version to compare, the entry is re-read rather
+    than revalidated once it expires.
+    """
+    if get_backend().name != 'sheets':
+        from appraisal.panel_model import PanelModel
+        return PanelModel(rows)
+    entry = {'rows': rows, 'version': '', 'checked_at': time.time()}
+    _save_disk(spreadsheet_id, entry)
+    with _lock:
+        _memory[spreadsheet_id] = entry
+    return _model_for(spreadsheet_id, rows)
+
+
+def _model_for(spreadsheet_id: str, rows: list[dict]) -> PanelModel:
+    with _lock:
+        cached = _models.get(spreadsheet_id)
+        if cached and cached[0] is rows:
+            return cached[1]
+
+    from appraisal.panel_model import PanelModel
+    model = PanelModel(rows)
+    with _lock:
+        _models[spreadsheet_id] = (rows, model)
+    return model
+
+
+def invalidate_panel(spreadsheet_id: str = None):
+    """Drop one cached panel, or all of them."""
+    with _lock:
+        if spreadsheet_id:
+            _memory.pop(spreadsheet_id, None)
+            _models.pop(spreadsheet_id, None)
+            _cache_file(spreadsheet_id).unlink(missing_ok=True)
+        else:
+            _memory.clear()
+            _models.clear()
+            if PANEL_CACHE_DIR.exists():
+                for path in PANEL_CACHE_DIR.glob('*.json'):
+                    path.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the appraiser panel cache")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--clear", action="store_true", help="Drop all cached panels")
+    action.add_argument("--warm", action="store_true", help="Pre-load the master panel")
+    args = parser.parse_args()
+
+    if args.clear:
+        invalidate_panel()
+        result = {'success': True, 'cleared': True}
+    else:
+        if not PANEL_SHEET_ID:
+            result = {'success': False, 'errors': ['APPRAISAL_PANEL_SHEET_ID not configured in .env']}
+        else:
+            rows = get_panel(PANEL_SHEET_ID, refresh=True)
+            result = {'success': True, 'appraisers': len(rows)}
+
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['success'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Compiled appraiser panel for fast candidate lookup.
+
+Panel rows arrive from the sheet as dicts of strings. PanelModel parses
+each row once - splitting states and property types, converting workload,
+capacity, fees and scores to numbers - into compact __slots__ records, and
+builds an inverted index from (state, property_type) to the appraisers who
+pass the standing qualification checks (active, under capacity, quality
+>= 4.0). Finding candidates for an order is then a dict lookup whose cost
+grows with the number of matches, not the size of the panel.
+
+The numeric ranking fields are also held as columns, so rank() scores every
+candidate in one pass and keeps only the best k (see scoring.py).
+
+A model is immutable once built; panel_cache keeps one per cached panel.
+"""
+from __future__ import annotations
+
+from appraisal.scoring import appraiser_scores, numpy_or_none, top_k
+
+MIN_QUALITY_SCORE = 4.0
+
+
+def _to_int(value, default: int) -> int | None:
+    """Parse an int cell, using default when blank. None if not numeric."""
+    try:
+        return int(value or default)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value, default: float) -> float | None:
+    """Parse a float cell, using default when blank. None if not numeric."""
+    try:
+        return float(value or default)
+    except (TypeError, ValueError):
+        return None
+
+
+class Appraiser:
+    """One parsed panel row. The original row dict is kept for output."""
+
+    __slots__ = (
+        'appraiser_id', 'row', 'states', 'property_types', 'active',
+        'workload', 'capacity', 'quality_score', 'avg_fee', 'avg_turnaround_days',
+        'rank_quality', 'eligible', 'position',
+    )
+
+    def __init__(self, row: dict, position: int = 0):
+        self.row = row
+        self.position = position
+        self.appraiser_id = row.get('appraiser_id')
+        self.states = frozenset(s.strip().upper() for s in row.get('states', '').split(','))
+        self.property_types = frozenset(t.strip() for t in row.get('property_types', '').split(','))
+        self.active = row.get('active', '').upper() == 'TRUE'
+
+        self.workload = _to_int(row.get('current_workload', 0), 0)
+        self.capacity = _to_int(row.get('capacity', 5), 5)
+        self.quality_score = _to_float(row.get('quality_score', 0), 0)
+        self.avg_fee = _to_float(row.get('avg_fee', 3000), 3000)
+        self.avg_turnaround_days = _to_float(row.get('avg_turnaround_days', 14), 14)
+
+        # Ranking treats a blank quality score as 3 rather than 0
+        self.rank_quality = _to_float(row.get('quality_score', 3), 3)
+
+        # Checks that don't depend on the order. A value that isn't numeric
+        # skips its check, as the original filter did.
+        under_capacity = (
+            self.workload is None or self.capacity is None
+            or self.workload < self.capacity
+        )
+        quality_ok = self.quality_score is None or self.quality_score >= MIN_QUALITY_SCORE
+        self.eligible = self.active and under_capacity and quality_ok
+
+
+class PanelModel:
+    """Parsed appraiser panel with an inverted (state, property_type) index."""
+
+    def __init__(self, rows: list[dict]):
+        self.appraisers = [Appraiser(row, i) for i, row in enumerate(rows)]
+        self.by_id = {}
+        self._by_email = None
+        self._columns = None
+        self._index: dict[tuple[str, str], list[Appraiser]] = {}
+
+        for a in self.appraisers:
+            self.by_id.setdefault(a.appraiser_id, a)
+            if not a.eligible:
+                continue
+            for state in a.states:
+                for property_type in a.property_types:
+                    self._index.setdefault((state, property_type), []).append(a)
+
+    def __len__(self):
+        return len(self.appraisers)
+
+    def candidates(
+        self,
+        property_state: str,
+        property_type: str,
+        excluded_ids: list[str] = None
+    ) -> list[Appraiser]:
+        """Qualified appraisers for a state and property type, in panel order."""
+        matches = self._index.get((property_state.upper(), property_type), [])
+        if excluded_ids:
+            excluded = set(excluded_ids)
+            matches = [a for a in matches if a.appraiser_id not in excluded]
+        return list(matches)
+
+    def filter(
+        self,
+        property_state: str,
+        property_type: str,
+        excluded_ids: list[str] = None
+    ) -> list[dict]:
+        """Same as candidates(), as copies of the panel row dicts."""
+        return [dict(a.row) for a in self.candidates(property_state, property_type, excluded_ids)]
+
+    def _score_columns(self):
+        """Ranking fields for the whole panel as parallel columns, built once."""
+        if self._columns is None:
+            np = numpy_or_none()
+
+            def column(attr, default):
+                values = [getattr(a, attr) for a in self.appraisers]
+                values = [default if v is None else v for v in values]
+                return np.asarray(values, dtype=float) if np is not None else values
+
+            self._columns = (
+                column('rank_quality', 3),
+                column('avg_turnaround_days', 14),
+                column('workload', 0),
+                column('capacity', 5),
+                column('avg_fee', 3000),
+            )
+        return self._columns
+
+    def scores(self, candidates: list[Appraiser], weights: dict = None):
+        """Scores for candidates (lower is better), computed in one vectorized pass."""
+        positions = [a.position for a in candidates]
+        np = numpy_or_none()
+        if np is not None:
+            idx = np.asarray(positions, dtype=int)
+            columns = [col[idx] for col in self._score_columns()]
+        else:
+            columns = [[col[i] for i in positions] for col in self._score_columns()]
+        return appraiser_scores(*columns, weights=weights)
+
+    def rank(
+        self,
+        candidates: list[Appraiser],
+        weights: dict = None,
+        limit: int = None
+    ) -> list[Appraiser]:
+        """
+        Best candidates first.
+
+        Args:
+            candidates: Records from candidates()
+            weights: Scoring weights (see scoring.get_client_weights)
+            limit: Keep only the top `limit`; None keeps all
+        """
+        if not candidates:
+            return []
+        return [candidates[i] for i in top_k(self.scores(candidates, weights), limit)]
+
+    def get(self, appraiser_id: str) -> dict | None:
+        """Copy of one appraiser's row, or None."""
+        a = self.by_id.get(appraiser_id)
+        return dict(a.row) if a else None
+
+    def find_by_email(self, email: str) -> dict | None:
+        """Copy of the row of the appraiser with this email address (any case), or None."""
+        if self._by_email is None:
+            by_email = {}
+            for a in self.appraisers:
+                address = (a.row.get('email') or '').strip().lower()
+                if address:
+                    by_email.setdefault(address, a)
+            self._by_email = by_email
+        a = self._by_email.get((email or '').strip().lower())
+        return dict(a.row) if a else None
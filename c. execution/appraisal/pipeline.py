@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+In-process order pipeline with resumable checkpoints.
+
+Taking one order through the workflow used to mean five CLI invocations,
+each re-reading the order row and the panel (send_rfp even re-ran
+find_appraisers). The pipeline runs the steps in one process and hands each
+step the order, candidates and quotes the previous one produced:
+
+    intake:  receive -> find -> rfp
+    award:   summary -> engage          (once the quotes are in)
+
+Each step still ends with its own single write. After every completed step
+a checkpoint (.tmp/pipeline/<order_id>.json) records it, so a run that
+stops part-way - a crash, an SMTP outage - continues at the first
+unfinished step: the order is not created twice, appraisers are not mailed
+again, and the candidates picked before the stop are the ones contacted.
+Without a checkpoint the order's status stands in: an order past 'pending'
+gets no more RFPs, an engaged order is not engaged again.
+
+Usage:
+    python pipeline.py --intake --file order.json               # New order through RFPs
+    python pipeline.py --intake --test --dry-run
+    python pipeline.py --resume ORD-2026-...                    # Continue an interrupted run
+    python pipeline.py --award ORD-2026-... --auto              # Summary, then engage the best quote
+    python pipeline.py --award ORD-2026-... --quote-id Q-... --no-summary
+    python pipeline.py --status ORD-2026-...                    # Show the checkpoint
+
+Returns JSON with each step's result.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.sheets_utils import (
+    ORDERS_SHEET_ID, PANEL_SHEET_ID, QUOTES_SHEET_ID,
+    append_row, find_row_by_id, get_client_panel_sheet_id, ReadBatch, ORDERS_COLUMNS
+)
+from appraisal.receive_order import validate_order, build_order, generate_order_id, get_test_order
+from appraisal.find_appraisers import find_appraisers_for_order
+from appraisal.send_rfp import send_rfp_emails
+from appraisal.collect_quotes import send_summary_to_client
+from appraisal.send_engagement import engage_appraiser
+from appraisal.panel_cache import get_panel, cached_panel_model, store_panel
+
+PIPELINE_DIR = Path(__file__).parent.parent.parent / '.tmp' / 'pipeline'
+
+INTAKE_STEPS = ['receive', 'find', 'rfp']
+AWARD_STEPS = ['summary', 'engage']
+
+
+# ── Checkpoints ──
+
+def _checkpoint_file(order_id: str) -> Path:
+    return PIPELINE_DIR / f"{re.sub(r'[^A-Za-z0-9_-]', '_', order_id)}.json"
+
+
+def load_checkpoint(order_id: str) -> dict | None:
+    """The saved progress of an order's pipeline run, or None."""
+    try:
+        with open(_checkpoint_file(order_id)) as f:
+            state = json.load(f)
+        return state if isinstance(state.get('steps'), dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(state: dict):
+    """Atomically replace an order's checkpoint."""
+    state['updated_at'] = datetime.now().isoformat()
+    PIPELINE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _checkpoint_file(state['order_id'])
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _complete(state: dict, step: str, dry_run: bool, **saved):
+    """Record a finished step (nothing is recorded on a dry run)."""
+    state['steps'][step] = {'completed_at': datetime.now().isoformat(), **saved}
+    if not dry_run:
+        save_checkpoint(state)
+
+
+def _start(order_id: str, phase: str, options: dict) -> dict:
+    """The order's checkpoint, switched to `phase` with these options."""
+    state = load_checkpoint(order_id) or {'order_id': order_id, 'steps': {}}
+    state['phase'] = phase
+    state['options'] = options
+    return state
+
+
+def _skipped(state: dict, step: str) -> dict:
+    return {'status': 'skipped', 'reason': f"completed {state['steps'][step]['completed_at']}"}
+
+
+def _panel_sheet_id(panel_source: str) -> str:
+    """The spreadsheet behind find_appraisers' panel_source ('master' or 'client:<id>')."""
+    if panel_source and panel_source.startswith('client:'):
+        return get_client_panel_sheet_id(panel_source.split(':', 1)[1]) or PANEL_SHEET_ID
+    return PANEL_SHEET_ID
+
+
+def _checkpointed_candidates(state: dict) -> list[dict]:
+    """Panel rows of the appraisers the find step picked, in its order, from the panel it searched."""
+    find = state['steps']['find']
+    by_id = {a.get('appraiser_id'): a for a in get_panel(find.get('panel_sheet_id') or PANEL_SHEET_ID)}
+    return [by_id[a] for a in find['appraiser_ids'] if a in by_id]
+
+
+# ── Intake: receive -> find -> rfp ──
+
+def run_intake(
+    data: dict = None,
+    order_id: str = None,
+    limit: int = 5,
+    dry_run: bool = False
+) -> dict:
+    """
+    Take a new order (data) through intake, or finish an existing order's
+    intake (order_id), skipping the steps its checkpoint records as done.
+
+    Returns:
+        Dict with the order ID and each step's status and result
+    """
+    steps = {}
+    result = {'success': False, 'order_id': order_id, 'phase': 'intake', 'steps': steps, 'dry_run': dry_run}
+
+    # Receive - the one write is the new order row
+    if order_id is None:
+        is_valid, errors = validate_order(data or {})
+        if not is_valid:
+            steps['receive'] = {'status': 'failed', 'errors': errors}
+            return {**result, 'errors': errors}
+        if not ORDERS_SHEET_ID:
+            return {**result, 'errors': ['APPRAISAL_ORDERS_SHEET_ID not configured in .env']}
+
+        order = build_order(data, generate_order_id())
+        order_id = result['order_id'] = order['order_id']
+        state = _start(order_id, 'intake', {'limit': limit})
+        if dry_run:
+            order_result = (None, order)
+        else:
+            try:
+                row_index = append_row(ORDERS_SHEET_ID, 'Orders', order, ORDERS_COLUMNS)
+            except Exception as e:
+                steps['receive'] = {'status': 'failed', 'errors': [f'Failed to log order: {e}']}
+                return {**result, 'errors': steps['receive']['errors']}
+            # Later steps update the row in place, so they need its index
+            order_result = (row_index, order) if row_index else find_row_by_id(
+                ORDERS_SHEET_ID, 'Orders', 'order_id', order_id
+            )
+        _complete(state, 'receive', dry_run)
+        steps['receive'] = {'status': 'completed', 'result': {'success': True, 'order_id': order_id, 'order': order}}
+    else:
+        state = _start(order_id, 'intake', {'limit': limit})
+        order_result = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+        if not order_result:
+            return {**result, 'errors': [f'Order not found: {order_id}']}
+        steps['receive'] = {'status': 'skipped', 'reason': 'order already logged'}
+
+    order = order_result[1]
+
+    # Find - the candidates are checkpointed so a resumed run mails the same ones
+    if 'find' in state['steps']:
+        steps['find'] = _skipped(state, 'find')
+        candidates = None   # Only rebuilt if the RFPs still have to go out
+    else:
+        found = find_appraisers_for_order(order_id=order_id, limit=limit, order=order)
+        if not found.get('success') or not found.get('candidates'):
+            steps['find'] = {'status': 'failed', 'result': found}
+            return {**result, 'errors': found.get('errors') or [found.get('message', 'No qualified appraisers found')]}
+        candidates = found['candidates']
+        _complete(
+            state, 'find', dry_run,
+            appraiser_ids=[c.get('appraiser_id') for c in candidates],
+            panel_sheet_id=_panel_sheet_id(found.get('panel_source'))
+        )
+        steps['find'] = {'status': 'completed', 'result': found}
+
+    # RFP - one write marks the order rfp_sent (and queues the mail, with the outbox)
+    if 'rfp' in state['steps']:
+        steps['rfp'] = _skipped(state, 'rfp')
+    elif order.get('status', 'pending') != 'pending':
+        steps['rfp'] = {'status': 'skipped', 'reason': f"order is already {order.get('status')}"}
+        _complete(state, 'rfp', dry_run)
+    else:
+        if candidates is None:
+            candidates = _checkpointed_candidates(state)
+        sent = send_rfp_emails(order_id, dry_run=dry_run, order_result=order_result, appraisers=candidates)
+        delivered = sent.get('sent_count', 0) + sent.get('queued_count', 0)
+        if not sent.get('success') or (not dry_run and not delivered):
+            # Nothing went out - leave the step open so a resumed run retries it
+            steps['rfp'] = {'status': 'failed', 'result': sent}
+            return {**result, 'errors': sent.get('errors') or ['No RFP could be sent']}
+        _complete(state, 'rfp', dry_run)
+        steps['rfp'] = {'status': 'completed', 'result': sent}
+
+    result['success'] = True
+    return result
+
+
+# ── Award: summary -> engage ──
+
+def load_award_context(order_id: str) -> tuple[tuple[int, dict] | None, list[dict]]:
+    """The order and its quotes in one read round-trip (plus the panel, unless cached)."""
+    reads = ReadBatch()
+    reads.row(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+    reads.rows(QUOTES_SHEET_ID, 'Quotes')
+    panel_cached = cached_panel_model(PANEL_SHEET_ID) is not None
+    if not panel_cached:
+        reads.rows(PANEL_SHEET_ID, 'Appraiser Panel')
+
+    loaded = reads.load()
+    if not panel_cached:
+        # Quote ranking reads the panel from the cache
+        store_panel(PANEL_SHEET_ID, loaded[2])
+    return loaded[0], [q for q in loaded[1] if q.get('order_id') == order_id]
+
+
+def run_award(
+    order_id: str,
+    quote_id: str = None,
+    auto: bool = False,
+    send_summary: bool = True,
+    dry_run: bool = False
+) -> dict:
+    """
+    Send the client the quote summary, then engage the chosen (quote_id) or
+    recommended (auto) appraiser, skipping steps already completed.
+
+    Returns:
+        Dict with each step's status and result
+    """
+    steps = {}
+    result = {'success': False, 'order_id': order_id, 'phase': 'award', 'steps': steps, 'dry_run': dry_run}
+    if not quote_id and not auto:
+        return {**result, 'errors': ['Either quote_id or auto required']}
+
+    state = _start(order_id, 'award', {'quote_id': quote_id, 'auto': auto, 'send_summary': send_summary})
+    order_result, quotes = load_award_context(order_id)
+    if not order_result:
+        return {**result, 'errors': [f'Order not found: {order_id}']}
+    if not quotes:
+        return {**result, 'errors': ['No quotes found for this order']}
+    order = order_result[1]
+
+    # Summary - mail only, no sheet write
+    if not send_summary:
+        steps['summary'] = {'status': 'skipped', 'reason': 'not requested'}
+    elif 'summary' in state['steps']:
+        steps['summary'] = _skipped(state, 'summary')
+    else:
+        summary = send_summary_to_client(order_id, dry_run=dry_run, order_result=order_result, quotes=quotes)
+        if not summary.get('success'):
+            steps['summary'] = {'status': 'failed', 'result': summary}
+            return {**result, 'errors': summary.get('errors')}
+        _complete(state, 'summary', dry_run)
+        steps['summary'] = {'status': 'completed', 'result': summary}
+
+    # Engage - one write for the order and the selected quote
+    if 'engage' in state['steps']:
+        steps['engage'] = _skipped(state, 'engage')
+    elif order.get('status') == 'engaged':
+        steps['engage'] = {'status': 'skipped', 'reason': 'order is already engaged'}
+        _complete(state, 'engage', dry_run)
+    else:
+        engaged = engage_appraiser(
+            order_id, quote_id=quote_id, auto=auto, dry_run=dry_run,
+            order_result=order_result, quotes=quotes
+        )
+        if not engaged.get('success'):
+            steps['engage'] = {'status': 'failed', 'result': engaged}
+            return {**result, 'errors': engaged.get('errors')}
+        _complete(state, 'engage', dry_run)
+        steps['engage'] = {'status': 'completed', 'result': engaged}
+
+    result['success'] = True
+    return result
+
+
+def resume(order_id: str, dry_run: bool = False) -> dict:
+    """Continue an order's interrupted run with the options it was started with."""
+    state = load_checkpoint(order_id)
+    if state is None:
+        # No checkpoint: only a logged order still waiting for its RFPs can resume
+        found = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+        if not found:
+            return {'success': False, 'errors': [f'Order not found: {order_id}']}
+        if found[1].get('status', 'pending') != 'pending':
+            return {
+                'success': False,
+                'errors': [f"No checkpoint for {order_id} and it is already {found[1].get('status')}; "
+                           "run --award once its quotes are in"]
+            }
+        return run_intake(order_id=order_id, dry_run=dry_run)
+
+    options = state.get('options') or {}
+    if state.get('phase') == 'award':
+        return run_award(order_id, dry_run=dry_run, **options)
+    return run_intake(order_id=order_id, dry_run=dry_run, **options)
+
+
+def pipeline_status(order_id: str) -> dict:
+    """An order's checkpoint: the phase it is in and the steps completed."""
+    state = load_checkpoint(order_id)
+    if state is None:
+        return {'success': False, 'errors': [f'No checkpoint for {order_id}']}
+    steps = INTAKE_STEPS if state.get('phase') == 'intake' else AWARD_STEPS
+    return {
+        'success': True,
+        **state,
+        'next_step': next((s for s in steps if s not in state['steps']), None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an appraisal order through the workflow in one process")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--intake", action="store_true", help="Receive a new order, find appraisers, send RFPs")
+    action.add_argument("--award", metavar="ORDER_ID", help="Send the quote summary and engage an appraiser")
+    action.add_argument("--resume", metavar="ORDER_ID", help="Continue an interrupted run")
+    action.add_argument("--status", metavar="ORDER_ID", help="Show an order's checkpoint")
+    parser.add_argument("--json", help="Order data as JSON string (for --intake)")
+    parser.add_argument("--file", help="Order data from JSON file (for --intake)")
+    parser.add_argument("--test", action="store_true", help="Use sample order data (for --intake)")
+    parser.add_argument("--limit", type=int, default=5, help="Appraisers to invite (default: 5)")
+    parser.add_argument("--quote-id", help="Quote to accept (for --award)")
+    parser.add_argument("--auto", action="store_true", help="Accept the recommended quote (for --award)")
+    parser.add_argument("--no-summary", action="store_true", help="Don't email the client a summary (for --award)")
+    parser.add_argument("--dry-run", action="store_true", help="Preview without writing or sending")
+    args = parser.parse_args()
+
+    if args.status:
+        result = pipeline_status(args.status)
+    elif args.resume:
+        result = resume(args.resume, dry_run=args.dry_run)
+    elif args.award:
+        result = run_award(
+            args.award, quote_id=args.quote_id, auto=args.auto,
+            send_summary=not args.no_summary, dry_run=args.dry_run
+        )
+    else:
+        if args.test:
+            data = get_test_order()
+        elif args.json:
+            try:
+                data = json.loads(args.json)
+            except json.JSONDecodeError as e:
+                print(json.dumps({'success': False, 'errors': [f'Invalid JSON: {e}']}))
+                sys.exit(1)
+        elif args.file:
+            with open(args.file, 'r') as f:
+                data = json.load(f)
+        else:
+            data = json.load(sys.stdin)
+        result = run_intake(data, limit=args.limit, dry_run=args.dry_run)
+
+    print(json.dumps(result, indent=2, default=str))
+
+    if result.get('success'):
+        if args.status:
+            print(f"\n✓ {args.status}: {result['phase']}, next step: {result['next_step'] or 'none'}", file=sys.stderr)
+        else:
+            done = [name for name, step in result['steps'].items() if step['status'] == 'completed']
+            print(f"\n✓ {result['order_id']}: {result['phase']} complete "
+                  f"({', '.join(done) or 'nothing left to do'})", file=sys.stderr)
+        sys.exit(0)
+    else:
+        print(f"\n✗ Failed: {result.get('errors')}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Rate limiting and retry helpers for the appraisal workflow.
+
+Provides a thread-safe token bucket, jittered exponential backoff, and
+single-flight coalescing of identical concurrent calls. Nothing here knows
+about Google APIs - sheets_utils wires these up to the Sheets quotas.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    acquire() blocks until enough tokens are available, so a burst is
+    spread out at the refill rate instead of being rejected.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens, waiting if needed. Returns seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def drain(self):
+        """Empty the bucket, e.g. after the server reports a quota overrun."""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls.
+
+    While a call for a key is in flight, other threads asking for the same
+    key wait for it and share its result (or exception) instead of issuing
+    their own request. Results are shared, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+
+    def do(self, key, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'event': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except BaseException as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['event'].set()
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 32.0) -> float:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def call_with_retry(
+    fn: Callable,
+    is_retryable: Callable[[Exception], bool],
+    max_retries: int = 5,
+    before_attempt: Callable[[], object] = None,
+    retry_after: Callable[[Exception], float | None] = None,
+    on_retry: Callable[[Exception], object] = None,
+):
+    """
+    Call fn(), retrying retryable failures with jittered exponential backoff.
+
+    Args:
+        fn: Zero-argument callable to run
+        is_retryable: Decides whether an exception is worth retrying
+        max_retries: Retries after the first attempt
+        before_attempt: Called before every attempt (e.g. TokenBucket.acquire)
+        retry_after: Extracts a server-requested delay from an exception
+        on_retry: Called with the exception before sleeping
+
+    Returns:
+        fn's result. The last exception is re-raised once retries run out.
+    """
+    attempt = 0
+    while True:
+        if before_attempt:
+            before_attempt()
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            if on_retry:
+                on_retry(e)
+            delay = backoff_delay(attempt)
+            requested = retry_after(e) if retry_after else None
+            if requested:
+                delay = max(delay, requested)
+            time.sleep(delay)
+            attempt += 1
@@ -7,19 +7,24 @@ Usage:
     python receive_order.py --json '{"property_address": "123 Main St...", ...}'
     python receive_order.py --test  # Create a test order
 
-Returns JSON with order_id and status.
+    # Bulk intake: one order per line (NDJSON) or per row (CSV with a header)
+    python receive_order.py --bulk portfolio.ndjson
+    python receive_order.py --bulk portfolio.csv
+    cat portfolio.ndjson | python receive_order.py --bulk - --format ndjson
+
+Returns JSON with order_id and status (bulk: a result per record).
 """
 from __future__ import annotations
 
 import argparse
+import csv
+import io
 import json
 import sys
 import os
 import re
 from pathlib import Path
 from datetime import datetime
-import random
-import string
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -27,8 +32,9 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from appraisal.sheets_utils import (
-    ORDERS_SHEET_ID, append_row, ORDERS_COLUMNS
+    ORDERS_SHEET_ID, append_row, WriteBatch, ORDERS_COLUMNS
 )
+from appraisal.ids import new_order_id
 
 # Required fields for a valid order
 REQUIRED_FIELDS = [
@@ -38,6 +44,13 @@ REQUIRED_FIELDS = [
     'contact_email',
 ]
 
+# Fields that must be text when given (JSON can carry numbers, lists or objects)
+TEXT_FIELDS = [
+    'property_address', 'property_city', 'property_state', 'property_type',
+    'loan_purpose', 'scope', 'urgency', 'client_id', 'contact_name',
+    'contact_email', 'special_instructions',
+]
+
 # Valid property types
 VALID_PROPERTY_TYPES = [
     'Office', 'Retail', 'Industrial', 'Multifamily',
@@ -52,10 +65,8 @@ VALID_SCOPE = ['Full Appraisal', 'Limited Appraisal', 'Evaluation']
 
 
 def generate_order_id() -> str:
-    """Generate unique order ID: ORD-YYYY-XXXXX"""
-    year = datetime.now().year
-    random_part = ''.join(random.choices(string.digits, k=5))
-    return f"ORD-{year}-{random_part}"
+    """Generate a unique, time-ordered order ID: ORD-YYYY-<16 chars> (see ids.py)."""
+    return new_order_id()
 
 
 def parse_address(address: str) -> dict:
@@ -81,6 +92,14 @@ def validate_order(data: dict) -> tuple[bool, list[str]]:
     """Validate order data. Returns (is_valid, error_messages)."""
     errors = []
 
+    # The checks below (and build_order) assume text
+    for field in TEXT_FIELDS:
+        value = data.get(field)
+        if value is not None and not isinstance(value, str):
+            errors.append(f"Invalid {field}: expected text, got {type(value).__name__}")
+    if errors:
+        return (False, errors)
+
     # Check required fields
     for field in REQUIRED_FIELDS:
         if not data.get(field):
@@ -109,25 +128,13 @@ def validate_order(data: dict) -> tuple[bool, list[str]]:
     return (len(errors) == 0, errors)
 
 
-def create_order(data: dict) -> dict:
-    """Create and log a new order. Returns order data with ID."""
-
-    # Validate
-    is_valid, errors = validate_order(data)
-    if not is_valid:
-        return {
-            'success': False,
-            'errors': errors
-        }
-
-    # Generate order ID
-    order_id = generate_order_id()
+def build_order(data: dict, order_id: str) -> dict:
+    """Build the Orders row for validated order data."""
 
     # Parse address for city/state
     address_parts = parse_address(data.get('property_address', ''))
 
-    # Build order record
-    order = {
+    return {
         'order_id': order_id,
         'status': 'pending',
         'property_address': data.get('property_address', ''),
@@ -152,6 +159,21 @@ def create_order(data: dict) -> dict:
         'delivered_at': ''
     }
 
+
+def create_order(data: dict) -> dict:
+    """Create and log a new order. Returns order data with ID."""
+
+    # Validate
+    is_valid, errors = validate_order(data)
+    if not is_valid:
+        return {
+            'success': False,
+            'errors': errors
+        }
+
+    order = build_order(data, generate_order_id())
+    order_id = order['order_id']
+
     # Check if sheet ID is configured
     if not ORDERS_SHEET_ID:
         return {
@@ -177,6 +199,104 @@ def create_order(data: dict) -> dict:
     }
 
 
+# ── Bulk intake ───────────────────────────────────────────────────────────────
+
+def parse_bulk(text: str, fmt: str = 'ndjson') -> list[tuple[int, dict | None, str | None]]:
+    """
+    Parse a bulk submission into (line, data, error) per record.
+
+    NDJSON has one JSON object per line (blank lines are skipped); CSV has a
+    header row naming the order fields, and empty cells count as not given.
+    A record that can't be parsed gets data None and an error.
+    """
+    records = []
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        for row in reader:
+            data = {
+                k.strip(): v.strip() for k, v in row.items()
+                if k and isinstance(v, str) and v.strip()
+            }
+            if data:
+                records.append((reader.line_num, data, None))
+        return records
+
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            records.append((line_number, None, f'Invalid JSON: {e}'))
+            continue
+        if not isinstance(data, dict):
+            records.append((line_number, None, 'Expected a JSON object'))
+            continue
+        records.append((line_number, data, None))
+    return records
+
+
+def create_orders(records: list[tuple[int, dict | None, str | None]]) -> dict:
+    """
+    Validate many orders in one pass and log every valid one in a single
+    batched write. Invalid records are reported and skipped; they don't
+    hold back the rest.
+
+    Args:
+        records: (line, data, parse_error) tuples, as from parse_bulk
+
+    Returns:
+        Dict with accepted/rejected counts and a result per record, in order
+    """
+    if not ORDERS_SHEET_ID:
+        return {
+            'success': False,
+            'errors': ['APPRAISAL_ORDERS_SHEET_ID not configured in .env']
+        }
+
+    results = []
+    accepted = []
+    for line, data, parse_error in records:
+        result = {'line': line}
+        if parse_error:
+            errors = [parse_error]
+        else:
+            errors = validate_order(data)[1]
+        if errors:
+            result.update(success=False, errors=errors)
+        else:
+            accepted.append((result, data))
+        results.append(result)
+
+    write_errors = []
+    if accepted:
+        batch = WriteBatch()
+        for result, data in accepted:
+            result['order'] = build_order(data, generate_order_id())
+            batch.append_row(ORDERS_SHEET_ID, 'Orders', result['order'], ORDERS_COLUMNS)
+
+        for (result, _), write in zip(accepted, batch.flush()):
+            if write['status'] == 'written':
+                result.update(success=True, order_id=result['order']['order_id'])
+            else:
+                result.update(success=False, errors=[f"Failed to log order: {write.get('error')}"])
+                if not write_errors:
+                    write_errors.append(f"Failed to log orders: {write.get('error')}")
+
+    created = sum(1 for r in results if r['success'])
+    summary = {
+        'success': created == len(results) and not write_errors,
+        'received': len(results),
+        'created': created,
+        'rejected': len(results) - created,
+        'order_ids': [r['order_id'] for r in results if r['success']],
+        'results': results,
+    }
+    if write_errors:
+        summary['errors'] = write_errors
+    return summary
+
+
 def get_test_order() -> dict:
     """Return sample order data for testing."""
     return {
@@ -210,9 +330,40 @@ def main():
         action="store_true",
         help="Create a test order with sample data"
     )
+    parser.add_argument(
+        "--bulk",
+        metavar="FILE",
+        help="Create many orders from an NDJSON or CSV file ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--format",
+        choices=['ndjson', 'csv'],
+        help="Bulk file format (default: from the file extension, else ndjson)"
+    )
 
     args = parser.parse_args()
 
+    if args.bulk:
+        fmt = args.format or ('csv' if args.bulk.lower().endswith('.csv') else 'ndjson')
+        if args.bulk == '-':
+            text = sys.stdin.read()
+        else:
+            with open(args.bulk, 'r', newline='') as f:
+                text = f.read()
+
+        result = create_orders(parse_bulk(text, fmt))
+        print(json.dumps(result, indent=2))
+
+        if result.get('success'):
+            print(f"\n✓ Created {result['created']} orders", file=sys.stderr)
+            sys.exit(0)
+        elif 'received' in result:
+            print(f"\n✗ Created {result['created']} of {result['received']} orders, "
+                  f"{result['rejected']} rejected", file=sys.stderr)
+        else:
+            print(f"\n✗ Bulk intake failed: {result['errors']}", file=sys.stderr)
+        sys.exit(1)
+
     # Get order data
     if args.test:
         data = get_test_order()
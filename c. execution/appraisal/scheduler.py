@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Deadline scheduler: advances orders when their deadlines pass.
+
+send_rfp gives appraisers until quotes_deadline (48 hours) to quote, and
+the summary email tells the client the recommended appraiser is engaged
+if they don't answer within APPRAISAL_CLIENT_RESPONSE_HOURS (24). The
+scheduler holds a timer for each deadline and fires the transition when
+it passes:
+
+    quotes_due     Quotes in: send the client the summary, then schedule
+                   auto_engage. None yet: check again after
+                   APPRAISAL_NO_QUOTES_RECHECK_HOURS.
+    auto_engage    Client hasn't chosen: engage_appraiser(auto=True).
+
+A timer whose order has moved on (engaged by hand, cancelled, archived)
+fires as a no-op.
+
+Timers live in a SQLite table indexed on (status, due_at). That index is
+the priority queue: scheduling, cancelling and finding the next deadline
+are O(log n) B-tree operations however many orders are open, and it is on
+disk, so pending timers survive restarts. The worker sleeps until the
+earliest deadline (or until a timer is scheduled in-process), then claims
+what is due. Claims are leased like outbox messages, so two workers never
+fire the same timer and a worker that dies mid-fire is covered by the
+next one. Failed transitions are retried with backoff, then marked failed.
+
+send_rfp schedules quotes_due as it marks an order rfp_sent. --sync adds
+timers for open orders that have none (orders from before the scheduler,
+or edited by hand in the sheet).
+
+Usage:
+    python scheduler.py --worker               # Fire timers as they come due
+    python scheduler.py --run-due              # Fire what is due now, then exit (cron)
+    python scheduler.py --sync                 # Schedule timers for open orders missing one
+    python scheduler.py --status               # Timer counts and the next deadline
+    python scheduler.py --list [ORDER_ID]      # Pending timers (of one order)
+    python scheduler.py --cancel ORDER_ID      # Drop an order's pending timers
+
+Environment:
+    APPRAISAL_SCHEDULER_PATH=.tmp/scheduler.db  # Default: the SQLite storage database
+                                                # with that backend, else this path
+    APPRAISAL_CLIENT_RESPONSE_HOURS=24          # Summary -> auto-engage
+    APPRAISAL_NO_QUOTES_RECHECK_HOURS=24        # Deadline passed without quotes
+    APPRAISAL_AUTO_ENGAGE=true                  # false: only send summaries
+    SCHEDULER_POLL=30                           # Max seconds between checks for
+                                                # timers scheduled by other processes
+    SCHEDULER_MAX_ATTEMPTS=5
+    SCHEDULER_RETRY_BASE=60                     # Seconds before the first retry
+    SCHEDULER_LEASE=600                         # Seconds a claimed timer is held
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.rate_limit import backoff_delay
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_SCHEDULER_PATH = REPO_ROOT / '.tmp' / 'scheduler.db'
+
+SCHEDULER_PATH = os.getenv('APPRAISAL_SCHEDULER_PATH')
+CLIENT_RESPONSE_HOURS = float(os.getenv('APPRAISAL_CLIENT_RESPONSE_HOURS', 24))
+NO_QUOTES_RECHECK_HOURS = float(os.getenv('APPRAISAL_NO_QUOTES_RECHECK_HOURS', 24))
+AUTO_ENGAGE = os.getenv('APPRAISAL_AUTO_ENGAGE', 'true').lower() != 'false'
+SCHEDULER_POLL = float(os.getenv('SCHEDULER_POLL', 30))
+SCHEDULER_MAX_ATTEMPTS = int(os.getenv('SCHEDULER_MAX_ATTEMPTS', 5))
+SCHEDULER_RETRY_BASE = float(os.getenv('SCHEDULER_RETRY_BASE', 60))
+SCHEDULER_LEASE = float(os.getenv('SCHEDULER_LEASE', 600))
+
+# Order statuses still waiting on quotes or on the client's choice
+OPEN_STATUSES = ('rfp_sent', 'quotes_received')
+
+SCHEDULER_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS _timers (
+        id INTEGER PRIMARY KEY,
+        order_id TEXT NOT NULL,
+        event TEXT NOT NULL,
+        due_at REAL NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        outcome TEXT,
+        created_at TEXT NOT NULL,
+        fired_at TEXT,
+        UNIQUE (order_id, event)
+    );
+    CREATE INDEX IF NOT EXISTS ix__timers_due ON _timers (status, due_at);
+'''
+
+
+def _timestamp(value: str) -> float | None:
+    """Epoch seconds of an ISO date/time from the sheet, or None."""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class Scheduler:
+    """SQLite-backed timer queue. Safe to share between threads and processes."""
+
+    def __init__(self, path: str | Path = DEFAULT_SCHEDULER_PATH):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEDULER_SCHEMA)
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+
+    def _write(self, fn):
+        """Run fn(conn) in one write transaction."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def schedule(self, order_id: str, event: str, due_at: float, replace: bool = True) -> bool:
+        """
+        Set an order's timer for `event` to fire at `due_at` (epoch seconds).
+
+        An order has at most one timer per event: by default a new one
+        replaces it (a fresh RFP round moves the deadline). With
+        replace=False an existing timer - pending or already fired - is
+        kept. Returns whether the timer was set.
+        """
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        cursor = self._write(lambda conn: conn.execute(
+            f'{verb} INTO _timers (order_id, event, due_at, created_at) VALUES (?, ?, ?, ?)',
+            (order_id, event, due_at, datetime.now().isoformat())
+        ))
+        self.wake()
+        return cursor.rowcount > 0
+
+    def cancel(self, order_id: str, event: str = None) -> int:
+        """Cancel an order's pending timers (one event, or all). Returns how many."""
+        sql = "UPDATE _timers SET status = 'cancelled' WHERE order_id = ? AND status IN ('pending', 'firing')"
+        params = [order_id]
+        if event:
+            sql += ' AND event = ?'
+            params.append(event)
+        return self._write(lambda conn: conn.execute(sql, params)).rowcount
+
+    def next_due(self) -> float | None:
+        """When the earliest pending timer (or expiring claim) is due, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(due_at) FROM _timers WHERE status IN ('pending', 'firing')"
+            ).fetchone()
+        return row[0]
+
+    def claim(self, limit: int = 50) -> list[dict]:
+        """Lease up to `limit` due timers, earliest first."""
+        def claim_due(conn):
+            now = time.time()
+            rows = conn.execute(
+                "SELECT id, order_id, event, due_at, attempts FROM _timers "
+                "WHERE status IN ('pending', 'firing') AND due_at <= ? "
+                "ORDER BY due_at, id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE _timers SET status = 'firing', attempts = attempts + 1, due_at = ? WHERE id = ?",
+                [(now + SCHEDULER_LEASE, row[0]) for row in rows]
+            )
+            return [
+                {'id': r[0], 'order_id': r[1], 'event': r[2], 'due_at': r[3], 'attempts': r[4] + 1}
+                for r in rows
+            ]
+        return self._write(claim_due)
+
+    def record(self, timer: dict, outcome: dict = None, error: Exception = None):
+        """Record a claimed timer's outcome: done, or retried/failed on error."""
+        def apply(conn):
+            # A timer replaced while it was firing has a new id - leave that one be
+            if error is None:
+                conn.execute(
+                    "UPDATE _timers SET status = 'done', fired_at = ?, outcome = ?, last_error = NULL "
+                    "WHERE id = ? AND status = 'firing'",
+                    (datetime.now().isoformat(), json.dumps(outcome, default=str)[:2000], timer['id'])
+                )
+            elif timer['attempts'] >= SCHEDULER_MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE _timers SET status = 'failed', last_error = ? WHERE id = ? AND status = 'firing'",
+                    (str(error), timer['id'])
+                )
+            else:
+                delay = backoff_delay(timer['attempts'] - 1, base=SCHEDULER_RETRY_BASE, cap=3600.0)
+                conn.execute(
+                    "UPDATE _timers SET status = 'pending', due_at = ?, last_error = ? "
+                    "WHERE id = ? AND status = 'firing'",
+                    (time.time() + delay, str(error), timer['id'])
+                )
+        self._write(apply)
+
+    def run_due(self, limit: int = 50) -> dict:
+        """Fire every timer that is due now, batch by batch."""
+        counts = {'fired': 0, 'failed': 0}
+        while True:
+            claimed = self.claim(limit)
+            for timer in claimed:
+                try:
+                    outcome = fire(timer, self)
+                except Exception as e:
+                    print(f"Warning: {timer['event']} for {timer['order_id']} failed: {e}", file=sys.stderr)
+                    self.record(timer, error=e)
+                    counts['failed'] += 1
+                else:
+                    self.record(timer, outcome)
+                    counts['fired'] += 1
+            if len(claimed) < limit:
+                return counts
+
+    def wake(self):
+        """Make a waiting run() re-check the next deadline now."""
+        self._wake.set()
+
+    def run(self, stop: threading.Event = None, poll_interval: float = SCHEDULER_POLL):
+        """
+        Fire timers until `stop` is set. Sleeps until the next deadline, at
+        most poll_interval (timers from other processes don't wake it).
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"Warning: scheduler run failed: {e}", file=sys.stderr)
+            next_due = self.next_due()
+            wait = poll_interval if next_due is None else min(poll_interval, max(0.0, next_due - time.time()))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def status(self) -> dict:
+        """Timer counts by status, and the next deadline."""
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM _timers GROUP BY status').fetchall()
+        next_due = self.next_due()
+        return {
+            'counts': dict(rows),
+            'next_due': datetime.fromtimestamp(next_due).isoformat() if next_due else None,
+        }
+
+    def pending(self, order_id: str = None, limit: int = 100) -> list[dict]:
+        """Pending timers, earliest first."""
+        sql = ("SELECT id, order_id, event, due_at, status, attempts, last_error FROM _timers "
+               "WHERE status IN ('pending', 'firing')")
+        params = []
+        if order_id:
+            sql += ' AND order_id = ?'
+            params.append(order_id)
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY due_at, id LIMIT ?', params + [limit]).fetchall()
+        return [
+            {'id': r[0], 'order_id': r[1], 'event': r[2], 'due_at': datetime.fromtimestamp(r[3]).isoformat(),
+             'status': r[4], 'attempts': r[5], 'last_error': r[6]}
+            for r in rows
+        ]
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """
+    Get the process-wide scheduler: in APPRAISAL_SCHEDULER_PATH when set,
+    otherwise in the SQLite storage database when that backend is in use,
+    otherwise in .tmp/scheduler.db.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from appraisal.storage import get_backend, resolve_data_path
+            if SCHEDULER_PATH:
+                path = resolve_data_path(SCHEDULER_PATH, DEFAULT_SCHEDULER_PATH)
+            else:
+                backend = get_backend()
+                path = backend.path if backend.name == 'sqlite' else DEFAULT_SCHEDULER_PATH
+            _scheduler = Scheduler(path)
+        return _scheduler
+
+
+# ── Transitions ──
+
+def fire(timer: dict, scheduler: Scheduler) -> dict:
+    """Run the transition a due timer stands for. Raises to have it retried."""
+    # The workflow steps load on first fire, not with the scheduler
+    from appraisal.pipeline import load_award_context, load_checkpoint, _complete
+    from appraisal.collect_quotes import send_summary_to_client
+    from appraisal.send_engagement import engage_appraiser
+
+    order_id = timer['order_id']
+    order_result, quotes = load_award_context(order_id)
+    if not order_result:
+        return {'action': 'none', 'reason': 'order not found (archived or removed)'}
+    status = order_result[1].get('status')
+    if status not in OPEN_STATUSES:
+        return {'action': 'none', 'reason': f'order is {status}'}
+
+    if timer['event'] == 'quotes_due':
+        if not quotes:
+            scheduler.schedule(order_id, 'quotes_due', time.time() + NO_QUOTES_RECHECK_HOURS * 3600)
+            return {'action': 'recheck', 'reason': 'no quotes yet'}
+        # Recorded as pipeline --award's summary step, so neither sends it twice
+        checkpoint = load_checkpoint(order_id) or {'order_id': order_id, 'phase': 'award', 'steps': {}}
+        if 'summary' in checkpoint['steps']:
+            result = {'action': 'none', 'reason': 'summary already sent'}
+        else:
+            sent = send_summary_to_client(order_id, order_result=order_result, quotes=quotes)
+            if not sent.get('success'):
+                raise RuntimeError(f"Summary not sent: {sent.get('errors')}")
+            _complete(checkpoint, 'summary', dry_run=False)
+            result = {'action': 'summary_sent', 'quote_count': len(quotes)}
+        if AUTO_ENGAGE:
+            scheduler.schedule(order_id, 'auto_engage', time.time() + CLIENT_RESPONSE_HOURS * 3600)
+        return result
+
+    if timer['event'] == 'auto_engage':
+        if not AUTO_ENGAGE:
+            return {'action': 'none', 'reason': 'auto-engagement is off'}
+        if not quotes:
+            return {'action': 'none', 'reason': 'no quotes'}
+        engaged = engage_appraiser(order_id, auto=True, order_result=order_result, quotes=quotes)
+        if not engaged.get('success'):
+            raise RuntimeError(f"Engagement failed: {engaged.get('errors')}")
+        return {'action': 'engaged', 'appraiser': engaged.get('engaged_appraiser'), 'fee': engaged.get('fee')}
+
+    return {'action': 'none', 'reason': f"unknown event {timer['event']}"}
+
+
+def schedule_quotes_deadline(order: dict):
+    """Schedule quotes_due for an order just marked rfp_sent (called by send_rfp)."""
+    due_at = _timestamp(order.get('quotes_deadline'))
+    if due_at is not None:
+        get_scheduler().schedule(order['order_id'], 'quotes_due', due_at)
+
+
+def sync_from_orders() -> dict:
+    """Schedule quotes_due for open orders that have no timer yet."""
+    from appraisal.sheets_utils import ORDERS_SHEET_ID, ReadBatch
+
+    reads = ReadBatch()
+    reads.rows(ORDERS_SHEET_ID, 'Orders', columns=['order_id', 'status', 'quotes_deadline'])
+    orders = reads.load()[0]
+
+    scheduler = get_scheduler()
+    added = 0
+    for order in orders:
+        due_at = _timestamp(order.get('quotes_deadline'))
+        if order.get('status') in OPEN_STATUSES and order.get('order_id') and due_at is not None:
+            added += scheduler.schedule(order['order_id'], 'quotes_due', due_at, replace=False)
+    return {'success': True, 'open_orders': sum(o.get('status') in OPEN_STATUSES for o in orders), 'scheduled': added}
+
+
+def start_worker(poll_interval: float = SCHEDULER_POLL) -> tuple[threading.Thread, threading.Event]:
+    """Fire timers on a daemon thread. Set the returned event to stop it."""
+    scheduler = get_scheduler()
+
+    class _Stop(threading.Event):
+        def set(self):
+            super().set()
+            scheduler.wake()
+
+    stop = _Stop()
+    thread = threading.Thread(
+        target=scheduler.run,
+        kwargs={'stop': stop, 'poll_interval': poll_interval},
+        name='scheduler-worker',
+        daemon=True
+    )
+    thread.start()
+    return thread, stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fire appraisal order deadlines")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--worker", action="store_true", help="Fire timers as they come due")
+    action.add_argument("--run-due", action="store_true", help="Fire what is due now, then exit")
+    action.add_argument("--sync", action="store_true", help="Schedule timers for open orders missing one")
+    action.add_argument("--status", action="store_true", help="Timer counts and the next deadline")
+    action.add_argument("--list", nargs="?", const="", metavar="ORDER_ID", help="Pending timers")
+    action.add_argument("--cancel", metavar="ORDER_ID", help="Cancel an order's pending timers")
+    parser.add_argument("--poll", type=float, default=SCHEDULER_POLL, help="Worker poll interval in seconds")
+    args = parser.parse_args()
+
+    scheduler = get_scheduler()
+
+    if args.worker:
+        print(f"✓ Scheduler running ({scheduler.path})", file=sys.stderr)
+        try:
+            scheduler.run(poll_interval=args.poll)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.run_due:
+        result = {'success': True, **scheduler.run_due()}
+    elif args.sync:
+        result = sync_from_orders()
+    elif args.status:
+        result = {'success': True, **scheduler.status()}
+    elif args.list is not None:
+        result = {'success': True, 'timers': scheduler.pending(args.list or None)}
+    else:
+        result = {'success': True, 'cancelled': scheduler.cancel(args.cancel)}
+
+    print(json.dumps(result, indent=2))
+
+    if args.run_due:
+        print(f"\n✓ Fired {result['fired']} timer(s), {result['failed']} failed", file=sys.stderr)
+    elif args.sync:
+        print(f"\n✓ Scheduled {result['scheduled']} of {result['open_orders']} open order(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
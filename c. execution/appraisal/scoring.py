@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Scoring engine for ranking appraisers and quotes.
+
+Scores are computed for every candidate in one vectorized pass over numeric
+arrays, and only the best k are selected (partial selection, not a full
+sort). Lower scores are better. Ties keep panel/submission order, exactly
+as a stable sort would.
+
+numpy is used when installed; otherwise the same arithmetic runs in plain
+Python with heapq for the top-k selection. It is imported on first use, so
+steps that never score (recording a quote, mailing chosen appraisers)
+don't pay for it at startup.
+
+Weights:
+    Appraiser score = quality    * (5 - quality_score)
+                    + turnaround * avg_turnaround_days
+                    + workload   * (current_workload / capacity)
+                    + fee        * (avg_fee / 1000)
+
+    Quote score     = fee        * (fee / 500)
+                    + turnaround * turnaround_days
+                    + quality    * (5 - quality_score)
+
+Defaults reproduce the original ranking. Override them per client with a
+JSON object in the environment, following the CLIENT_PANEL_<client_id>
+convention:
+    APPRAISER_WEIGHTS_BANK_001={"fee": 2.0}
+    QUOTE_WEIGHTS_BANK_001={"turnaround": 1.0}
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import os
+
+_numpy = None
+_numpy_checked = False
+
+
+def numpy_or_none():
+    """numpy, imported on first call, or None if it isn't installed."""
+    global _numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = None
+        _numpy_checked = True
+    return _numpy
+
+
+DEFAULT_APPRAISER_WEIGHTS = {'quality': 10.0, 'turnaround': 0.5, 'workload': 5.0, 'fee': 1.0}
+DEFAULT_QUOTE_WEIGHTS = {'fee': 1.0, 'turnaround': 0.5, 'quality': 3.0}
+
+
+def get_client_weights(client_id: str = None, kind: str = 'appraiser') -> dict:
+    """
+    Get scoring weights for a client, falling back to the defaults.
+
+    Args:
+        client_id: Client ID (e.g. BANK-001); None for the defaults
+        kind: 'appraiser' or 'quote'
+    """
+    weights = dict(DEFAULT_APPRAISER_WEIGHTS if kind == 'appraiser' else DEFAULT_QUOTE_WEIGHTS)
+    if client_id:
+        env_key = f"{kind.upper()}_WEIGHTS_{client_id.upper().replace('-', '_')}"
+        override = os.getenv(env_key)
+        if override:
+            try:
+                weights.update({k: float(v) for k, v in json.loads(override).items() if k in weights})
+            except (ValueError, TypeError, AttributeError):
+                pass  # Malformed override - keep defaults
+    return weights
+
+
+def appraiser_scores(quality, turnaround, workload, capacity, fee, weights: dict = None):
+    """Composite appraiser scores for parallel sequences of panel fields."""
+    w = weights or DEFAULT_APPRAISER_WEIGHTS
+
+    np = numpy_or_none()
+    if np is not None:
+        quality, turnaround, workload, capacity, fee = (
+            np.asarray(v, dtype=float) for v in (quality, turnaround, workload, capacity, fee)
+        )
+        ratio = np.divide(workload, capacity, out=np.zeros_like(workload), where=capacity > 0)
+        return (
+            (5 - quality) * w['quality']
+            + turnaround * w['turnaround']
+            + ratio * w['workload']
+            + (fee / 1000) * w['fee']
+        )
+
+    return [
+        (5 - q) * w['quality']
+        + t * w['turnaround']
+        + ((wl / c) if c > 0 else 0) * w['workload']
+        + (f / 1000) * w['fee']
+        for q, t, wl, c, f in zip(quality, turnaround, workload, capacity, fee)
+    ]
+
+
+def quote_scores(fee, turnaround, quality, weights: dict = None):
+    """Composite quote scores for parallel sequences of quote fields."""
+    w = weights or DEFAULT_QUOTE_WEIGHTS
+
+    np = numpy_or_none()
+    if np is not None:
+        fee, turnaround, quality = (np.asarray(v, dtype=float) for v in (fee, turnaround, quality))
+        return (
+            (fee / 500) * w['fee']
+            + turnaround * w['turnaround']
+            + (5 - quality) * w['quality']
+        )
+
+    return [
+        (f / 500) * w['fee'] + t * w['turnaround'] + (5 - q) * w['quality']
+        for f, t, q in zip(fee, turnaround, quality)
+    ]
+
+
+def top_k(scores, k: int = None) -> list[int]:
+    """
+    Positions of the k lowest scores, best first (all of them if k is None).
+
+    Equal scores keep their original order, so the result matches a stable
+    sort truncated to k - without sorting everything.
+    """
+    n = len(scores)
+    if k is None or k >= n:
+        k = n
+    if k <= 0:
+        return []
+
+    np = numpy_or_none()
+    if np is not None:
+        scores = np.asarray(scores, dtype=float)
+        if k == n:
+            return np.argsort(scores, kind='stable').tolist()
+        kth = np.partition(scores, k - 1)[k - 1]
+        below = np.flatnonzero(scores < kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(below)]
+        chosen = np.concatenate([below, ties])
+        return chosen[np.argsort(scores[chosen], kind='stable')].tolist()
+
+    return heapq.nsmallest(k, range(n), key=lambda i: (scores[i], i))
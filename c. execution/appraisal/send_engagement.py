@@ -17,12 +17,8 @@ from __future__ import annotations
 import argparse
 import json
 import sys
-import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -31,136 +27,32 @@ load_dotenv()
 
 from appraisal.sheets_utils import (
     ORDERS_SHEET_ID, QUOTES_SHEET_ID,
-    read_sheet, find_row_by_id, update_row,
+    find_row_by_id, WriteBatch,
     ORDERS_COLUMNS, QUOTES_COLUMNS
 )
 from appraisal.collect_quotes import get_quotes_for_order, rank_quotes
+from appraisal.scoring import get_client_weights
+from appraisal.business_calendar import get_calendar
+from appraisal.mail_transport import get_smtp_config, send_email, send_emails
+from appraisal.outbox import outbox_enabled
+from appraisal.email_templates import engagement_email, decline_emails
 
 
-def get_smtp_config() -> dict:
-    """Get SMTP configuration."""
-    return {
-        'host': os.getenv('SMTP_HOST'),
-        'port': int(os.getenv('SMTP_PORT', 587)),
-        'user': os.getenv('SMTP_USER'),
-        'password': os.getenv('SMTP_PASSWORD'),
-        'from_name': os.getenv('SENDER_NAME', 'Appraisal Order Desk')
-    }
-
-
-def send_email(to_email: str, subject: str, body: str, smtp_config: dict) -> bool:
-    """Send email via SMTP."""
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = f"{smtp_config['from_name']} <{smtp_config['user']}>"
-    msg['To'] = to_email
-    msg.attach(MIMEText(body, 'plain'))
-
-    with smtplib.SMTP(smtp_config['host'], smtp_config['port']) as server:
-        server.starttls()
-        server.login(smtp_config['user'], smtp_config['password'])
-        server.send_message(msg)
-
-    return True
-
-
-def calculate_due_date(turnaround_days: int) -> str:
-    """Calculate due date based on turnaround days (business days)."""
-    due = datetime.now()
-    days_added = 0
-
-    while days_added < turnaround_days:
-        due += timedelta(days=1)
-        # Skip weekends
-        if due.weekday() < 5:
-            days_added += 1
-
-    return due.strftime('%Y-%m-%d')
+def calculate_due_date(turnaround_days: int, client_id: str = None, state: str = None) -> str:
+    """Calculate due date based on turnaround days (business days, skipping the client's and state's holidays)."""
+    calendar = get_calendar(client_id or None, state.upper() if state else None)
+    return calendar.add_business_days(date.today(), turnaround_days).strftime('%Y-%m-%d')
 
 
 def get_engagement_email(order: dict, quote: dict, due_date: str) -> tuple[str, str]:
-    """Generate engagement letter email content."""
-
-    company = os.getenv('COMPANY_NAME', 'Appraisal Management')
-
-    subject = f"Engagement Confirmation - Order #{order.get('order_id')} - {order.get('property_address', '')[:40]}"
-
-    body = f"""Dear {quote.get('appraiser_name', 'Appraiser')},
-
-Congratulations! You have been selected for the following appraisal assignment.
-
-ENGAGEMENT DETAILS
-═══════════════════════════════════════════════════════════════════════════
-
-Order Number:      {order.get('order_id')}
-Property Address:  {order.get('property_address')}
-Property Type:     {order.get('property_type')}
-Scope of Work:     {order.get('scope', 'Full Appraisal')}
-
-AGREED TERMS
-─────────────────────────────────
-Fee:               ${float(quote.get('fee', 0)):,.2f}
-Due Date:          {due_date}
-Turnaround:        {quote.get('turnaround_days')} business days
-
-LOAN INFORMATION
-─────────────────────────────────
-Loan Amount:       ${float(order.get('loan_amount', 0)):,.0f}
-Loan Purpose:      {order.get('loan_purpose', 'N/A')}
-
-CLIENT CONTACT
-─────────────────────────────────
-Name:              {order.get('contact_name', 'N/A')}
-Email:             {order.get('contact_email', 'N/A')}
-
-{f"SPECIAL INSTRUCTIONS{chr(10)}─────────────────────────────────{chr(10)}{order.get('special_instructions')}{chr(10)}" if order.get('special_instructions') else ""}
-NEXT STEPS
-─────────────────────────────────
-1. Please REPLY to confirm acceptance of this assignment
-2. Schedule property inspection
-3. Submit completed report by {due_date}
-
-DELIVERY REQUIREMENTS
-─────────────────────────────────
-• PDF format required
-• XML/MISMO format if available
-• Email completed report to this address
-
-If you have any questions or need to discuss the assignment, please
-contact us immediately.
-
-Best regards,
-{company} Order Desk
-{os.getenv('COMPANY_EMAIL', '')}
-"""
-
+    """Generate engagement letter email content (templates/engagement.*)."""
+    subject, body, _ = engagement_email(order, quote, due_date)
     return subject, body
 
 
 def get_decline_email(order: dict, quote: dict) -> tuple[str, str]:
-    """Generate decline notification email content."""
-
-    company = os.getenv('COMPANY_NAME', 'Appraisal Management')
-
-    subject = f"Quote Update - Order #{order.get('order_id')}"
-
-    body = f"""Dear {quote.get('appraiser_name', 'Appraiser')},
-
-Thank you for submitting your quote for the appraisal assignment:
-
-Order #{order.get('order_id')}
-Property: {order.get('property_address')}
-
-We appreciate your prompt response. However, we have selected another
-appraiser for this particular assignment.
-
-We value our relationship with you and look forward to working together
-on future opportunities.
-
-Best regards,
-{company} Order Desk
-"""
-
+    """Generate decline notification email content (templates/decline.*)."""
+    subject, body, _ = decline_emails(order, [quote])[0]
     return subject, body
 
 
@@ -168,7 +60,9 @@ def engage_appraiser(
     order_id: str,
     quote_id: str = None,
     auto: bool = False,
-    dry_run: bool = False
+    dry_run: bool = False,
+    order_result: tuple[int, dict] = None,
+    quotes: list[dict] = None
 ) -> dict:
     """
     Engage an appraiser for an order.
@@ -178,13 +72,15 @@ def engage_appraiser(
         quote_id: Specific quote ID to accept
         auto: Auto-select recommended appraiser
         dry_run: Preview without sending
+        order_result: (row_index, order) if the caller already has it (not re-read)
+        quotes: The order's quotes if the caller already has them
 
     Returns:
         Dict with results
     """
 
     # Get order
-    order_result = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+    order_result = order_result or find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
     if not order_result:
         return {
             'success': False,
@@ -194,7 +90,8 @@ def engage_appraiser(
     order_row_index, order = order_result
 
     # Get quotes
-    quotes = get_quotes_for_order(order_id)
+    if quotes is None:
+        quotes = get_quotes_for_order(order_id)
     if not quotes:
         return {
             'success': False,
@@ -215,7 +112,7 @@ def engage_appraiser(
                 'errors': [f'Quote not found: {quote_id}']
             }
     elif auto:
-        ranked = rank_quotes(quotes)
+        ranked = rank_quotes(quotes, get_client_weights(order.get('client_id'), 'quote'), limit=1)
         selected_quote = ranked[0]
     else:
         return {
@@ -225,13 +122,17 @@ def engage_appraiser(
 
     # Calculate due date
     turnaround = int(selected_quote.get('turnaround_days', 14))
-    due_date = calculate_due_date(turnaround)
+    due_date = calculate_due_date(turnaround, order.get('client_id'), order.get('property_state'))
 
     smtp_config = get_smtp_config()
     results = {'engagement': None, 'declines': []}
 
+    # With the outbox, emails are queued with the order update below
+    # instead of being sent here
+    queue = not dry_run and outbox_enabled()
+
     # Send engagement letter
-    eng_subject, eng_body = get_engagement_email(order, selected_quote, due_date)
+    eng_subject, eng_body, eng_html = engagement_email(order, selected_quote, due_date)
 
     if dry_run:
         results['engagement'] = {
@@ -239,13 +140,20 @@ def engage_appraiser(
             'subject': eng_subject,
             'status': 'dry_run'
         }
+    elif queue:
+        results['engagement'] = {
+            'to': selected_quote.get('appraiser_email'),
+            'appraiser_name': selected_quote.get('appraiser_name'),
+            'status': 'queued'
+        }
     else:
         try:
             send_email(
                 selected_quote.get('appraiser_email'),
                 eng_subject,
                 eng_body,
-                smtp_config
+                smtp_config,
+                html=eng_html
             )
             results['engagement'] = {
                 'to': selected_quote.get('appraiser_email'),
@@ -258,36 +166,26 @@ def engage_appraiser(
                 'errors': [f'Failed to send engagement email: {str(e)}']
             }
 
-    # Send decline notices to others
-    for q in quotes:
-        if q.get('quote_id') == selected_quote.get('quote_id'):
-            continue
-
-        dec_subject, dec_body = get_decline_email(order, q)
-
-        if dry_run:
-            results['declines'].append({
-                'to': q.get('appraiser_email'),
-                'appraiser_name': q.get('appraiser_name'),
-                'status': 'dry_run'
-            })
-        else:
-            try:
-                send_email(q.get('appraiser_email'), dec_subject, dec_body, smtp_config)
-                results['declines'].append({
-                    'to': q.get('appraiser_email'),
-                    'appraiser_name': q.get('appraiser_name'),
-                    'status': 'sent'
-                })
-            except Exception as e:
-                results['declines'].append({
-                    'to': q.get('appraiser_email'),
-                    'appraiser_name': q.get('appraiser_name'),
-                    'status': 'failed',
-                    'error': str(e)
-                })
-
-    # Update order
+    # Send decline notices to others, concurrently
+    declined = [q for q in quotes if q.get('quote_id') != selected_quote.get('quote_id')]
+    outgoing = []
+    for q, (dec_subject, dec_body, dec_html) in zip(declined, decline_emails(order, declined)):
+
+        results['declines'].append({
+            'to': q.get('appraiser_email'),
+            'appraiser_name': q.get('appraiser_name'),
+            'status': 'dry_run' if dry_run else 'queued' if queue else 'sent'
+        })
+        outgoing.append((q.get('appraiser_email'), dec_subject, dec_body, dec_html, q.get('quote_id')))
+
+    if not dry_run and not queue:
+        errors = send_emails([message[:4] for message in outgoing], smtp_config)
+        for decline, error in zip(results['declines'], errors):
+            if error is not None:
+                decline['status'] = 'failed'
+                decline['error'] = str(error)
+
+    # Update order and mark quote as selected in one write round-trip
     if not dry_run:
         order['status'] = 'engaged'
         order['engaged_appraiser_id'] = selected_quote.get('appraiser_id')
@@ -295,21 +193,46 @@ def engage_appraiser(
         order['engaged_fee'] = selected_quote.get('fee')
         order['due_date'] = due_date
 
+        batch = WriteBatch()
+        batch.update_row(ORDERS_SHEET_ID, 'Orders', order_row_index, order, ORDERS_COLUMNS)
+
         try:
-            update_row(ORDERS_SHEET_ID, 'Orders', order_row_index, order, ORDERS_COLUMNS)
-        except Exception as e:
-            results['warning'] = f'Emails sent but failed to update order: {str(e)}'
-
-        # Mark quote as selected
-        all_quotes = read_sheet(QUOTES_SHEET_ID, 'Quotes!A:Z')
-        for i, q in enumerate(all_quotes):
-            if q.get('quote_id') == selected_quote.get('quote_id'):
-                q['selected'] = 'TRUE'
-                try:
-                    update_row(QUOTES_SHEET_ID, 'Quotes', i + 2, q, QUOTES_COLUMNS)
-                except:
-                    pass
-                break
+            quote_result = find_row_by_id(QUOTES_SHEET_ID, 'Quotes', 'quote_id', selected_quote.get('quote_id'))
+        except Exception:
+            quote_result = None
+        if quote_result:
+            quote_row_index, q = quote_result
+            q['selected'] = 'TRUE'
+            batch.update_row(QUOTES_SHEET_ID, 'Quotes', quote_row_index, q, QUOTES_COLUMNS)
+
+        if queue:
+            engagement_position = batch.queue_email(
+                selected_quote.get('appraiser_email'), eng_subject, eng_body,
+                key=f"engagement:{order_id}:{selected_quote.get('quote_id')}",
+                html=eng_html
+            )
+            for to_email, dec_subject, dec_body, dec_html, declined_quote_id in outgoing:
+                batch.queue_email(
+                    to_email, dec_subject, dec_body,
+                    key=f"decline:{order_id}:{declined_quote_id}",
+                    html=dec_html
+                )
+
+        write_results = batch.flush()
+        if queue:
+            if write_results[0]['status'] != 'written':
+                return {
+                    'success': False,
+                    'errors': [f"Failed to update order: {write_results[0].get('error')}"]
+                }
+            queued = [results['engagement']] + results['declines']
+            for entry, write in zip(queued, write_results[engagement_position:]):
+                if write['status'] != 'written':
+                    entry['status'] = write['status']
+                if write.get('error'):
+                    entry['error'] = write['error']
+        elif write_results[0]['status'] != 'written':
+            results['warning'] = f"Emails sent but failed to update order: {write_results[0].get('error')}"
 
     return {
         'success': True,
@@ -14,10 +14,6 @@ from __future__ import annotations
 import argparse
 import json
 import sys
-import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -28,93 +24,88 @@ load_dotenv()
 
 from appraisal.sheets_utils import (
     ORDERS_SHEET_ID, PANEL_SHEET_ID,
-    read_sheet, find_row_by_id, update_row, ORDERS_COLUMNS
+    find_row_by_id, update_row, WriteBatch, ORDERS_COLUMNS
 )
-from appraisal.find_appraisers import find_appraisers_for_order
-
-
-def get_smtp_config() -> dict:
-    """Get SMTP configuration from environment."""
-    return {
-        'host': os.getenv('SMTP_HOST'),
-        'port': int(os.getenv('SMTP_PORT', 587)),
-        'user': os.getenv('SMTP_USER'),
-        'password': os.getenv('SMTP_PASSWORD'),
-        'from_name': os.getenv('SENDER_NAME', 'Appraisal Order Desk')
-    }
+from appraisal.panel_cache import get_panel
+from appraisal.mail_transport import get_smtp_config, send_emails
+from appraisal.outbox import outbox_enabled
+from appraisal.email_templates import rfp_emails
+from appraisal.scheduler import schedule_quotes_deadline
 
 
 def get_rfp_email_content(order: dict, appraiser: dict, deadline: str) -> tuple[str, str]:
     """
-    Generate RFP email subject and body.
+    Generate RFP email subject and body (templates/rfp.*).
 
     Returns:
         (subject, body) tuple
     """
-    company_name = os.getenv('COMPANY_NAME', 'Appraisal Management')
-
-    subject = f"Quote Request - {order.get('property_type', 'Commercial')} Appraisal - {order.get('property_city', '')}, {order.get('property_state', '')}"
-
-    body = f"""Dear {appraiser.get('name', 'Appraiser')},
-
-We have an appraisal assignment available and would like to request your fee and turnaround quote.
-
-ORDER DETAILS
-─────────────────────────────────
-Order #: {order.get('order_id', '')}
-Property: {order.get('property_address', '')}
-Type: {order.get('property_type', '')}
-Scope: {order.get('scope', 'Full Appraisal')}
-Urgency: {order.get('urgency', 'Standard')}
-
-LOAN INFORMATION
-─────────────────────────────────
-Loan Amount: ${int(float(order.get('loan_amount', 0) or 0)):,}
-Purpose: {order.get('loan_purpose', 'N/A')}
-
-QUOTE DEADLINE
-─────────────────────────────────
-Please submit your quote by: {deadline}
-
-TO SUBMIT YOUR QUOTE
-─────────────────────────────────
-Reply to this email with:
-• Your fee for this assignment
-• Your turnaround time (business days)
-• Any questions or clarifications needed
-
-If you are unavailable or unable to take this assignment, please let us know so we can reassign promptly.
-
-{f"SPECIAL INSTRUCTIONS: {order.get('special_instructions')}" if order.get('special_instructions') else ""}
-
-Best regards,
-{company_name} Order Desk
-"""
-
+    subject, body, _ = rfp_emails(order, [appraiser], deadline)[0]
     return subject, body
 
 
-def send_email(to_email: str, subject: str, body: str, smtp_config: dict) -> bool:
-    """Send a single email via SMTP."""
-    if not all([smtp_config['host'], smtp_config['user'], smtp_config['password']]):
-        raise ValueError("SMTP configuration incomplete. Check SMTP_HOST, SMTP_USER, SMTP_PASSWORD in .env")
-
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = f"{smtp_config['from_name']} <{smtp_config['user']}>"
-    msg['To'] = to_email
+def _mark_rfp_sent(order: dict):
+    order['status'] = 'rfp_sent'
+    order['rfp_sent_at'] = datetime.now().isoformat()
+    order['quotes_deadline'] = (datetime.now() + timedelta(hours=48)).isoformat()
+
+
+def _schedule_deadline(order: dict):
+    """Have the scheduler fire the order's quotes deadline (scheduler.py --sync catches misses)."""
+    try:
+        schedule_quotes_deadline(order)
+    except Exception as e:
+        print(f"Warning: quotes deadline not scheduled for {order.get('order_id')}: {e}", file=sys.stderr)
+
+
+def _queue_rfps(
+    order_id: str,
+    row_index: int,
+    order: dict,
+    results: list[dict],
+    outgoing: list[tuple[int, tuple[str, str, str, str | None]]],
+    deadline: str
+) -> dict:
+    """Queue RFPs in the outbox in one unit of work with the order update."""
+    _mark_rfp_sent(order)
+    batch = WriteBatch()
+    batch.update_row(ORDERS_SHEET_ID, 'Orders', row_index, order, ORDERS_COLUMNS)
+    for i, (to_email, subject, body, html) in outgoing:
+        batch.queue_email(to_email, subject, body, key=f"rfp:{order_id}:{results[i]['appraiser_id']}", html=html)
+    write_results = batch.flush()
+
+    if write_results[0]['status'] != 'written':
+        return {
+            'success': False,
+            'errors': [f"Failed to update order: {write_results[0].get('error')}"],
+            'results': results
+        }
 
-    msg.attach(MIMEText(body, 'plain'))
+    _schedule_deadline(order)
 
-    with smtplib.SMTP(smtp_config['host'], smtp_config['port']) as server:
-        server.starttls()
-        server.login(smtp_config['user'], smtp_config['password'])
-        server.send_message(msg)
+    for (i, _), write in zip(outgoing, write_results[1:]):
+        results[i]['status'] = 'queued' if write['status'] == 'written' else write['status']
+        if write.get('error'):
+            results[i]['error'] = write['error']
 
-    return True
+    return {
+        'success': True,
+        'order_id': order_id,
+        'results': results,
+        'sent_count': 0,
+        'queued_count': sum(1 for r in results if r['status'] == 'queued'),
+        'deadline': deadline,
+        'dry_run': False
+    }
 
 
-def send_rfp_emails(order_id: str, appraiser_ids: list[str] = None, dry_run: bool = False) -> dict:
+def send_rfp_emails(
+    order_id: str,
+    appraiser_ids: list[str] = None,
+    dry_run: bool = False,
+    order_result: tuple[int, dict] = None,
+    appraisers: list[dict] = None
+) -> dict:
     """
     Send RFP emails for an order.
 
@@ -122,13 +113,15 @@ def send_rfp_emails(order_id: str, appraiser_ids: list[str] = None, dry_run: boo
         order_id: Order ID
         appraiser_ids: Specific appraiser IDs to contact (optional, will auto-select if not provided)
         dry_run: If True, don't actually send emails
+        order_result: (row_index, order) if the caller already has it (not re-read)
+        appraisers: Panel rows to contact if the caller already picked them
 
     Returns:
         Dict with results
     """
 
     # Get order
-    result = find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+    result = order_result or find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
     if not result:
         return {
             'success': False,
@@ -138,13 +131,14 @@ def send_rfp_emails(order_id: str, appraiser_ids: list[str] = None, dry_run: boo
     row_index, order = result
 
     # Get appraisers
-    if appraiser_ids:
+    if appraisers is None and appraiser_ids:
         # Load specific appraisers
-        all_appraisers = read_sheet(PANEL_SHEET_ID, 'Appraiser Panel!A:Z')
+        all_appraisers = get_panel(PANEL_SHEET_ID)
         appraisers = [a for a in all_appraisers if a.get('appraiser_id') in appraiser_ids]
-    else:
-        # Auto-select appraisers
-        find_result = find_appraisers_for_order(order_id=order_id)
+    elif appraisers is None:
+        # Auto-select appraisers (the ranking stack only loads on this path)
+        from appraisal.find_appraisers import find_appraisers_for_order
+        find_result = find_appraisers_for_order(order_id=order_id, order=order)
         if not find_result['success']:
             return find_result
         appraisers = find_result.get('candidates', [])
@@ -161,8 +155,10 @@ def send_rfp_emails(order_id: str, appraiser_ids: list[str] = None, dry_run: boo
     # Get SMTP config
     smtp_config = get_smtp_config()
 
-    # Send emails
+    # Render every email in one pass, then send them concurrently
+    rendered = iter(rfp_emails(order, [a for a in appraisers if a.get('email')], deadline))
     results = []
+    outgoing = []   # (index into results, (to, subject, body, html))
     for appraiser in appraisers:
         email = appraiser.get('email')
         if not email:
@@ -174,7 +170,7 @@ def send_rfp_emails(order_id: str, appraiser_ids: list[str] = None, dry_run: boo
             })
             continue
 
-        subject, body = get_rfp_email_content(order, appraiser, deadline)
+        subject, body, html = next(rendered)
 
         if dry_run:
             results.append({
@@ -185,29 +181,27 @@ def send_rfp_emails(order_id: str, appraiser_ids: list[str] = None, dry_run: boo
                 'subject': subject
             })
         else:
-            try:
-                send_email(email, subject, body, smtp_config)
-                results.append({
-                    'appraiser_id': appraiser.get('appraiser_id'),
-                    'name': appraiser.get('name'),
-                    'email': email,
-                    'status': 'sent'
-                })
-            except Exception as e:
-                results.append({
-                    'appraiser_id': appraiser.get('appraiser_id'),
-                    'name': appraiser.get('name'),
-                    'email': email,
-                    'status': 'failed',
-                    'error': str(e)
-                })
+            outgoing.append((len(results), (email, subject, body, html)))
+            results.append({
+                'appraiser_id': appraiser.get('appraiser_id'),
+                'name': appraiser.get('name'),
+                'email': email,
+                'status': 'sent'
+            })
+
+    if outgoing and outbox_enabled():
+        return _queue_rfps(order_id, row_index, order, results, outgoing, deadline)
+
+    errors = send_emails([message for _, message in outgoing], smtp_config)
+    for (i, _), error in zip(outgoing, errors):
+        if error is not None:
+            results[i]['status'] = 'failed'
+            results[i]['error'] = str(error)
 
     # Update order status
     sent_count = sum(1 for r in results if r['status'] == 'sent')
     if sent_count > 0 and not dry_run:
-        order['status'] = 'rfp_sent'
-        order['rfp_sent_at'] = datetime.now().isoformat()
-        order['quotes_deadline'] = (datetime.now() + timedelta(hours=48)).isoformat()
+        _mark_rfp_sent(order)
 
         try:
             update_row(ORDERS_SHEET_ID, 'Orders', row_index, order, ORDERS_COLUMNS)
@@ -218,6 +212,7 @@ def send_rfp_emails(order_id: str, appraiser_ids: list[str] = None, dry_run: boo
                 'results': results,
                 'sent_count': sent_count
             }
+        _schedule_deadline(order)
 
     return {
         'success': True,
@@ -263,6 +258,8 @@ def main():
         count = result.get('sent_count', 0)
         if args.dry_run:
             print(f"\n✓ Dry run: would send {len(result.get('results', []))} email(s)", file=sys.stderr)
+        elif 'queued_count' in result:
+            print(f"\n✓ Queued {result['queued_count']} RFP email(s) in the outbox", file=sys.stderr)
         else:
             print(f"\n✓ Sent {count} RFP email(s)", file=sys.stderr)
         sys.exit(0)
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Resident HTTP service for the appraisal workflow.
+
+Running a step as a script pays for the interpreter start, the Google
+client imports, an OAuth token refresh, the API discovery build, the panel
+download and the SMTP handshake on every webhook - seconds of setup for
+tens of milliseconds of work. This service runs the same step functions in
+one long-lived process, so all of that is paid once at startup and shared
+by every request: credentials and API clients (sheets_utils), the panel
+cache (panel_cache), pooled SMTP connections (mail_transport), compiled
+templates (email_templates), the storage backend, the outbox worker and
+the deadline scheduler (scheduler).
+
+Endpoints (POST, JSON body; the response is the step's JSON result):
+
+    /appraisal-order              create_order(body), or create_orders for
+                                  {"orders": [...]} or an NDJSON / CSV body
+                                  (Content-Type application/x-ndjson, text/csv)
+    /appraisal-find-appraisers    order_id | property_state, property_type,
+                                  client_id; exclude, limit
+    /appraisal-send-rfp           order_id, appraiser_ids, dry_run
+    /appraisal-record-quote       order_id, appraiser_id, fee, turnaround_days, notes
+    /appraisal-quote-summary      order_id; send, dry_run
+    /appraisal-engage             order_id, quote_id | auto, dry_run
+
+    GET /health                   Uptime and per-step request counts and latency
+
+Successful steps answer 200, steps that report success false answer 422,
+malformed requests 400 and unexpected exceptions 500 - always with a JSON
+body carrying 'success' and, on failure, 'errors'. Connections are kept
+alive (HTTP/1.1). Steps do blocking Sheets and SMTP I/O, so they run on a
+thread pool next to the event loop; every worker thread builds its API
+clients before the first request.
+
+Usage:
+    python service.py                         # Serve on APPRAISAL_SERVICE_HOST:PORT
+    python service.py --port 8080 --workers 16
+    curl -X POST localhost:8787/appraisal-record-quote \\
+        -d '{"order_id": "ORD-2026-...", "appraiser_id": "APR-001", "fee": 3500, "turnaround_days": 14}'
+
+Environment:
+    APPRAISAL_SERVICE_HOST=127.0.0.1
+    APPRAISAL_SERVICE_PORT=8787
+    APPRAISAL_SERVICE_WORKERS=8       # Steps running at once
+    APPRAISAL_SERVICE_TOKEN=          # If set, require "Authorization: Bearer <token>"
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from appraisal.sheets_utils import PANEL_SHEET_ID, get_sheets_service
+from appraisal.storage import STORAGE_BACKEND, get_backend
+from appraisal.receive_order import create_order, create_orders, parse_bulk
+from appraisal.find_appraisers import find_appraisers_for_order
+from appraisal.send_rfp import send_rfp_emails
+from appraisal.collect_quotes import record_quote, get_quote_summary, send_summary_to_client
+from appraisal.send_engagement import engage_appraiser
+from appraisal.panel_cache import get_panel_model
+from appraisal.mail_transport import close_pools
+from appraisal.outbox import outbox_enabled, start_worker
+from appraisal.scheduler import start_worker as start_scheduler
+from appraisal.email_templates import get_template
+
+SERVICE_HOST = os.getenv('APPRAISAL_SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.getenv('APPRAISAL_SERVICE_PORT', 8787))
+SERVICE_WORKERS = max(1, int(os.getenv('APPRAISAL_SERVICE_WORKERS', 8)))
+SERVICE_TOKEN = os.getenv('APPRAISAL_SERVICE_TOKEN', '')
+
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_HEADERS = 100
+IDLE_TIMEOUT = 60.0
+LATENCY_WINDOW = 1000       # Recent requests per step kept for percentiles
+
+TEMPLATES = ['rfp', 'engagement', 'decline', 'quote_summary']
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+    405: 'Method Not Allowed', 411: 'Length Required', 413: 'Payload Too Large',
+    422: 'Unprocessable Entity', 500: 'Internal Server Error',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ── Steps ──
+
+def _arg(body: dict, key: str, kind: type = str, required: bool = False, default=None):
+    """A typed field of the request body; a missing or mistyped field is a 400."""
+    value = body.get(key)
+    if value is None or value == '':
+        if required:
+            raise HTTPError(400, f'Missing required field: {key}')
+        return default
+    if kind is bool:
+        if isinstance(value, str):
+            return value.strip().lower() in ('1', 'true', 'yes')
+        return bool(value)
+    if kind is list:
+        if isinstance(value, str):
+            return [v.strip() for v in value.split(',') if v.strip()]
+        if not isinstance(value, list):
+            raise HTTPError(400, f'{key} must be a list')
+        return [str(v) for v in value]
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f'{key} must be a {kind.__name__}')
+
+
+def _order(body, raw: bytes, content_type: str) -> dict:
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'text/csv'):
+        fmt = 'csv' if content_type == 'text/csv' else 'ndjson'
+        return create_orders(parse_bulk(raw.decode('utf-8-sig'), fmt))
+    if isinstance(body.get('orders'), list):
+        return create_orders([
+            (i, data, None if isinstance(data, dict) else 'Record is not a JSON object')
+            for i, data in enumerate(body['orders'], 1)
+        ])
+    return create_order(body)
+
+
+def _find_appraisers(body, raw, content_type) -> dict:
+    return find_appraisers_for_order(
+        order_id=_arg(body, 'order_id'),
+        property_state=_arg(body, 'property_state'),
+        property_type=_arg(body, 'property_type'),
+        client_id=_arg(body, 'client_id'),
+        excluded_ids=_arg(body, 'exclude', list),
+        limit=_arg(body, 'limit', int, default=5)
+    )
+
+
+def _send_rfp(body, raw, content_type) -> dict:
+    return send_rfp_emails(
+        _arg(body, 'order_id', required=True),
+        appraiser_ids=_arg(body, 'appraiser_ids', list),
+        dry_run=_arg(body, 'dry_run', bool, default=False)
+    )
+
+
+def _record_quote(body, raw, content_type) -> dict:
+    return record_quote(
+        order_id=_arg(body, 'order_id', required=True),
+        appraiser_id=_arg(body, 'appraiser_id', required=True),
+        fee=_arg(body, 'fee', float, required=True),
+        turnaround_days=_arg(body, 'turnaround_days', int, required=True),
+        notes=_arg(body, 'notes', default='')
+    )
+
+
+def _quote_summary(body, raw, content_type) -> dict:
+    order_id = _arg(body, 'order_id', required=True)
+    if _arg(body, 'send', bool, default=False):
+        return send_summary_to_client(order_id, dry_run=_arg(body, 'dry_run', bool, default=False))
+    return get_quote_summary(order_id)
+
+
+def _engage(body, raw, content_type) -> dict:
+    return engage_appraiser(
+        _arg(body, 'order_id', required=True),
+        quote_id=_arg(body, 'quote_id'),
+        auto=_arg(body, 'auto', bool, default=False),
+        dry_run=_arg(body, 'dry_run', bool, default=False)
+    )
+
+
+# Endpoint path -> step, named after the webhooks in webhooks.json
+STEPS = {
+    '/appraisal-order': _order,
+    '/appraisal-find-appraisers': _find_appraisers,
+    '/appraisal-send-rfp': _send_rfp,
+    '/appraisal-record-quote': _record_quote,
+    '/appraisal-quote-summary': _quote_summary,
+    '/appraisal-engage': _engage,
+}
+
+
+# ── Warm-up ──
+
+def _warm_thread():
+    """Build this worker thread's API clients before its first request."""
+    if STORAGE_BACKEND == 'sheets':
+        try:
+            get_sheets_service()
+        except Exception as e:
+            print(f"Warning: could not build Sheets client: {e}", file=sys.stderr)
+
+
+def warm_up(executor: ThreadPoolExecutor, workers: int):
+    """Start every worker thread and load what the first requests would."""
+    get_backend()
+    for name in TEMPLATES:
+        get_template(name)
+
+    # Occupy every worker at once so the pool starts them all now
+    barrier = threading.Barrier(workers)
+    for future in [executor.submit(barrier.wait, 30) for _ in range(workers)]:
+        future.result()
+
+    if PANEL_SHEET_ID:
+        try:
+            get_panel_model(PANEL_SHEET_ID)
+        except Exception as e:
+            print(f"Warning: could not preload the panel: {e}", file=sys.stderr)
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+# ── Server ──
+
+class WorkflowService:
+    """
+    The workflow steps behind an asyncio HTTP/1.1 server.
+
+    run() serves on the calling thread until interrupted; start() serves on
+    a background thread (for embedding and benchmarks) until stop().
+    """
+
+    def __init__(
+        self,
+        host: str = SERVICE_HOST,
+        port: int = SERVICE_PORT,
+        workers: int = SERVICE_WORKERS,
+        token: str = SERVICE_TOKEN,
+        mail_worker: bool = True,
+        deadline_worker: bool = True
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.token = token
+        self.mail_worker = mail_worker and outbox_enabled()
+        self.deadline_worker = deadline_worker
+        self.started = None
+        self.stats = {path: {'requests': 0, 'failed': 0} for path in STEPS}
+        self._latency = {path: deque(maxlen=LATENCY_WINDOW) for path in STEPS}
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='step', initializer=_warm_thread
+        )
+        self._loop = None
+        self._stop = None
+        self._connections: set[asyncio.Task] = set()
+        self._thread = None
+        self._ready = threading.Event()
+
+    def run(self):
+        """Warm up, then serve until SIGINT/SIGTERM."""
+        asyncio.run(self._serve(install_signals=True))
+
+    def start(self) -> tuple[str, int]:
+        """Serve on a background thread. Returns (host, port) once warm."""
+        self._thread = threading.Thread(
+            target=lambda: asyncio.run(self._serve()), name='workflow-service', daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        return self.host, self.port
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            if self._thread:
+                self._thread.join(timeout=10)
+
+    async def _serve(self, install_signals: bool = False):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if install_signals:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                self._loop.add_signal_handler(sig, self._stop.set)
+
+        await self._loop.run_in_executor(None, warm_up, self._executor, self.workers)
+        outbox = start_worker() if self.mail_worker else None
+        deadlines = start_scheduler() if self.deadline_worker else None
+
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.started = time.monotonic()
+        self._ready.set()
+        if install_signals:
+            print(f"✓ Serving the appraisal workflow on http://{self.host}:{self.port}", file=sys.stderr)
+        try:
+            await self._stop.wait()
+        finally:
+            server.close()
+            # Idle keep-alive connections would otherwise hold the shutdown
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await server.wait_closed()
+            self._executor.shutdown(wait=True)
+            for worker in (deadlines, outbox):
+                if worker:
+                    worker[1].set()
+                    worker[0].join(timeout=10)
+            close_pools()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as e:
+                    writer.write(_response(e.status, {'success': False, 'errors': [str(e)]}, False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                method, path, headers, raw = request
+                status, payload = await self._dispatch(method, path, headers, raw)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Read one request: (method, path, headers, body), or None at EOF."""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _version = line.decode('latin-1').split()
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line')
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(400, 'Too many headers')
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(411, 'Chunked bodies are not supported; send Content-Length')
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HTTPError(400, 'Invalid Content-Length')
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f'Body over {MAX_BODY_BYTES} bytes')
+        raw = await reader.readexactly(length) if length else b''
+        return method.upper(), urlsplit(target).path.rstrip('/') or '/', headers, raw
+
+    async def _dispatch(self, method: str, path: str, headers: dict, raw: bytes) -> tuple[int, dict]:
+        if self.token and not hmac.compare_digest(
+            headers.get('authorization', ''), f'Bearer {self.token}'
+        ):
+            return 401, {'success': False, 'errors': ['Missing or invalid bearer token']}
+
+        if path == '/health':
+            return 200, self.health()
+        step = STEPS.get(path)
+        if step is None:
+            return 404, {'success': False, 'errors': [f'Unknown endpoint: {path}']}
+        if method != 'POST':
+            return 405, {'success': False, 'errors': [f'{path} only accepts POST']}
+
+        content_type = headers.get('content-type', 'application/json').split(';')[0].strip().lower()
+        body = {}
+        if raw and content_type not in ('application/x-ndjson', 'application/jsonl', 'text/csv'):
+            try:
+                body = json.loads(raw)
+            except ValueError as e:
+                return 400, {'success': False, 'errors': [f'Invalid JSON: {e}']}
+            if not isinstance(body, dict):
+                return 400, {'success': False, 'errors': ['Body must be a JSON object']}
+
+        started = time.perf_counter()
+        try:
+            result = await self._loop.run_in_executor(self._executor, step, body, raw, content_type)
+            status = 200 if result.get('success') else 422
+        except HTTPError as e:
+            status, result = e.status, {'success': False, 'errors': [str(e)]}
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            status, result = 500, {'success': False, 'errors': [f'{type(e).__name__}: {e}']}
+
+        self._latency[path].append(time.perf_counter() - started)
+        self.stats[path]['requests'] += 1
+        if status != 200:
+            self.stats[path]['failed'] += 1
+        return status, result
+
+    def health(self) -> dict:
+        steps = {}
+        for path, stats in self.stats.items():
+            ordered = sorted(self._latency[path])
+            steps[path.lstrip('/')] = {
+                **stats,
+                'p50_ms': round(_percentile(ordered, 50) * 1000, 1),
+                'p95_ms': round(_percentile(ordered, 95) * 1000, 1),
+            }
+        return {
+            'success': True,
+            'storage': STORAGE_BACKEND,
+            'workers': self.workers,
+            'outbox_worker': self.mail_worker,
+            'deadline_worker': self.deadline_worker,
+            'uptime_seconds': round(time.monotonic() - self.started, 1) if self.started else 0,
+            'steps': steps,
+        }
+
+
+def _response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, default=str).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the appraisal workflow steps over HTTP")
+    parser.add_argument("--host", default=SERVICE_HOST, help=f"Bind address (default: {SERVICE_HOST})")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help=f"Port (default: {SERVICE_PORT})")
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS,
+                        help=f"Steps running at once (default: {SERVICE_WORKERS})")
+    parser.add_argument("--no-mail-worker", action="store_true",
+                        help="Don't drain the outbox in this process")
+    parser.add_argument("--no-deadline-worker", action="store_true",
+                        help="Don't fire order deadlines in this process (run scheduler.py --worker instead)")
+    args = parser.parse_args()
+
+    service = WorkflowService(
+        host=args.host, port=args.port, workers=max(1, args.workers),
+        mail_worker=not args.no_mail_worker,
+        deadline_worker=not args.no_deadline_worker
+    )
+    service.run()
+
+
+if __name__ == "__main__":
+    main()
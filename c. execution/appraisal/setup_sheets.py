@@ -10,6 +10,7 @@ This will create one spreadsheet with three tabs and print the sheet ID
 to add to your .env file.
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -23,6 +24,11 @@ from appraisal.sheets_utils import (
 
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Create the appraisal tracking spreadsheet (Orders, Appraiser Panel, Quotes)"
+    )
+    parser.parse_args()
+
     print("Setting up Appraisal Order Workflow Google Sheets...")
     print()
 
@@ -8,24 +8,19 @@ from __future__ import annotations
 import json
 import sys
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Tuple, List, Dict
 
-try:
-    from google.auth.transport.requests import Request
-    from google.oauth2.credentials import Credentials
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from googleapiclient.discovery import build
-    from googleapiclient.errors import HttpError
-except ImportError:
-    print("Error: Google API packages not installed. Run:")
-    print("  pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client")
-    sys.exit(1)
-
 from dotenv import load_dotenv
 load_dotenv()
 
+from appraisal.rate_limit import TokenBucket, SingleFlight, call_with_retry
+from appraisal.storage import StorageBackend, STORAGE_BACKEND, get_backend, sheet_name_from_range
+
 # OAuth scopes
 SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
@@ -37,10 +32,27 @@ EXECUTION_DIR = Path(__file__).parent.parent
 CREDENTIALS_FILE = EXECUTION_DIR / 'credentials.json'
 TOKEN_FILE = EXECUTION_DIR / 'token.json'
 
-# Sheet IDs from environment
-ORDERS_SHEET_ID = os.getenv('APPRAISAL_ORDERS_SHEET_ID')
-PANEL_SHEET_ID = os.getenv('APPRAISAL_PANEL_SHEET_ID')
-QUOTES_SHEET_ID = os.getenv('APPRAISAL_QUOTES_SHEET_ID')
+# Sheet IDs from environment. With local SQLite storage they only namespace
+# rows, so they default to 'local' and no spreadsheet is needed.
+_DEFAULT_SHEET_ID = 'local' if STORAGE_BACKEND == 'sqlite' else None
+ORDERS_SHEET_ID = os.getenv('APPRAISAL_ORDERS_SHEET_ID', _DEFAULT_SHEET_ID)
+PANEL_SHEET_ID = os.getenv('APPRAISAL_PANEL_SHEET_ID', _DEFAULT_SHEET_ID)
+QUOTES_SHEET_ID = os.getenv('APPRAISAL_QUOTES_SHEET_ID', _DEFAULT_SHEET_ID)
+
+# Sheets API quotas are per user per minute (60 reads and 60 writes by
+# default). Requests wait on a token bucket sized to those quotas instead of
+# tripping them; a small burst allowance keeps single-order steps snappy.
+SHEETS_READS_PER_MINUTE = float(os.getenv('SHEETS_READS_PER_MINUTE', 60))
+SHEETS_WRITES_PER_MINUTE = float(os.getenv('SHEETS_WRITES_PER_MINUTE', 60))
+SHEETS_BURST = float(os.getenv('SHEETS_BURST', 10))
+SHEETS_MAX_RETRIES = int(os.getenv('SHEETS_MAX_RETRIES', 5))
+
+# HTTP statuses worth retrying: quota exceeded and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+_read_bucket = TokenBucket(SHEETS_READS_PER_MINUTE / 60, SHEETS_BURST)
+_write_bucket = TokenBucket(SHEETS_WRITES_PER_MINUTE / 60, SHEETS_BURST)
+_inflight_reads = SingleFlight()
 
 # Client panels registry - maps client_id to their panel spreadsheet ID
 # Format: CLIENT_PANEL_<client_id>=<spreadsheet_id>
@@ -53,7 +65,38 @@ def get_client_panel_sheet_id(client_id: str) -> str | None:
     return os.getenv(env_key)
 
 
+# The Google client stack takes longer to import than most steps take to
+# run, and local (SQLite) storage never needs it - it is imported on first
+# use rather than with this module.
+GOOGLE_PACKAGES = 'google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client'
+
+
+def _google_missing() -> ImportError:
+    return ImportError(f"Google API packages not installed. Run:\n  pip install {GOOGLE_PACKAGES}")
+
+
+# Credentials are loaded once per process and refreshed only when the access
+# token expires; API clients are built once per thread (the underlying
+# httplib2 connection is not thread-safe), so a long-running process pays
+# for the token exchange and discovery build once.
+_credentials = None
+_credentials_lock = threading.Lock()
+_clients = threading.local()
+
+
 def get_google_credentials():
+    """Get the process-wide Google OAuth credentials, refreshing them if expired."""
+    global _credentials
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials = _load_google_credentials()
+        elif not _credentials.valid and _credentials.refresh_token:
+            from google.auth.transport.requests import Request
+            _credentials.refresh(Request())
+        return _credentials
+
+
+def _load_google_credentials():
     """
     Get or refresh Google OAuth credentials.
 
@@ -61,6 +104,12 @@ def get_google_credentials():
     1. Local: Uses token.json and credentials.json files
     2. Modal/Cloud: Uses environment variables (GOOGLE_REFRESH_TOKEN, etc.)
     """
+    try:
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+    except ImportError as e:
+        raise _google_missing() from e
+
     creds = None
 
     # Check for environment-based credentials (Modal/cloud)
@@ -95,6 +144,7 @@ def get_google_credentials():
                     f"credentials.json not found at {CREDENTIALS_FILE}. "
                     "Set up Google OAuth credentials first."
                 )
+            from google_auth_oauthlib.flow import InstalledAppFlow
             flow = InstalledAppFlow.from_client_secrets_file(str(CREDENTIALS_FILE), SCOPES)
             creds = flow.run_local_server(port=0)
 
@@ -104,75 +154,953 @@ def get_google_credentials():
     return creds
 
 
-def get_sheets_service():
-    """Get Google Sheets API service."""
+def _client(name: str, version: str):
     creds = get_google_credentials()
-    return build('sheets', 'v4', credentials=creds)
+    key = (name, version)
+    cached = getattr(_clients, 'services', {}).get(key)
+    if cached is not None and cached[0] is creds:
+        return cached[1]
+    try:
+        from googleapiclient.discovery import build
+    except ImportError as e:
+        raise _google_missing() from e
+    service = build(name, version, credentials=creds)
+    _clients.services = {**getattr(_clients, 'services', {}), key: (creds, service)}
+    return service
+
+
+def get_sheets_service():
+    """Get Google Sheets API service (one per thread, reused)."""
+    return _client('sheets', 'v4')
+
+
+def get_drive_service():
+    """Get Google Drive API service (one per thread, reused)."""
+    return _client('drive', 'v3')
+
+
+def get_file_version(spreadsheet_id: str) -> str:
+    """
+    Get a token that changes whenever the spreadsheet changes.
+
+    One small Drive metadata request (version and modifiedTime) - much
+    cheaper than re-reading the sheet to find out whether it changed.
+    """
+    service = get_drive_service()
+    result = execute_request(
+        service.files().get(fileId=spreadsheet_id, fields='version,modifiedTime'),
+        coalesce_key=('version', spreadsheet_id)
+    )
+    return f"{result.get('version', '')}:{result.get('modifiedTime', '')}"
+
+
+def _is_http_error(error: Exception) -> bool:
+    # No request can have failed with HttpError before googleapiclient loaded
+    errors = sys.modules.get('googleapiclient.errors')
+    return errors is not None and isinstance(error, errors.HttpError)
 
 
-def read_sheet(spreadsheet_id: str, range_name: str) -> list[dict]:
+def _http_status(error: Exception) -> int | None:
+    """Get the HTTP status from a googleapiclient error, if it has one."""
+    if _is_http_error(error):
+        return getattr(error.resp, 'status', None)
+    return None
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds the server asked us to wait (Retry-After header), if any."""
+    if _is_http_error(error):
+        try:
+            return float(error.resp.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def execute_request(request, write: bool = False, idempotent: bool = True, coalesce_key=None):
+    """
+    Execute a Sheets API request within quota, retrying transient failures.
+
+    Every request takes a token from the read or write bucket first. HTTP 429
+    and 5xx responses (and dropped connections) are retried with jittered
+    exponential backoff, honoring Retry-After. A 429 also empties the bucket
+    so other threads back off too.
+
+    Args:
+        request: googleapiclient HttpRequest (not yet executed)
+        write: Use the write quota instead of the read quota
+        idempotent: False for values.append - a 5xx may mean the row was
+            written, so only 429 (rejected outright) is retried
+        coalesce_key: Hashable key for reads; identical concurrent reads
+            share one request and its result
+    """
+    bucket = _write_bucket if write else _read_bucket
+
+    def is_retryable(error: Exception) -> bool:
+        status = _http_status(error)
+        if status is None:
+            return idempotent and isinstance(error, (ConnectionError, TimeoutError))
+        if status == 429:
+            return True
+        return idempotent and status in RETRYABLE_STATUSES
+
+    def on_retry(error: Exception):
+        if _http_status(error) == 429:
+            bucket.drain()
+        print(f"Sheets API request failed ({error}), retrying...", file=sys.stderr)
+
+    def run():
+        return call_with_retry(
+            request.execute,
+            is_retryable,
+            max_retries=SHEETS_MAX_RETRIES,
+            before_attempt=bucket.acquire,
+            retry_after=_retry_after,
+            on_retry=on_retry,
+        )
+
+    if coalesce_key is not None and not write:
+        return _inflight_reads.do(coalesce_key, run)
+    return run()
+
+
+# ── Storage dispatch ──────────────────────────────────────────────────────────
+# The workflow steps read and write through these functions, which hand off
+# to the storage backend chosen by APPRAISAL_STORAGE (see storage.py) -
+# Google Sheets unless configured otherwise.
+
+def read_sheet(spreadsheet_id: str, range_name: str, columns: list[str] = None) -> list[dict]:
     """
     Read data from a Google Sheet and return as list of dicts.
     First row is treated as headers.
+
+    Pass columns to fetch only those fields (by header name) - on a large
+    tab this is a fraction of the payload of the full A:Z range. Each dict
+    then holds just the requested keys.
     """
-    service = get_sheets_service()
-    result = service.spreadsheets().values().get(
-        spreadsheetId=spreadsheet_id,
-        range=range_name
-    ).execute()
+    return get_backend().read_sheet(spreadsheet_id, range_name, columns)
+
+
+def append_row(spreadsheet_id: str, sheet_name: str, row_data: dict, columns: list[str]) -> int | None:
+    """Append a single row to a sheet. Returns the new row's index when known."""
+    return get_backend().append_row(spreadsheet_id, sheet_name, row_data, columns)
+
+
+def update_row(spreadsheet_id: str, sheet_name: str, row_index: int, row_data: dict, columns: list[str]):
+    """Update a specific row (1-indexed, row 1 is headers)."""
+    get_backend().update_row(spreadsheet_id, sheet_name, row_index, row_data, columns)
+
+
+def find_row_by_id(spreadsheet_id: str, sheet_name: str, id_column: str, id_value: str) -> tuple[int, dict] | None:
+    """Find a row by ID column value. Returns (row_index, row_data) or None."""
+    return get_backend().find_row_by_id(spreadsheet_id, sheet_name, id_column, id_value)
+
 
-    values = result.get('values', [])
-    if not values or len(values) < 2:
-        return []
+# ── Headers and column projection ─────────────────────────────────────────────
+# Narrow reads need to know which column letter holds which field. Header rows
+# are cached per process; before a sheet's header has been read, positions are
+# guessed from the standard column lists at the bottom of this module. Every
+# narrow range starts at row 1, so the header cells come back with the data and
+# a wrong guess (columns moved or inserted by hand) is caught, the real header
+# row is fetched, and the read retried.
 
-    headers = values[0]
-    rows = []
-    for row in values[1:]:
-        # Pad row to match headers length
-        row = row + [''] * (len(headers) - len(row))
-        rows.append(dict(zip(headers, row)))
+# (spreadsheet_id, sheet_name) -> header row. Guarded by _cache_lock with the
+# row indexes below: steps run concurrently in the service and fetch pool.
+_header_cache: dict[tuple[str, str], list[str]] = {}
+_cache_lock = threading.RLock()
 
-    return rows
 
+def _cached_headers(spreadsheet_id: str, sheet_name: str) -> list[str] | None:
+    with _cache_lock:
+        return _header_cache.get((spreadsheet_id, sheet_name))
+
+
+def _cache_headers(spreadsheet_id: str, sheet_name: str, headers: list[str]) -> list[str]:
+    with _cache_lock:
+        _header_cache[(spreadsheet_id, sheet_name)] = headers
+    return headers
+
+
+def column_letter(index: int) -> str:
+    """Convert a 0-based column index to its A1 letter (0 -> A, 26 -> AA)."""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def get_headers(spreadsheet_id: str, sheet_name: str, refresh: bool = False) -> list[str]:
+    """Get the header row of a sheet, cached per process."""
+    headers = None if refresh else _cached_headers(spreadsheet_id, sheet_name)
+    if headers is None:
+        service = get_sheets_service()
+        result = execute_request(
+            service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=f"{sheet_name}!1:1"
+            ),
+            coalesce_key=('get', spreadsheet_id, f"{sheet_name}!1:1")
+        )
+        values = result.get('values', [])
+        headers = _cache_headers(spreadsheet_id, sheet_name, values[0] if values else [])
+    return headers
 
-def append_row(spreadsheet_id: str, sheet_name: str, row_data: dict, columns: list[str]):
-    """Append a single row to a sheet."""
+
+def _known_headers(spreadsheet_id: str, sheet_name: str) -> list[str]:
+    """Cached header row, or the standard columns for the tab if none is cached."""
+    # Archive tabs ("Orders Archive 2025", see archive.py) start with their tab's columns
+    standard = re.sub(r' Archive \d{4}$', '', sheet_name)
+    return _cached_headers(spreadsheet_id, sheet_name) or SHEET_COLUMNS.get(standard, [])
+
+
+def _column_runs(indexes: list[int]) -> list[tuple[int, int]]:
+    """Group column (or row) indexes into contiguous (first, last) runs: [0,1,2,5] -> [(0,2),(5,5)]."""
+    runs = []
+    for i in sorted(set(indexes)):
+        if runs and i == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], i)
+        else:
+            runs.append((i, i))
+    return runs
+
+
+def read_columns(spreadsheet_id: str, sheet_name: str, columns: list[str]) -> dict[str, list[str]]:
+    """
+    Read just the named columns of a sheet, below the header row.
+
+    Adjacent columns share a range and all ranges go out in one
+    values.batchGet. Returns {column: values}; columns the sheet doesn't
+    have come back empty. Trailing empty cells are trimmed, so the lists
+    can differ in length.
+    """
     service = get_sheets_service()
+    headers = _known_headers(spreadsheet_id, sheet_name)
+    refreshed = False
 
-    row = [row_data.get(col, '') for col in columns]
+    while True:
+        if not headers:
+            headers = get_headers(spreadsheet_id, sheet_name, refresh=True)
+            refreshed = True
 
-    service.spreadsheets().values().append(
-        spreadsheetId=spreadsheet_id,
-        range=f"{sheet_name}!A:Z",
-        valueInputOption='USER_ENTERED',
-        insertDataOption='INSERT_ROWS',
-        body={'values': [row]}
-    ).execute()
+        positions = {c: headers.index(c) for c in columns if c in headers}
+        if not positions:
+            if refreshed:
+                return {c: [] for c in columns}
+            headers = []
+            continue
 
+        runs = _column_runs(list(positions.values()))
+        ranges = [f"{sheet_name}!{column_letter(a)}1:{column_letter(b)}" for a, b in runs]
+        result = execute_request(
+            service.spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=ranges,
+                majorDimension='COLUMNS'
+            ),
+            coalesce_key=('batchGet', spreadsheet_id, tuple(ranges), 'COLUMNS')
+        )
 
-def update_row(spreadsheet_id: str, sheet_name: str, row_index: int, row_data: dict, columns: list[str]):
-    """Update a specific row (1-indexed, row 1 is headers)."""
+        by_position = {}
+        for (a, b), value_range in zip(runs, result.get('valueRanges', [])):
+            values = value_range.get('values', [])
+            for offset in range(b - a + 1):
+                by_position[a + offset] = values[offset] if offset < len(values) else []
+
+        # The header cell of each column confirms the guessed position
+        if all((by_position[i][:1] or [''])[0] == c for c, i in positions.items()) or refreshed:
+            break
+        headers = []
+
+    return {c: by_position[positions[c]][1:] if c in positions else [] for c in columns}
+
+
+def read_projected(spreadsheet_id: str, sheet_name: str, columns: list[str]) -> list[dict]:
+    """Read just the named columns of a sheet as a list of dicts, one per row."""
+    values = read_columns(spreadsheet_id, sheet_name, columns)
+    row_count = max((len(v) for v in values.values()), default=0)
+    return [
+        {c: values[c][r] if r < len(values[c]) else '' for c in columns}
+        for r in range(row_count)
+    ]
+
+
+# ── Row index ─────────────────────────────────────────────────────────────────
+# Lookups by order_id / quote_id go through a per-process index mapping ID
+# values to sheet rows. Building it reads only the ID column; a lookup then
+# reads just the one row it needs. The index is trusted only as far as that
+# row read confirms it: if the ID cell no longer matches (rows sorted, deleted
+# or inserted by hand) or the ID is missing (appended by n8n or another
+# process), the index is rebuilt once and the lookup retried.
+
+class _RowIndex:
+    """ID -> row map of one sheet, with the reverse map so rewriting a row drops its old ID in O(1)."""
+
+    __slots__ = ('by_id', 'by_row')
+
+    def __init__(self, ids: list[str] = ()):
+        self.by_id: dict[str, int] = {}
+        self.by_row: dict[int, str] = {}
+        for i, value in enumerate(ids):
+            if value:
+                self.set(value, i + 2)  # +2 because 1-indexed and header row
+
+    def get(self, id_value: str) -> int | None:
+        return self.by_id.get(id_value)
+
+    def set(self, id_value: str, row_index: int):
+        """Record that `row_index` now holds `id_value`. Call with _cache_lock held."""
+        old = self.by_row.get(row_index)
+        if old == id_value:
+            return
+        if old is not None and self.by_id.get(old) == row_index:
+            del self.by_id[old]
+        self.by_row[row_index] = id_value
+        # First occurrence wins, matching the old top-to-bottom scan
+        self.by_id.setdefault(id_value, row_index)
+
+
+# (spreadsheet_id, sheet_name, id_column) -> _RowIndex, guarded by _cache_lock
+_row_indexes: dict[tuple[str, str, str], _RowIndex] = {}
+
+
+def _store_row_index(spreadsheet_id: str, sheet_name: str, id_column: str, ids: list[str]) -> _RowIndex:
+    index = _RowIndex(ids)
+    with _cache_lock:
+        _row_indexes[(spreadsheet_id, sheet_name, id_column)] = index
+    return index
+
+
+def _cached_row_index(spreadsheet_id: str, sheet_name: str, id_column: str) -> _RowIndex | None:
+    with _cache_lock:
+        return _row_indexes.get((spreadsheet_id, sheet_name, id_column))
+
+
+def _drop_row_indexes(spreadsheet_id: str, sheet_name: str, id_column: str = None):
+    """Forget the row indexes of a tab (or only the one on id_column)."""
+    with _cache_lock:
+        for key in [k for k in _row_indexes if k[:2] == (spreadsheet_id, sheet_name)]:
+            if id_column is None or key[2] == id_column:
+                del _row_indexes[key]
+
+
+def build_row_index(spreadsheet_id: str, sheet_name: str, id_column: str) -> _RowIndex:
+    """Read only the ID column of a sheet and map each ID to its row (1-indexed)."""
+    ids = read_columns(spreadsheet_id, sheet_name, [id_column])[id_column]
+    return _store_row_index(spreadsheet_id, sheet_name, id_column, ids)
+
+
+def read_row(spreadsheet_id: str, sheet_name: str, row_index: int) -> dict:
+    """Read a single row (1-indexed) as a dict keyed by the sheet headers."""
     service = get_sheets_service()
+    range_name = f"{sheet_name}!A{row_index}:Z{row_index}"
 
-    row = [row_data.get(col, '') for col in columns]
+    headers = _cached_headers(spreadsheet_id, sheet_name)
+    if headers is not None:
+        result = execute_request(
+            service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=range_name
+            ),
+            coalesce_key=('get', spreadsheet_id, range_name)
+        )
+        values = result.get('values', [])
+    else:
+        # Fetch the header row along with the row itself
+        header_range = f"{sheet_name}!1:1"
+        result = execute_request(
+            service.spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=[header_range, range_name]
+            ),
+            coalesce_key=('batchGet', spreadsheet_id, (header_range, range_name))
+        )
+        header_range_values, row_range_values = result.get('valueRanges', [{}, {}])
+        header_values = header_range_values.get('values', [])
+        headers = _cache_headers(spreadsheet_id, sheet_name, header_values[0] if header_values else [])
+        values = row_range_values.get('values', [])
 
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=f"{sheet_name}!A{row_index}:Z{row_index}",
-        valueInputOption='USER_ENTERED',
-        body={'values': [row]}
-    ).execute()
+    row = values[0] if values else []
+    row = row + [''] * (len(headers) - len(row))
+    return dict(zip(headers, row))
 
 
-def find_row_by_id(spreadsheet_id: str, sheet_name: str, id_column: str, id_value: str) -> tuple[int, dict] | None:
-    """Find a row by ID column value. Returns (row_index, row_data) or None."""
-    rows = read_sheet(spreadsheet_id, f"{sheet_name}!A:Z")
+def _index_row(spreadsheet_id: str, sheet_name: str, row_index: int, row_data: dict):
+    """Record a written row in every cached index for its sheet."""
+    with _cache_lock:
+        for (sid, name, id_column), index in _row_indexes.items():
+            if sid == spreadsheet_id and name == sheet_name and row_data.get(id_column):
+                index.set(row_data[id_column], row_index)
 
-    for i, row in enumerate(rows):
-        if row.get(id_column) == id_value:
-            return (i + 2, row)  # +2 because 1-indexed and header row
 
-    return None
+# ── Google Sheets backend ─────────────────────────────────────────────────────
+
+class SheetsBackend(StorageBackend):
+    """Storage backend that reads and writes the Google Sheets directly."""
+
+    name = 'sheets'
+
+    def read_sheet(self, spreadsheet_id: str, range_name: str, columns: list[str] = None) -> list[dict]:
+        if columns:
+            return read_projected(spreadsheet_id, sheet_name_from_range(range_name), columns)
+
+        service = get_sheets_service()
+        result = execute_request(
+            service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=range_name
+            ),
+            coalesce_key=('get', spreadsheet_id, range_name)
+        )
+
+        values = result.get('values', [])
+        if not values or len(values) < 2:
+            return []
+
+        headers = values[0]
+        rows = []
+        for row in values[1:]:
+            # Pad row to match headers length
+            row = row + [''] * (len(headers) - len(row))
+            rows.append(dict(zip(headers, row)))
+
+        return rows
+
+    def append_row(self, spreadsheet_id: str, sheet_name: str, row_data: dict, columns: list[str]) -> int | None:
+        service = get_sheets_service()
+
+        row = [row_data.get(col, '') for col in columns]
+
+        result = execute_request(
+            service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id,
+                range=f"{sheet_name}!A:Z",
+                valueInputOption='USER_ENTERED',
+                insertDataOption='INSERT_ROWS',
+                body={'values': [row]}
+            ),
+            write=True,
+            idempotent=False
+        )
+
+        # Keep any cached ID index in step with the new row
+        row_index = _first_updated_row(result)
+        if row_index:
+            _index_row(spreadsheet_id, sheet_name, row_index, row_data)
+        return row_index
+
+    def update_row(self, spreadsheet_id: str, sheet_name: str, row_index: int, row_data: dict, columns: list[str]):
+        service = get_sheets_service()
+
+        row = [row_data.get(col, '') for col in columns]
+
+        execute_request(
+            service.spreadsheets().values().update(
+                spreadsheetId=spreadsheet_id,
+                range=f"{sheet_name}!A{row_index}:Z{row_index}",
+                valueInputOption='USER_ENTERED',
+                body={'values': [row]}
+            ),
+            write=True
+        )
+
+        _index_row(spreadsheet_id, sheet_name, row_index, row_data)
+
+    def find_row_by_id(self, spreadsheet_id: str, sheet_name: str, id_column: str, id_value: str) -> tuple[int, dict] | None:
+        index = _cached_row_index(spreadsheet_id, sheet_name, id_column)
+        rebuilt = index is None
+        if rebuilt:
+            index = build_row_index(spreadsheet_id, sheet_name, id_column)
+
+        while True:
+            row_index = index.get(id_value)
+            if row_index is not None:
+                row = read_row(spreadsheet_id, sheet_name, row_index)
+                if row.get(id_column) == id_value:
+                    return (row_index, row)
+
+            # Missing or stale entry - rebuild once from the sheet, then give up
+            if rebuilt:
+                return None
+            index = build_row_index(spreadsheet_id, sheet_name, id_column)
+            rebuilt = True
+
+    def _sheet_ids(self, spreadsheet_id: str) -> dict[str, int]:
+        """Map each tab's title to its numeric sheetId."""
+        result = execute_request(
+            get_sheets_service().spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields='sheets.properties(sheetId,title)'
+            ),
+            coalesce_key=('sheets', spreadsheet_id)
+        )
+        return {
+            sheet['properties']['title']: sheet['properties']['sheetId']
+            for sheet in result.get('sheets', [])
+        }
+
+    def list_sheets(self, spreadsheet_id: str) -> list[str]:
+        return list(self._sheet_ids(spreadsheet_id))
+
+    def ensure_sheet(self, spreadsheet_id: str, sheet_name: str, columns: list[str]):
+        if sheet_name in self._sheet_ids(spreadsheet_id):
+            return
+        service = get_sheets_service()
+        result = execute_request(
+            service.spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                body={'requests': [{
+                    'addSheet': {
+                        'properties': {
+                            'title': sheet_name,
+                            'gridProperties': {'frozenRowCount': 1}
+                        }
+                    }
+                }]}
+            ),
+            write=True,
+            idempotent=False
+        )
+        execute_request(
+            service.spreadsheets().values().update(
+                spreadsheetId=spreadsheet_id,
+                range=f"{sheet_name}!A1",
+                valueInputOption='USER_ENTERED',
+                body={'values': [list(columns)]}
+            ),
+            write=True
+        )
+        _cache_headers(spreadsheet_id, sheet_name, list(columns))
+        sheet_id = result['replies'][0]['addSheet']['properties']['sheetId']
+        format_header(service, spreadsheet_id, sheet_id, len(columns))
+
+    def delete_rows_by_id(self, spreadsheet_id: str, sheet_name: str, id_column: str, id_values: list[str]) -> int:
+        """
+        Delete matching rows in one batchUpdate, bottom-up so each deletion
+        leaves the row numbers of the next intact. Rows below shift up, so
+        any cached row index for the tab is dropped.
+        """
+        wanted = {v for v in id_values if v}
+        if not wanted:
+            return 0
+        ids = read_columns(spreadsheet_id, sheet_name, [id_column])[id_column]
+        rows = [i + 2 for i, value in enumerate(ids) if value in wanted]  # +2: 1-indexed, header row
+        if not rows:
+            return 0
+
+        sheet_id = self._sheet_ids(spreadsheet_id)[sheet_name]
+        execute_request(
+            get_sheets_service().spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                body={'requests': [
+                    {
+                        'deleteDimension': {
+                            'range': {
+                                'sheetId': sheet_id,
+                                'dimension': 'ROWS',
+                                'startIndex': first - 1,
+                                'endIndex': last,
+                            }
+                        }
+                    }
+                    for first, last in reversed(_column_runs(rows))
+                ]}
+            ),
+            write=True,
+            # A retried deletion would remove the rows that moved up into place
+            idempotent=False
+        )
+
+        _drop_row_indexes(spreadsheet_id, sheet_name)
+        return len(rows)
+
+    def read_batch(self, reads: list[dict]) -> list:
+        """
+        Perform queued reads with one values.batchGet per spreadsheet.
+
+        A row looked up by ID costs just that row when the cached row index
+        knows where it is; otherwise the whole tab is read and the index
+        rebuilt from it. Reads with columns fetch only those columns. Reads
+        of different spreadsheets go out in parallel. A row whose ID cell no
+        longer matches, or a column that moved, is re-read the usual way, so
+        a stale cache costs an extra call rather than a wrong answer.
+        """
+        plans = [_plan_read(r) for r in reads]
+
+        ranges_by_spreadsheet: dict[str, list[str]] = {}
+        for r, plan in zip(reads, plans):
+            ranges = ranges_by_spreadsheet.setdefault(r['spreadsheet_id'], [])
+            ranges.extend(rn for rn in plan['ranges'] if rn not in ranges)
+
+        def fetch(spreadsheet_id: str) -> dict[str, list]:
+            ranges = ranges_by_spreadsheet[spreadsheet_id]
+            result = execute_request(
+                get_sheets_service().spreadsheets().values().batchGet(
+                    spreadsheetId=spreadsheet_id,
+                    ranges=ranges
+                ),
+                coalesce_key=('batchGet', spreadsheet_id, tuple(ranges))
+            )
+            value_ranges = result.get('valueRanges', [])
+            return {rn: vr.get('values', []) for rn, vr in zip(ranges, value_ranges)}
+
+        if len(ranges_by_spreadsheet) > 1:
+            with ThreadPoolExecutor(
+                max_workers=len(ranges_by_spreadsheet),
+                thread_name_prefix='sheets-read'
+            ) as executor:
+                fetched = dict(zip(ranges_by_spreadsheet, executor.map(fetch, ranges_by_spreadsheet)))
+        else:
+            fetched = {sid: fetch(sid) for sid in ranges_by_spreadsheet}
+
+        return [
+            self._resolve_read(r, plan, fetched[r['spreadsheet_id']])
+            for r, plan in zip(reads, plans)
+        ]
+
+    def _resolve_read(self, read: dict, plan: dict, fetched: dict[str, list]):
+        """Turn the fetched ranges of one planned read into its result."""
+        spreadsheet_id, sheet_name = read['spreadsheet_id'], read['sheet_name']
+
+        if plan['mode'] == 'row':
+            if len(plan['ranges']) == 2:
+                header_values = fetched[plan['ranges'][0]]
+                headers = _cache_headers(spreadsheet_id, sheet_name, header_values[0] if header_values else [])
+            else:
+                headers = _cached_headers(spreadsheet_id, sheet_name) or []
+            values = fetched[plan['ranges'][-1]]
+            row = values[0] if values else []
+            row = dict(zip(headers, row + [''] * (len(headers) - len(row))))
+            if row.get(read['id_column']) == read['id_value']:
+                return (plan['row_index'], row)
+            # Stale index entry - drop the index so the lookup rebuilds it
+            _drop_row_indexes(spreadsheet_id, sheet_name, read['id_column'])
+            return self.find_row_by_id(spreadsheet_id, sheet_name, read['id_column'], read['id_value'])
+
+        if plan['mode'] == 'columns':
+            by_position = {}
+            for (a, b), range_name in zip(plan['runs'], plan['ranges']):
+                values = fetched[range_name]
+                for offset in range(b - a + 1):
+                    by_position[a + offset] = [row[offset] if offset < len(row) else '' for row in values]
+            columns = read['columns']
+            positions = plan['positions']
+            # The header cell of each column confirms the guessed position
+            if any((by_position[i][:1] or [''])[0] != c for c, i in positions.items()):
+                return read_projected(spreadsheet_id, sheet_name, columns)
+            row_count = max((len(v) - 1 for v in by_position.values()), default=0)
+            return [
+                {
+                    c: by_position[positions[c]][r + 1]
+                    if c in positions and r + 1 < len(by_position[positions[c]]) else ''
+                    for c in columns
+                }
+                for r in range(row_count)
+            ]
+
+        values = fetched[plan['ranges'][0]]
+        headers = values[0] if values else []
+        if headers:
+            _cache_headers(spreadsheet_id, sheet_name, headers)
+        rows = [dict(zip(headers, row + [''] * (len(headers) - len(row)))) for row in values[1:]]
+
+        if read['kind'] == 'row':
+            # Rebuild the ID index from the rows we have anyway
+            id_column = read['id_column']
+            index = _store_row_index(spreadsheet_id, sheet_name, id_column, [row.get(id_column) for row in rows])
+            row_index = index.get(read['id_value'])
+            return (row_index, rows[row_index - 2]) if row_index else None
+
+        if read['columns']:
+            return [{c: row.get(c, '') for c in read['columns']} for row in rows]
+        return rows
+
+    def write_batch(self, writes: list[dict]) -> list[dict]:
+        """
+        Send queued writes in as few calls as possible.
+
+        Updates to existing rows in the same spreadsheet go out in a single
+        values.batchUpdate call; appends to a sheet go out as one multi-row
+        values.append (the API has no batched append, and append is what
+        keeps concurrent writers from claiming the same row). Updates to the
+        same row are coalesced, last write wins. Calls are made in the order
+        their first write was queued, and a failed call skips the rest.
+        Queued emails go into the local outbox in one transaction, once the
+        sheet calls before them have succeeded.
+        """
+        results = [
+            {
+                'kind': w['kind'],
+                'sheet_name': w['sheet_name'],
+                'row_index': w['row_index'],
+                'status': 'pending',
+            }
+            for w in writes
+        ]
+        if not writes:
+            return results
+
+        calls = _plan_sheet_calls(writes, results)
+        service = None
+        failed = None
+
+        for call in calls:
+            positions = call['positions']
+            if failed:
+                for p in positions:
+                    results[p]['status'] = 'skipped'
+                    results[p]['error'] = f'Earlier write failed: {failed}'
+                continue
+
+            batch = [writes[p] for p in positions]
+            rows = [[w['row_data'].get(col, '') for col in w['columns']] for w in batch]
+            spreadsheet_id = batch[0]['spreadsheet_id']
+            try:
+                if call['key'][0] == 'email':
+                    from appraisal.outbox import get_outbox
+                    inserted = get_outbox().enqueue([w['row_data'] for w in batch])
+                    for p, new in zip(positions, inserted):
+                        results[p]['status'] = 'written' if new else 'duplicate'
+                    continue
+
+                service = service or get_sheets_service()
+                if call['key'][0] == 'update':
+                    execute_request(
+                        service.spreadsheets().values().batchUpdate(
+                            spreadsheetId=spreadsheet_id,
+                            body={
+                                'valueInputOption': 'USER_ENTERED',
+                                'data': [
+                                    {
+                                        'range': f"{w['sheet_name']}!A{w['row_index']}:Z{w['row_index']}",
+                                        'values': [row],
+                                    }
+                                    for w, row in zip(batch, rows)
+                                ],
+                            }
+                        ),
+                        write=True
+                    )
+                    row_indexes = [w['row_index'] for w in batch]
+                else:
+                    sheet_name = batch[0]['sheet_name']
+                    result = execute_request(
+                        service.spreadsheets().values().append(
+                            spreadsheetId=spreadsheet_id,
+                            range=f"{sheet_name}!A:Z",
+                            valueInputOption='USER_ENTERED',
+                            insertDataOption='INSERT_ROWS',
+                            body={'values': rows}
+                        ),
+                        write=True,
+                        idempotent=False
+                    )
+                    first_row = _first_updated_row(result)
+                    row_indexes = [
+                        first_row + i if first_row else None
+                        for i in range(len(batch))
+                    ]
+            except Exception as e:
+                failed = str(e)
+                for p in positions:
+                    results[p]['status'] = 'failed'
+                    results[p]['error'] = failed
+                continue
+
+            for p, w, row_index in zip(positions, batch, row_indexes):
+                results[p]['status'] = 'written'
+                results[p]['row_index'] = row_index
+                if row_index:
+                    _index_row(spreadsheet_id, w['sheet_name'], row_index, w['row_data'])
+
+        return results
+
+
+def _plan_sheet_calls(writes: list[dict], results: list[dict]) -> list[dict]:
+    """Group queued writes into Sheets API calls, ordered by first appearance."""
+    calls = []
+    by_key = {}
+    for position, write in enumerate(writes):
+        if write['kind'] == 'email':
+            key = ('email',)
+        elif write['kind'] == 'update':
+            key = ('update', write['spreadsheet_id'])
+        else:
+            key = ('append', write['spreadsheet_id'], write['sheet_name'])
+
+        call = by_key.get(key)
+        if call is None:
+            call = {'key': key, 'positions': []}
+            by_key[key] = call
+            calls.append(call)
+
+        if write['kind'] == 'update':
+            # Coalesce repeated writes to the same row - the last one wins
+            for earlier in list(call['positions']):
+                other = writes[earlier]
+                if (other['sheet_name'], other['row_index']) == (write['sheet_name'], write['row_index']):
+                    call['positions'].remove(earlier)
+                    results[earlier]['status'] = 'superseded'
+        call['positions'].append(position)
+
+    return calls
+
+
+def _plan_read(read: dict) -> dict:
+    """Pick the ranges a queued read needs, using the cached headers and row index."""
+    spreadsheet_id, sheet_name = read['spreadsheet_id'], read['sheet_name']
+    whole_tab = {'mode': 'tab', 'ranges': [f"{sheet_name}!A:Z"]}
+
+    if read['kind'] == 'row':
+        index = _cached_row_index(spreadsheet_id, sheet_name, read['id_column'])
+        row_index = index.get(read['id_value']) if index else None
+        if row_index is None:
+            return whole_tab
+        ranges = [f"{sheet_name}!A{row_index}:Z{row_index}"]
+        if _cached_headers(spreadsheet_id, sheet_name) is None:
+            ranges.insert(0, f"{sheet_name}!1:1")
+        return {'mode': 'row', 'ranges': ranges, 'row_index': row_index}
+
+    if read['columns']:
+        headers = _known_headers(spreadsheet_id, sheet_name)
+        positions = {c: headers.index(c) for c in read['columns'] if c in headers}
+        if positions:
+            runs = _column_runs(list(positions.values()))
+            return {
+                'mode': 'columns',
+                'ranges': [f"{sheet_name}!{column_letter(a)}1:{column_letter(b)}" for a, b in runs],
+                'runs': runs,
+                'positions': positions,
+            }
+    return whole_tab
+
+
+def _first_updated_row(append_result: dict) -> int | None:
+    """Get the first row number written by a values.append call."""
+    updated_range = append_result.get('updates', {}).get('updatedRange', '')
+    match = re.search(r'[A-Z]+(\d+)', updated_range.rpartition('!')[2])
+    return int(match.group(1)) if match else None
+
+
+# ── Read batching ─────────────────────────────────────────────────────────────
+
+class ReadBatch:
+    """
+    Declare the rows a workflow step needs and fetch them together.
+
+    On Google Sheets every read of one spreadsheet goes out in a single
+    values.batchGet - the workflow tabs normally share one spreadsheet (see
+    setup_sheets.py) - and different spreadsheets are read in parallel; on
+    SQLite the reads run under one lock.
+
+    Usage:
+        reads = ReadBatch()
+        reads.row(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
+        reads.rows(QUOTES_SHEET_ID, 'Quotes', columns=['order_id', 'appraiser_id'])
+        order_result, quotes = reads.load()
+    """
+
+    def __init__(self):
+        self._reads = []
+
+    def __len__(self):
+        return len(self._reads)
+
+    def row(self, spreadsheet_id: str, sheet_name: str, id_column: str, id_value: str) -> int:
+        """
+        Queue a lookup by ID column value; its result is (row_index, row_data)
+        or None, as from find_row_by_id. Returns the read's position in the results.
+        """
+        return self._queue('row', spreadsheet_id, sheet_name, id_column=id_column, id_value=id_value)
+
+    def rows(self, spreadsheet_id: str, sheet_name: str, columns: list[str] = None) -> int:
+        """
+        Queue a read of every row of a tab, optionally only the named columns,
+        as from read_sheet. Returns the read's position in the results.
+        """
+        return self._queue('rows', spreadsheet_id, sheet_name, columns=list(columns) if columns else None)
+
+    def _queue(self, kind, spreadsheet_id, sheet_name, **fields) -> int:
+        self._reads.append(dict(fields, kind=kind, spreadsheet_id=spreadsheet_id, sheet_name=sheet_name))
+        return len(self._reads) - 1
+
+    def load(self) -> list:
+        """Perform all queued reads. Returns per-read results in queue order."""
+        reads, self._reads = self._reads, []
+        return get_backend().read_batch(reads)
+
+
+# ── Write batching ────────────────────────────────────────────────────────────
+
+class WriteBatch:
+    """
+    Collect the row writes of one workflow step and send them together.
+
+    On Google Sheets the batch costs one values.batchUpdate for all row
+    updates plus one values.append per tab appended to; on SQLite it is a
+    single transaction. Writes are applied in the order queued, and once a
+    write fails the ones after it are skipped, so later writes never land
+    without the earlier ones - queue the write that matters most first.
+
+    Emails queued with queue_email go to the outbox (see outbox.py) as part
+    of the same unit of work; queue them after the rows they announce.
+
+    Usage:
+        with WriteBatch() as batch:
+            batch.update_row(ORDERS_SHEET_ID, 'Orders', row_index, order, ORDERS_COLUMNS)
+            batch.update_row(QUOTES_SHEET_ID, 'Quotes', quote_row, quote, QUOTES_COLUMNS)
+        batch.results  # one result dict per queued write, in queue order
+    """
+
+    def __init__(self):
+        self._writes = []
+        self.results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def __len__(self):
+        return len(self._writes)
+
+    def append_row(self, spreadsheet_id: str, sheet_name: str, row_data: dict, columns: list[str]) -> int:
+        """Queue a row append. Returns the write's position in the results."""
+        return self._queue('append', spreadsheet_id, sheet_name, None, row_data, columns)
+
+    def update_row(self, spreadsheet_id: str, sheet_name: str, row_index: int, row_data: dict, columns: list[str]) -> int:
+        """Queue a row update (1-indexed, row 1 is headers). Returns the write's position in the results."""
+        return self._queue('update', spreadsheet_id, sheet_name, row_index, row_data, columns)
+
+    def queue_email(self, to_email: str, subject: str, body: str, key: str = None, html: str = None) -> int:
+        """
+        Queue an email for the outbox. `key` is an idempotency key - an email
+        whose key is already queued is dropped (result status 'duplicate').
+        Returns the write's position in the results.
+        """
+        message = {'to': to_email, 'subject': subject, 'body': body, 'html': html, 'key': key}
+        return self._queue('email', None, 'Outbox', None, message, [])
+
+    def _queue(self, kind, spreadsheet_id, sheet_name, row_index, row_data, columns) -> int:
+        self._writes.append({
+            'kind': kind,
+            'spreadsheet_id': spreadsheet_id,
+            'sheet_name': sheet_name,
+            'row_index': row_index,
+            'row_data': dict(row_data),
+            'columns': list(columns),
+        })
+        return len(self._writes) - 1
+
+    def flush(self) -> list[dict]:
+        """Send all queued writes. Returns per-write results in queue order."""
+        writes, self._writes = self._writes, []
+        self.results = get_backend().write_batch(writes)
+        return self.results
 
 
 def create_appraisal_spreadsheet(service, title: str, sheets_config: list[dict]) -> str:
@@ -280,3 +1208,10 @@ QUOTES_COLUMNS = [
     'quote_id', 'order_id', 'appraiser_id', 'appraiser_name', 'appraiser_email',
     'fee', 'turnaround_days', 'notes', 'submitted_at', 'selected'
 ]
+
+# Standard columns per tab name
+SHEET_COLUMNS = {
+    'Orders': ORDERS_COLUMNS,
+    'Appraiser Panel': PANEL_COLUMNS,
+    'Quotes': QUOTES_COLUMNS,
+}
@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+"""
+Storage backends for Appraisal Order Workflow.
+
+The workflow scripts read and write through sheets_utils (read_sheet,
+append_row, update_row, find_row_by_id, ReadBatch, WriteBatch), which hand
+off to the backend selected here:
+
+- sheets (default): Google Sheets, see sheets_utils.SheetsBackend
+- sqlite: a local, indexed SQLite database. Every step runs in
+  milliseconds, batches are transactional, and nothing needs the network,
+  so the workflow can be load-tested offline.
+
+With APPRAISAL_MIRROR_TO_SHEETS=true the SQLite backend also queues each
+write for Google Sheets in the same transaction, and pushes the queue at
+process exit so people can still follow orders in the spreadsheet.
+
+Usage:
+    python storage.py --import-sheets     # Seed SQLite from the Google Sheets
+    python storage.py --sync-mirror       # Push queued writes to Google Sheets
+    python storage.py --status            # Row counts and pending mirror writes
+
+Environment:
+    APPRAISAL_STORAGE=sheets|sqlite
+    APPRAISAL_SQLITE_PATH=.tmp/appraisal.db     # Relative paths are under the repo root
+    APPRAISAL_MIRROR_TO_SHEETS=false
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_SQLITE_PATH = REPO_ROOT / '.tmp' / 'appraisal.db'
+
+
+def resolve_data_path(value: str | None, default: Path) -> str:
+    """A database path from the environment; relative paths are anchored at the repo root, not the cwd."""
+    if not value:
+        return str(default)
+    if value == ':memory:':
+        return value
+    path = Path(value).expanduser()
+    return str(path if path.is_absolute() else REPO_ROOT / path)
+
+
+STORAGE_BACKEND = os.getenv('APPRAISAL_STORAGE', 'sheets').lower()
+SQLITE_PATH = resolve_data_path(os.getenv('APPRAISAL_SQLITE_PATH'), DEFAULT_SQLITE_PATH)
+MIRROR_TO_SHEETS = os.getenv('APPRAISAL_MIRROR_TO_SHEETS', 'false').lower() == 'true'
+
+
+def sheet_name_from_range(range_name: str) -> str:
+    """Get the tab name from an A1 range ("Appraiser Panel!A:Z" -> "Appraiser Panel")."""
+    return range_name.rpartition('!')[0].strip("'") or range_name
+
+
+class StorageBackend(ABC):
+    """
+    Interface every storage backend implements.
+
+    Rows are dicts keyed by column name with string values, and are
+    addressed by an opaque integer row_index returned from find_row_by_id
+    and append_row and passed back to update_row.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def read_sheet(self, spreadsheet_id: str, range_name: str, columns: list[str] = None) -> list[dict]:
+        """Read every row of a tab as a list of dicts, optionally only the given columns."""
+
+    @abstractmethod
+    def append_row(self, spreadsheet_id: str, sheet_name: str, row_data: dict, columns: list[str]) -> int | None:
+        """Append a row. Returns its row_index when known."""
+
+    @abstractmethod
+    def update_row(self, spreadsheet_id: str, sheet_name: str, row_index: int, row_data: dict, columns: list[str]):
+        """Overwrite the given columns of an existing row."""
+
+    @abstractmethod
+    def find_row_by_id(self, spreadsheet_id: str, sheet_name: str, id_column: str, id_value: str) -> tuple[int, dict] | None:
+        """Find a row by ID column value. Returns (row_index, row_data) or None."""
+
+    @abstractmethod
+    def list_sheets(self, spreadsheet_id: str) -> list[str]:
+        """Names of the tabs in a spreadsheet."""
+
+    @abstractmethod
+    def ensure_sheet(self, spreadsheet_id: str, sheet_name: str, columns: list[str]):
+        """Create a tab with the given header columns unless it exists."""
+
+    @abstractmethod
+    def delete_rows_by_id(self, spreadsheet_id: str, sheet_name: str, id_column: str, id_values: list[str]) -> int:
+        """Delete every row whose ID column holds one of id_values. Returns the number deleted."""
+
+    def read_batch(self, reads: list[dict]) -> list:
+        """
+        Perform reads queued by sheets_utils.ReadBatch.
+
+        Each read is a dict with kind ('row' or 'rows'), spreadsheet_id,
+        sheet_name and either id_column/id_value (a row by ID: result is
+        (row_index, row_data) or None) or columns (every row of the tab,
+        optionally only those columns: result is a list of dicts). Returns
+        one result per read, in order.
+        """
+        results = []
+        for r in reads:
+            if r['kind'] == 'row':
+                results.append(self.find_row_by_id(
+                    r['spreadsheet_id'], r['sheet_name'], r['id_column'], r['id_value']))
+            else:
+                results.append(self.read_sheet(
+                    r['spreadsheet_id'], f"{r['sheet_name']}!A:Z", r['columns']))
+        return results
+
+    def write_batch(self, writes: list[dict]) -> list[dict]:
+        """
+        Apply writes queued by sheets_utils.WriteBatch, in order.
+
+        Each write is a dict with kind ('append', 'update' or 'email'),
+        spreadsheet_id, sheet_name, row_index, row_data and columns; an
+        email's row_data is the message for the outbox. Returns one result
+        per write; once a write fails, the rest are skipped.
+        """
+        results = []
+        failed = None
+        for w in writes:
+            result = {'kind': w['kind'], 'sheet_name': w['sheet_name'], 'row_index': w['row_index']}
+            if failed:
+                result['status'] = 'skipped'
+                result['error'] = f'Earlier write failed: {failed}'
+            else:
+                try:
+                    if w['kind'] == 'email':
+                        from appraisal.outbox import get_outbox
+                        if not get_outbox().enqueue([w['row_data']])[0]:
+                            result['status'] = 'duplicate'
+                    elif w['kind'] == 'append':
+                        result['row_index'] = self.append_row(
+                            w['spreadsheet_id'], w['sheet_name'], w['row_data'], w['columns'])
+                    else:
+                        self.update_row(
+                            w['spreadsheet_id'], w['sheet_name'], w['row_index'], w['row_data'], w['columns'])
+                    result.setdefault('status', 'written')
+                except Exception as e:
+                    failed = str(e)
+                    result['status'] = 'failed'
+                    result['error'] = failed
+            results.append(result)
+        return results
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Local SQLite storage.
+
+    Each tab is a table named after it ("Appraiser Panel" -> appraiser_panel)
+    with one TEXT column per sheet column, plus _row (the row_index) and
+    _spreadsheet_id, so client panels living in different spreadsheets stay
+    separate. Tables and columns are created on first write. Every column
+    looked up through find_row_by_id gets an index the first time it is used.
+
+    A single connection is shared by all threads behind a lock.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path: str | Path = SQLITE_PATH, mirror: bool = False):
+        self.path = str(path)
+        self.mirror = mirror
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._lock = threading.RLock()
+        self._columns: dict[str, list[str]] = {}
+        self._indexed: set[tuple[str, str]] = set()
+
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS _mirror_queue (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                spreadsheet_id TEXT NOT NULL,
+                sheet_name TEXT NOT NULL,
+                row_data TEXT NOT NULL,
+                columns TEXT NOT NULL,
+                queued_at TEXT NOT NULL
+            )
+        ''')
+        # Tab names per spreadsheet - table names alone lose the original spelling
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS _sheets (
+                spreadsheet_id TEXT NOT NULL,
+                sheet_name TEXT NOT NULL,
+                PRIMARY KEY (spreadsheet_id, sheet_name)
+            )
+        ''')
+        self._sheets: set[tuple[str, str]] = set()
+        # Queued emails live here too, so they commit with the rows (see
+        # outbox.py, which reads its own path settings from this module)
+        from appraisal.outbox import ensure_outbox_schema
+        ensure_outbox_schema(self._conn)
+
+    @contextmanager
+    def _transaction(self):
+        """Hold the lock and run the block in one write transaction."""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                # Tables, columns and indexes created in the block are gone too
+                self._columns.clear()
+                self._indexed.clear()
+                self._sheets.clear()
+                raise
+            self._conn.execute('COMMIT')
+
+    # ── Schema ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def table_name(sheet_name: str) -> str:
+        return re.sub(r'\W+', '_', sheet_name.strip()).strip('_').lower()
+
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        return '"' + identifier.replace('"', '""') + '"'
+
+    def _table_columns(self, table: str) -> list[str]:
+        """Sheet columns of a table in creation order ([] if it doesn't exist)."""
+        if table not in self._columns:
+            info = self._conn.execute(f'PRAGMA table_info({self._quote(table)})').fetchall()
+            columns = [c[1] for c in info if not c[1].startswith('_')]
+            if not columns:
+                # Not created yet (possibly by another process) - don't cache
+                return []
+            self._columns[table] = columns
+        return self._columns[table]
+
+    def _ensure_table(self, sheet_name: str, columns: list[str]) -> str:
+        table = self.table_name(sheet_name)
+        existing = self._table_columns(table)
+
+        if not existing:
+            column_defs = ', '.join(f'{self._quote(c)} TEXT' for c in columns)
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self._quote(table)} '
+                f'(_row INTEGER PRIMARY KEY, _spreadsheet_id TEXT NOT NULL, {column_defs})'
+            )
+            self._columns[table] = list(columns)
+            # The first column is the tab's ID column (order_id, quote_id, appraiser_id)
+            self._ensure_index(table, columns[0])
+        else:
+            for column in columns:
+                if column not in existing:
+                    self._conn.execute(f'ALTER TABLE {self._quote(table)} ADD COLUMN {self._quote(column)} TEXT')
+                    existing.append(column)
+
+        return table
+
+    def _ensure_index(self, table: str, column: str):
+        if (table, column) in self._indexed:
+            return
+        self._conn.execute(
+            f'CREATE INDEX IF NOT EXISTS {self._quote(f"ix_{table}_{column}")} '
+            f'ON {self._quote(table)} (_spreadsheet_id, {self._quote(column)})'
+        )
+        self._indexed.add((table, column))
+
+    def _register_sheet(self, spreadsheet_id: str, sheet_name: str):
+        if (spreadsheet_id, sheet_name) in self._sheets:
+            return
+        self._conn.execute(
+            'INSERT OR IGNORE INTO _sheets (spreadsheet_id, sheet_name) VALUES (?, ?)',
+            (spreadsheet_id, sheet_name)
+        )
+        self._sheets.add((spreadsheet_id, sheet_name))
+
+    def list_sheets(self, spreadsheet_id: str) -> list[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                'SELECT sheet_name FROM _sheets WHERE spreadsheet_id = ? ORDER BY sheet_name',
+                (spreadsheet_id,)
+            ).fetchall()]
+
+    def ensure_sheet(self, spreadsheet_id: str, sheet_name: str, columns: list[str]):
+        with self._transaction():
+            self._ensure_table(sheet_name, columns)
+            self._register_sheet(spreadsheet_id, sheet_name)
+            self._queue_mirror('ensure', spreadsheet_id, sheet_name, {}, columns)
+
+    def _row_dict(self, table: str, record) -> dict:
+        return {c: ('' if v is None else v) for c, v in zip(self._table_columns(table), record)}
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def read_sheet(self, spreadsheet_id: str, range_name: str, columns: list[str] = None) -> list[dict]:
+        table = self.table_name(sheet_name_from_range(range_name))
+        with self._lock:
+            existing = self._table_columns(table)
+            if not existing:
+                return []
+            wanted = columns or existing
+            select = ', '.join(self._quote(c) if c in existing else "''" for c in wanted)
+            records = self._conn.execute(
+                f'SELECT {select} FROM {self._quote(table)} WHERE _spreadsheet_id = ? ORDER BY _row',
+                (spreadsheet_id,)
+            ).fetchall()
+            return [{c: ('' if v is None else v) for c, v in zip(wanted, r)} for r in records]
+
+    def find_row_by_id(self, spreadsheet_id: str, sheet_name: str, id_column: str, id_value: str) -> tuple[int, dict] | None:
+        table = self.table_name(sheet_name)
+        with self._lock:
+            columns = self._table_columns(table)
+            if id_column not in columns:
+                return None
+            self._ensure_index(table, id_column)
+            select = ', '.join(self._quote(c) for c in columns)
+            record = self._conn.execute(
+                f'SELECT _row, {select} FROM {self._quote(table)} '
+                f'WHERE _spreadsheet_id = ? AND {self._quote(id_column)} = ? ORDER BY _row LIMIT 1',
+                (spreadsheet_id, id_value)
+            ).fetchone()
+            if not record:
+                return None
+            return (record[0], self._row_dict(table, record[1:]))
+
+    def read_batch(self, reads: list[dict]) -> list:
+        # Hold the lock throughout so the reads see one consistent state
+        with self._lock:
+            return super().read_batch(reads)
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def _append(self, spreadsheet_id, sheet_name, row_data, columns) -> int:
+        table = self._ensure_table(sheet_name, columns)
+        names = ', '.join(self._quote(c) for c in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        cursor = self._conn.execute(
+            f'INSERT INTO {self._quote(table)} (_spreadsheet_id, {names}) VALUES (?, {placeholders})',
+            [spreadsheet_id] + [str(row_data.get(c, '')) for c in columns]
+        )
+        self._register_sheet(spreadsheet_id, sheet_name)
+        self._queue_mirror('append', spreadsheet_id, sheet_name, row_data, columns)
+        return cursor.lastrowid
+
+    def _update(self, spreadsheet_id, sheet_name, row_index, row_data, columns):
+        table = self._ensure_table(sheet_name, columns)
+        assignments = ', '.join(f'{self._quote(c)} = ?' for c in columns)
+        cursor = self._conn.execute(
+            f'UPDATE {self._quote(table)} SET {assignments} WHERE _row = ? AND _spreadsheet_id = ?',
+            [str(row_data.get(c, '')) for c in columns] + [row_index, spreadsheet_id]
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(f'Row {row_index} not found in {sheet_name}')
+        self._queue_mirror('update', spreadsheet_id, sheet_name, row_data, columns)
+
+    def _delete_by_id(self, spreadsheet_id, sheet_name, id_column, id_values) -> int:
+        table = self.table_name(sheet_name)
+        if id_column not in self._table_columns(table):
+            return 0
+        deleted = 0
+        for start in range(0, len(id_values), 500):
+            chunk = id_values[start:start + 500]
+            cursor = self._conn.execute(
+                f'DELETE FROM {self._quote(table)} WHERE _spreadsheet_id = ? '
+                f'AND {self._quote(id_column)} IN ({", ".join("?" for _ in chunk)})',
+                [spreadsheet_id] + chunk
+            )
+            deleted += cursor.rowcount
+        # Mirrored as a single entry, matched in the sheet on the ID column
+        self._queue_mirror('delete', spreadsheet_id, sheet_name, {'ids': id_values}, [id_column])
+        return deleted
+
+    def _queue_mirror(self, kind, spreadsheet_id, sheet_name, row_data, columns):
+        if not self.mirror:
+            return
+        self._conn.execute(
+            'INSERT INTO _mirror_queue (kind, spreadsheet_id, sheet_name, row_data, columns, queued_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (kind, spreadsheet_id, sheet_name,
+             json.dumps(row_data if kind == 'delete' else {c: str(row_data.get(c, '')) for c in columns}),
+             json.dumps(columns), datetime.now().isoformat())
+        )
+
+    def append_row(self, spreadsheet_id: str, sheet_name: str, row_data: dict, columns: list[str]) -> int:
+        with self._transaction():
+            return self._append(spreadsheet_id, sheet_name, row_data, columns)
+
+    def update_row(self, spreadsheet_id: str, sheet_name: str, row_index: int, row_data: dict, columns: list[str]):
+        with self._transaction():
+            self._update(spreadsheet_id, sheet_name, row_index, row_data, columns)
+
+    def delete_rows_by_id(self, spreadsheet_id: str, sheet_name: str, id_column: str, id_values: list[str]) -> int:
+        id_values = [v for v in dict.fromkeys(id_values) if v]
+        if not id_values:
+            return 0
+        with self._transaction():
+            return self._delete_by_id(spreadsheet_id, sheet_name, id_column, id_values)
+
+    def write_batch(self, writes: list[dict]) -> list[dict]:
+        """
+        Apply all writes in one transaction - either all land or none do.
+        Queued emails go into the outbox table in the same transaction.
+        """
+        from appraisal.outbox import insert_messages
+        results = [
+            {'kind': w['kind'], 'sheet_name': w['sheet_name'], 'row_index': w['row_index']}
+            for w in writes
+        ]
+        try:
+            with self._transaction():
+                for w, result in zip(writes, results):
+                    if w['kind'] == 'email':
+                        if not insert_messages(self._conn, [w['row_data']])[0]:
+                            result['status'] = 'duplicate'
+                    elif w['kind'] == 'append':
+                        result['row_index'] = self._append(
+                            w['spreadsheet_id'], w['sheet_name'], w['row_data'], w['columns'])
+                    else:
+                        self._update(
+                            w['spreadsheet_id'], w['sheet_name'], w['row_index'], w['row_data'], w['columns'])
+        except Exception as e:
+            for result in results:
+                result['status'] = 'failed'
+                result['error'] = str(e)
+            return results
+
+        for result in results:
+            result.setdefault('status', 'written')
+        return results
+
+    # ── Mirroring ────────────────────────────────────────────────────────────
+
+    def pending_mirror_count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM _mirror_queue').fetchone()[0]
+
+    def sync_mirror(self, sheets: StorageBackend = None, limit: int = 500) -> dict:
+        """
+        Push queued writes to Google Sheets in the order they were made.
+
+        Rows are matched in the sheet by their first (ID) column, so SQLite
+        row numbers never need to line up with sheet rows. Stops at the
+        first failure and leaves the rest queued for the next sync.
+        """
+        if sheets is None:
+            from appraisal.sheets_utils import SheetsBackend
+            sheets = SheetsBackend()
+
+        with self._lock:
+            queued = self._conn.execute(
+                'SELECT id, kind, spreadsheet_id, sheet_name, row_data, columns '
+                'FROM _mirror_queue ORDER BY id LIMIT ?', (limit,)
+            ).fetchall()
+
+        synced = 0
+        error = None
+        for queue_id, kind, spreadsheet_id, sheet_name, row_data, columns in queued:
+            row_data = json.loads(row_data)
+            columns = json.loads(columns)
+            try:
+                if kind == 'ensure':
+                    sheets.ensure_sheet(spreadsheet_id, sheet_name, columns)
+                elif kind == 'delete':
+                    sheets.delete_rows_by_id(spreadsheet_id, sheet_name, columns[0], row_data['ids'])
+                else:
+                    existing = sheets.find_row_by_id(spreadsheet_id, sheet_name, columns[0], row_data.get(columns[0]))
+                    if existing:
+                        sheets.update_row(spreadsheet_id, sheet_name, existing[0], row_data, columns)
+                    else:
+                        sheets.append_row(spreadsheet_id, sheet_name, row_data, columns)
+            except Exception as e:
+                error = str(e)
+                break
+
+            with self._lock:
+                self._conn.execute('DELETE FROM _mirror_queue WHERE id = ?', (queue_id,))
+            synced += 1
+
+        result = {'synced': synced, 'pending': self.pending_mirror_count()}
+        if error:
+            result['error'] = error
+        return result
+
+    def import_rows(self, spreadsheet_id: str, sheet_name: str, rows: list[dict], columns: list[str]) -> int:
+        """Bulk-load rows (e.g. from Google Sheets) without mirroring them back."""
+        mirror, self.mirror = self.mirror, False
+        try:
+            with self._transaction():
+                for row in rows:
+                    self._append(spreadsheet_id, sheet_name, row, columns)
+        finally:
+            self.mirror = mirror
+        return len(rows)
+
+    def counts(self) -> dict:
+        with self._lock:
+            tables = [r[0] for r in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE '\\_%' ESCAPE '\\'"
+            ).fetchall()]
+            return {
+                t: self._conn.execute(f'SELECT COUNT(*) FROM {self._quote(t)}').fetchone()[0]
+                for t in tables
+            }
+
+
+# ── Backend selection ─────────────────────────────────────────────────────────
+
+_backend: StorageBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def _sync_mirror_at_exit(backend: SQLiteBackend):
+    if not backend.pending_mirror_count():
+        return
+    try:
+        result = backend.sync_mirror()
+        if result.get('error'):
+            print(f"Warning: Sheets mirror sync stopped with {result['pending']} pending: {result['error']}",
+                  file=sys.stderr)
+    except Exception as e:
+        print(f"Warning: Sheets mirror sync failed: {e}", file=sys.stderr)
+
+
+def get_backend() -> StorageBackend:
+    """Get the process-wide storage backend configured by APPRAISAL_STORAGE."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if STORAGE_BACKEND == 'sqlite':
+                    backend = SQLiteBackend(SQLITE_PATH, mirror=MIRROR_TO_SHEETS)
+                    if MIRROR_TO_SHEETS:
+                        atexit.register(_sync_mirror_at_exit, backend)
+                elif STORAGE_BACKEND == 'sheets':
+                    from appraisal.sheets_utils import SheetsBackend
+                    backend = SheetsBackend()
+                else:
+                    raise ValueError(f"Unknown APPRAISAL_STORAGE: {STORAGE_BACKEND} (use 'sheets' or 'sqlite')")
+                _backend = backend
+    return _backend
+
+
+def set_backend(backend: StorageBackend | None):
+    """Override the storage backend for this process (None restores the configured one)."""
+    global _backend
+    _backend = backend
+
+
+def import_from_sheets(backend: SQLiteBackend) -> dict:
+    """Copy the Orders, Appraiser Panel and Quotes tabs from Google Sheets into SQLite."""
+    from appraisal.sheets_utils import (
+        SheetsBackend, ORDERS_COLUMNS, PANEL_COLUMNS, QUOTES_COLUMNS
+    )
+
+    sheets = SheetsBackend()
+    tabs = [
+        (os.getenv('APPRAISAL_ORDERS_SHEET_ID'), 'Orders', ORDERS_COLUMNS),
+        (os.getenv('APPRAISAL_PANEL_SHEET_ID'), 'Appraiser Panel', PANEL_COLUMNS),
+        (os.getenv('APPRAISAL_QUOTES_SHEET_ID'), 'Quotes', QUOTES_COLUMNS),
+    ]
+
+    imported = {}
+    for spreadsheet_id, sheet_name, columns in tabs:
+        if not spreadsheet_id:
+            imported[sheet_name] = 'skipped: sheet ID not configured'
+            continue
+        rows = sheets.read_sheet(spreadsheet_id, f'{sheet_name}!A:Z')
+        # Keep any extra columns the sheet has beyond the standard set
+        extra = [c for c in (rows[0].keys() if rows else []) if c and c not in columns]
+        imported[sheet_name] = backend.import_rows(spreadsheet_id, sheet_name, rows, columns + extra)
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manage the local SQLite store for the appraisal workflow"
+    )
+    parser.add_argument("--db", default=SQLITE_PATH, help=f"SQLite path (default: {SQLITE_PATH})")
+
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--import-sheets", action="store_true", help="Seed SQLite from Google Sheets")
+    action.add_argument("--sync-mirror", action="store_true", help="Push queued writes to Google Sheets")
+    action.add_argument("--status", action="store_true", help="Show row counts and pending mirror writes")
+
+    args = parser.parse_args()
+
+    backend = SQLiteBackend(args.db)
+
+    if args.import_sheets:
+        result = {'success': True, 'imported': import_from_sheets(backend)}
+    elif args.sync_mirror:
+        sync = backend.sync_mirror()
+        result = {'success': 'error' not in sync, **sync}
+    else:
+        result = {
+            'success': True,
+            'db': backend.path,
+            'tables': backend.counts(),
+            'pending_mirror_writes': backend.pending_mirror_count()
+        }
+
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if result['success'] else 1)
+
+
+if __name__ == "__main__":
+    main()
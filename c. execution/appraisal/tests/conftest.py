@@ -0,0 +1,27 @@
+"""
+Shared setup for the appraisal tests.
+
+Settings are read when the appraisal modules are imported, so every store is
+pointed at a scratch directory here, before any test module imports them.
+Nothing touches Google Sheets, SMTP or the repo's .tmp databases.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+_scratch = Path(tempfile.mkdtemp(prefix='appraisal-tests-'))
+
+os.environ.update({
+    'APPRAISAL_STORAGE': 'sqlite',
+    'APPRAISAL_SQLITE_PATH': str(_scratch / 'appraisal.db'),
+    'APPRAISAL_OUTBOX_PATH': str(_scratch / 'outbox.db'),
+    'APPRAISAL_SCHEDULER_PATH': str(_scratch / 'scheduler.db'),
+    'APPRAISAL_MIRROR_TO_SHEETS': 'false',
+    'APPRAISAL_MAIL_DELIVERY': 'outbox',
+    'APPRAISAL_ORDERS_SHEET_ID': 'test-orders',
+    'APPRAISAL_PANEL_SHEET_ID': 'test-panel',
+    'APPRAISAL_QUOTES_SHEET_ID': 'test-quotes',
+})
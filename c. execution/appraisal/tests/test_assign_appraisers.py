@@ -0,0 +1,146 @@
+import random
+
+from appraisal import assign_appraisers as aa
+from appraisal.assign_appraisers import _solve_flow
+from appraisal.panel_model import PanelModel
+
+
+def edges(*pairs):
+    """Candidate tuples as assign_appraisers builds them: (cost, position, appraiser, node)."""
+    return sorted((cost, i, None, node) for i, (cost, node) in enumerate(pairs))
+
+
+def reference(group_candidates, sizes, capacities, limit, priorities):
+    """Tier-by-tier min-cost max-flow with Bellman-Ford: returns ({tier: rfps}, total cost)."""
+    n_groups, n_appraisers = len(sizes), len(capacities)
+    source, sink = n_groups + n_appraisers, n_groups + n_appraisers + 1
+    graph = [[] for _ in range(sink + 1)]
+
+    def add(u, v, cap, cost):
+        graph[u].append([v, cap, cost, len(graph[v])])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+
+    for g, candidates in enumerate(group_candidates):
+        seen = set()
+        for cost, _, _, node in candidates:
+            if node not in seen:
+                seen.add(node)
+                add(g, n_groups + node, sizes[g], cost)
+    for a, cap in enumerate(capacities):
+        add(n_groups + a, sink, cap, 0)
+
+    rfps, total = {}, 0
+    for tier in sorted(set(priorities)):
+        for g in range(n_groups):
+            if priorities[g] == tier:
+                add(source, g, sizes[g] * limit, 0)
+        while True:
+            dist, prev = [float('inf')] * len(graph), [None] * len(graph)
+            dist[source] = 0
+            for _ in range(len(graph)):
+                changed = False
+                for u, out in enumerate(graph):
+                    for i, (v, cap, cost, _) in enumerate(out):
+                        if cap > 0 and dist[u] + cost < dist[v]:
+                            dist[v], prev[v], changed = dist[u] + cost, (u, i), True
+                if not changed:
+                    break
+            if dist[sink] == float('inf'):
+                break
+            pushed, v = float('inf'), sink
+            while v != source:
+                u, i = prev[v]
+                pushed, v = min(pushed, graph[u][i][1]), u
+            v = sink
+            while v != source:
+                u, i = prev[v]
+                graph[u][i][1] -= pushed
+                graph[v][graph[u][i][3]][1] += pushed
+                v = u
+            total += pushed * dist[sink]
+            rfps[tier] = rfps.get(tier, 0) + pushed
+        # Freeze the tier: later tiers may reroute its RFPs but not take them
+        for g in [e[0] for e in graph[source]]:
+            for e in graph[g]:
+                if e[0] == source:
+                    e[1] = 0
+        for e in graph[source]:
+            e[1] = 0
+    return rfps, total
+
+
+def test_shared_favourite_goes_where_it_saves_most():
+    # Both groups rank appraiser 0 first, but it has room for one RFP
+    used = _solve_flow([edges((1, 0), (2, 1)), edges((1, 0), (9, 2))], [1, 1], [1, 1, 1], limit=1)
+    assert used == [[0, 1], [1, 0]]
+
+
+def test_urgent_tier_claims_capacity_first():
+    # Cheaper overall to serve group 0, but group 1 is in the more urgent tier
+    candidates = [edges((1, 0)), edges((50, 0))]
+    assert _solve_flow(candidates, [1, 1], [1], limit=1, priorities=[2, 1]) == [[0], [1]]
+    assert _solve_flow(candidates, [1, 1], [1], limit=1) == [[1], [0]]
+
+
+def test_no_candidates_or_duplicates():
+    assert _solve_flow([[], []], [1, 2], [], limit=3) == [[], []]
+    # A repeated candidate never doubles an appraiser up on one order
+    assert _solve_flow([edges((1, 0), (1, 0))], [1], [5], limit=2) == [[1, 0]]
+
+
+def test_matches_reference_on_random_instances():
+    rng = random.Random(7)
+    for trial in range(300):
+        n_groups, n_appraisers, limit = rng.randint(1, 6), rng.randint(1, 8), rng.randint(1, 3)
+        sizes = [rng.randint(1, 3) for _ in range(n_groups)]
+        capacities = [rng.randint(0, 3) for _ in range(n_appraisers)]
+        candidates = [
+            edges(*[(rng.randint(0, 20), rng.randrange(n_appraisers)) for _ in range(rng.randint(0, n_appraisers))])
+            for _ in range(n_groups)
+        ]
+        priorities = [rng.randint(0, 2) for _ in range(n_groups)]
+
+        used = _solve_flow(candidates, sizes, capacities, limit, priorities)
+
+        load = [0] * n_appraisers
+        rfps, total = {}, 0
+        for g, (group, counts) in enumerate(zip(candidates, used)):
+            assert sum(counts) <= sizes[g] * limit
+            for (cost, _, _, node), n in zip(group, counts):
+                assert 0 <= n <= sizes[g]
+                load[node] += n
+                total += cost * n
+            if sum(counts):
+                rfps[priorities[g]] = rfps.get(priorities[g], 0) + sum(counts)
+        assert all(n <= cap for n, cap in zip(load, capacities))
+        assert (rfps, total) == reference(candidates, sizes, capacities, limit, priorities), trial
+
+
+def test_batch_respects_capacity_and_gives_distinct_appraisers(monkeypatch):
+    rng = random.Random(3)
+    states, types = ['CA', 'TX', 'NY', 'FL'], ['Office', 'Retail', 'Industrial']
+    panel = PanelModel([
+        {
+            'appraiser_id': f'APR-{i:03d}', 'name': f'Appraiser {i}', 'active': 'TRUE',
+            'states': ','.join(rng.sample(states, 2)), 'property_types': ','.join(rng.sample(types, 2)),
+            'current_workload': str(rng.randint(0, 2)), 'capacity': str(rng.choice([3, 4, 5])),
+            'quality_score': str(rng.choice([4, 4.5, 5])), 'avg_fee': str(rng.randint(2000, 5000)),
+            'avg_turnaround_days': str(rng.randint(7, 21)),
+        }
+        for i in range(60)
+    ])
+    monkeypatch.setattr(aa, 'get_appraiser_panel', lambda client_id: (panel, 'master'))
+    orders = [
+        {'order_id': f'ORD-{i}', 'property_state': rng.choice(states), 'property_type': rng.choice(types),
+         'client_id': rng.choice(['BANK-001', '']), 'urgency': rng.choice(['Standard', 'Rush'])}
+        for i in range(80)
+    ]
+
+    result = aa.assign_appraisers(orders, limit=3)
+
+    assert result['success'] and result['order_count'] == 80
+    room = {a.appraiser_id: a.capacity - a.workload for a in panel.appraisers}
+    assert all(n <= room[a] for a, n in result['appraiser_load'].items())
+    for assignment in result['assignments']:
+        ids = [c['appraiser_id'] for c in assignment['candidates']]
+        assert len(ids) == len(set(ids)) <= 3
@@ -0,0 +1,110 @@
+import random
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+from appraisal import business_calendar
+from appraisal.business_calendar import (
+    BusinessCalendar, get_calendar, parse_holidays, sla_due_dates, us_federal_holidays
+)
+
+
+def brute_is_business_day(calendar, day):
+    return day.weekday() < 5 and day not in calendar.holidays(day.year)
+
+
+def brute_add(calendar, start, days):
+    day = start
+    while days > 0:
+        day += timedelta(days=1)
+        days -= brute_is_business_day(calendar, day)
+    return day
+
+
+def brute_between(calendar, start, end):
+    low, high, sign = (start, end, 1) if start <= end else (end, start, -1)
+    return sign * sum(brute_is_business_day(calendar, low + timedelta(days=i)) for i in range(1, (high - low).days + 1))
+
+
+@pytest.fixture
+def calendar():
+    return BusinessCalendar({date(2026, 11, 27), date(2031, 6, 2)}, {(12, 24), (2, 29)})
+
+
+def test_us_federal_holidays_on_observed_dates():
+    assert us_federal_holidays(2026) == [
+        date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 5, 25), date(2026, 6, 19),
+        date(2026, 7, 3), date(2026, 9, 7), date(2026, 10, 12), date(2026, 11, 11), date(2026, 11, 26),
+        date(2026, 12, 25),
+    ]
+    # New Year's Day 2022 fell on a Saturday: observed the Friday before, in 2021
+    assert date(2021, 12, 31) in us_federal_holidays(2021)
+    assert min(us_federal_holidays(2022)) == date(2022, 1, 17)
+
+
+def test_parse_holidays(capsys):
+    dates, annual = parse_holidays('2026-11-27, 12-24,,02-29,13-01,soon')
+    assert dates == {date(2026, 11, 27)} and annual == {(12, 24), (2, 29)}
+    assert capsys.readouterr().err.count('ignoring holiday') == 2
+
+
+def test_matches_brute_force(calendar):
+    rng = random.Random(11)
+    for _ in range(400):
+        start = date(2024, 1, 1) + timedelta(days=rng.randrange(3 * 365))
+        days = rng.randint(0, 40)
+        end = start + timedelta(days=rng.randint(-60, 60))
+        assert calendar.is_business_day(start) == brute_is_business_day(calendar, start)
+        assert calendar.add_business_days(start, days) == brute_add(calendar, start, days)
+        assert calendar.business_days_between(start, end) == brute_between(calendar, start, end)
+
+
+def test_tables_grow_past_the_initial_years(calendar):
+    start = date(2031, 5, 20)
+    assert calendar.add_business_days(start, 400) == brute_add(calendar, start, 400)
+    assert calendar.business_days_between(date(2019, 3, 1), start) == brute_between(calendar, date(2019, 3, 1), start)
+
+
+@pytest.mark.parametrize('with_numpy', [True, False])
+def test_add_many_matches_one_at_a_time(calendar, monkeypatch, with_numpy):
+    if not with_numpy:
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+    rng = random.Random(5)
+    starts = [date(2025, 1, 1) + timedelta(days=rng.randrange(800)) for _ in range(300)]
+    days = [rng.randint(0, 30) for _ in starts]
+
+    one_at_a_time = [calendar.add_business_days(s, n) for s, n in zip(starts, days)]
+    assert calendar.add_business_days_many(starts, days) == one_at_a_time
+    assert calendar.add_business_days_many(starts, 10) == [calendar.add_business_days(s, 10) for s in starts]
+    assert calendar.add_business_days_many([], 10) == []
+
+
+def test_state_and_client_holidays(monkeypatch):
+    monkeypatch.setenv('HOLIDAYS_TX', '03-02')
+    monkeypatch.setenv('HOLIDAYS_BANK_001', '2026-03-03')
+    get_calendar.cache_clear()
+    try:
+        # Monday 2026-03-02 is closed in Texas, Tuesday 2026-03-03 for BANK-001 as well
+        assert get_calendar('BANK-001', 'TX').add_business_days(date(2026, 2, 27), 1) == date(2026, 3, 4)
+        assert get_calendar(None, 'TX').add_business_days(date(2026, 2, 27), 1) == date(2026, 3, 3)
+        assert get_calendar('BANK-001', 'CA').add_business_days(date(2026, 2, 27), 1) == date(2026, 3, 2)
+    finally:
+        get_calendar.cache_clear()
+
+
+def test_sla_due_dates(monkeypatch):
+    monkeypatch.setattr(business_calendar, 'get_sla_days', lambda: {'Standard': 14, 'Rush': 7})
+    orders = [
+        {'created_at': '2026-11-20T09:30:00', 'urgency': 'Rush'},
+        {'created_at': '2026-11-20', 'urgency': ''},
+        {'created_at': 'yesterday'},
+        {},
+    ]
+    federal = BusinessCalendar()
+    assert sla_due_dates(orders) == [
+        federal.add_business_days(date(2026, 11, 20), 7).isoformat(),
+        federal.add_business_days(date(2026, 11, 20), 14).isoformat(),
+        None,
+        None,
+    ]
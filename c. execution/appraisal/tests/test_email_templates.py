@@ -0,0 +1,83 @@
+import pytest
+
+from appraisal import email_templates
+from appraisal.email_templates import EmailTemplate, TemplateSyntaxError, rfp_emails, summary_email
+
+
+@pytest.fixture
+def template_dir(monkeypatch, tmp_path):
+    """An APPRAISAL_TEMPLATE_DIR in tmp_path, with the template cache cleared around the test."""
+    monkeypatch.setattr(email_templates, 'EXTRA_TEMPLATE_DIR', str(tmp_path))
+    email_templates.clear_cache()
+    yield tmp_path
+    email_templates.clear_cache()
+
+
+def test_fields_sections_and_braces():
+    template = EmailTemplate(
+        't', 'Order {order_id}\n',
+        '{{{name}}} owes ${fee:,.2f}{missing}.{#rush} RUSH{/rush}{#items} [{sku} x{qty}]{/items}'
+        '{#contact} {email}{/contact}{#none}never{/none}',
+        '<p>{name}</p>'
+    )
+    subject, text, markup = template.render({
+        'order_id': 'ORD-1', 'name': 'A & B <Co>', 'fee': 3500, 'rush': True,
+        'items': [{'sku': 'X', 'qty': 1}, {'sku': 'Y', 'qty': 2}], 'contact': {'email': 'a@b.example'},
+        'none': [],
+    })
+
+    assert subject == 'Order ORD-1'
+    assert text == '{A & B <Co>} owes $3,500.00. RUSH [X x1] [Y x2] a@b.example'
+    assert markup == '<p>A &amp; B &lt;Co&gt;</p>'
+    assert EmailTemplate('t', 's', 'b').render({})[2] is None
+
+
+@pytest.mark.parametrize('source, message', [
+    ('{#a}open', 'Unclosed {#a}'),
+    ('{#a}x{/b}', 'Unexpected {/b}'),
+    ('close{/a}', 'Unexpected {/a}'),
+])
+def test_syntax_errors(source, message):
+    with pytest.raises(TemplateSyntaxError, match=message):
+        EmailTemplate('t', 's', source)
+
+
+def test_client_overrides_fall_back_per_file(template_dir):
+    client = template_dir / 'clients' / 'BANK-9'
+    client.mkdir(parents=True)
+    (client / 'rfp.subject.txt').write_text('BANK-9 needs a quote [{order_id}]\n', encoding='utf-8')
+    order = {'order_id': 'ORD-2', 'client_id': 'BANK-9', 'loan_amount': '2500000', 'property_city': 'Reno'}
+
+    (subject, text, markup), = rfp_emails(order, [{'name': 'Jane'}], deadline='Friday')
+    assert subject == 'BANK-9 needs a quote [ORD-2]'
+    # The body is not overridden, so the built-in one is used
+    assert text.startswith('Dear Jane,') and 'Loan Amount: $2,500,000' in text and 'Friday' in text
+    assert markup is None
+
+    other = rfp_emails(dict(order, client_id='BANK-1'), [{'name': 'Jane'}, {}], deadline='Friday')
+    assert other[0][0].startswith('Quote Request - ') and other[1][1].startswith('Dear Appraiser,')
+
+
+def test_templates_are_cached_until_cleared(template_dir):
+    (template_dir / 'note.subject.txt').write_text('v1', encoding='utf-8')
+    (template_dir / 'note.txt').write_text('{order_id}', encoding='utf-8')
+    assert email_templates.render('note', {'order_id': 'ORD-3'}) == ('v1', 'ORD-3', None)
+
+    (template_dir / 'note.subject.txt').write_text('v2', encoding='utf-8')
+    assert email_templates.render('note', {})[0] == 'v1'
+    email_templates.clear_cache()
+    assert email_templates.render('note', {})[0] == 'v2'
+
+    with pytest.raises(FileNotFoundError):
+        email_templates.get_template('missing')
+
+
+def test_summary_email_escapes_html_values():
+    quote = {'appraiser_name': 'Smith <& Sons>', 'fee': '4200', 'turnaround_days': 10, 'recommended': True}
+    subject, text, markup = summary_email({
+        'order_id': 'ORD-4', 'property_address': '1 Main St', 'quotes': [quote], 'recommended': quote,
+    })
+
+    assert 'ORD-4' in subject
+    assert 'Smith <& Sons>' in text and '4,200' in text
+    assert 'Smith &lt;&amp; Sons&gt;' in markup and 'Smith <& Sons>' not in markup
@@ -0,0 +1,82 @@
+import threading
+from datetime import datetime, timedelta
+
+from appraisal import ids
+from appraisal.ids import IdAllocator, id_floor, id_time, ids_since, new_order_id, new_quote_id
+
+
+def frozen_clock(monkeypatch, seconds):
+    """Pin ids' wall clock; returns a setter to move it."""
+    now = [seconds]
+    monkeypatch.setattr(ids.time, 'time', lambda: now[0])
+    return lambda value: now.__setitem__(0, value)
+
+
+def test_shape_and_decode():
+    order_id, quote_id = new_order_id(), new_quote_id()
+    assert ids._ID_BODY.fullmatch(order_id.split('-')[2]) and len(order_id) == len('ORD-2026-') + 16
+    assert quote_id.startswith('Q-') and len(quote_id) == 18
+    assert abs(id_time(order_id) - datetime.now()) < timedelta(seconds=5)
+    assert id_time('ORD-2026-ABC123') is None and id_time(None) is None
+
+
+def test_ids_increase_across_threads():
+    allocated = []
+    lock = threading.Lock()
+
+    def allocate():
+        mine = [new_quote_id() for _ in range(2000)]
+        assert mine == sorted(mine)
+        with lock:
+            allocated.extend(mine)
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(allocated)) == len(allocated) == 16000
+
+
+def test_clock_stepping_back_and_sequence_overflow(monkeypatch):
+    set_clock = frozen_clock(monkeypatch, 1_700_000_000.0)
+    allocator = IdAllocator()
+
+    pairs = [allocator.next() for _ in range(1025)]
+    assert pairs == sorted(pairs) and len(set(pairs)) == 1025
+    # 1024 sequences fit in a millisecond; the 1025th borrows the next one
+    assert pairs[-2][0] == 1_700_000_000_000 and pairs[-1][0] == 1_700_000_000_001
+
+    set_clock(1_699_999_999.0)
+    assert allocator.next() > pairs[-1]
+
+
+def test_id_floor_bounds_later_ids(monkeypatch):
+    when = datetime(2026, 3, 1, 12, 0)
+    set_clock = frozen_clock(monkeypatch, when.timestamp() - 0.001)
+    monkeypatch.setattr(ids, '_allocator', IdAllocator())
+    before = new_order_id()
+    set_clock(when.timestamp())
+    at = new_order_id()
+
+    assert before < id_floor('ORD', when) <= at
+    assert id_floor('Q', when).startswith('Q-') and id_time(id_floor('ORD', when)) == when
+
+
+def test_range_scans_skip_legacy_ids(monkeypatch):
+    when = datetime(2026, 10, 1)
+    set_clock = frozen_clock(monkeypatch, when.timestamp() - 86400)
+    monkeypatch.setattr(ids, '_allocator', IdAllocator())
+    old_order, old_quote = new_order_id(), new_quote_id()
+    set_clock(when.timestamp() + 60)
+    new_order, new_quote = new_order_id(), new_quote_id()
+
+    # Legacy IDs land on either side of a floor whatever their age
+    assert 'ORD-2026-12345' >= id_floor('ORD', when) > 'ORD-2026-00042'
+    assert 'Q-20200101090000-AB12' > id_floor('Q', when)
+
+    orders = ['ORD-2026-12345', old_order, 'ORD-2026-00042', new_order, '', 'ORD-2027-00001']
+    assert ids_since(orders, 'ORD', when) == [new_order]
+    quotes = ['Q-20200101090000-AB12', new_quote, 'Q-20261015090000-ZZ99', old_quote]
+    assert ids_since(quotes, 'Q', when) == [new_quote]
@@ -0,0 +1,79 @@
+from email.message import EmailMessage
+
+import pytest
+
+from appraisal.inbound_quotes import extract_fee, extract_turnaround, parse_reply
+
+
+@pytest.mark.parametrize('text, fee', [
+    ('Fee: $3,500', 3500.0),
+    ('Our quote is 3500 for this one.', 3500.0),
+    ('Price would be $3.5k', 3500.0),
+    ('$ 2750.50 all in', 2750.5),
+    ('3,500 USD', 3500.0),
+    ('Happy to take it on. Can do it for 4.2k, 10 business days.', 4200.0),
+    ('4.2K', 4200.0),
+    ('Fee $12,000 - the building is 40k sq ft', 12000.0),
+    ('My quote for 450 Main St is $3,500 with 10 business days.', 3500.0),
+    ('Our fee for 1200 Oak Ave would be 3.8k', 3800.0),
+    ('Fee of 2800 for the Elm St property', 2800.0),
+    ('Quote for 450 Main St to follow tomorrow', None),
+    ('Turnaround 10 days, sorry no fee yet', None),
+    ('Fee: $25', None),
+    ('Roof has a 3.5kW solar array', None),
+])
+def test_extract_fee(text, fee):
+    assert extract_fee(text) == fee
+
+
+@pytest.mark.parametrize('text, days', [
+    ('Turnaround: 10 business days', 10),
+    ('We can deliver the report in 8-10 days', 10),
+    ('2 weeks', 10),
+    ('14 calendar days', 10),
+    ('Fee $3,500, done in 12 working days', 12),
+    ('Fee $3,500', None),
+    ('500 days', None),
+])
+def test_extract_turnaround(text, days):
+    assert extract_turnaround(text) == days
+
+
+def reply(body, subject='Re: RFP - Appraisal Request ORD-2026-ABC123'):
+    message = EmailMessage()
+    message['From'] = 'Jane Appraiser <Jane@Valuers.example>'
+    message['To'] = 'orders@firm.example'
+    message['Subject'] = subject
+    message['Message-ID'] = '<reply-1@valuers.example>'
+    message.set_content(body)
+    return bytes(message)
+
+
+def test_parse_reply_reads_only_the_replys_own_text():
+    parsed = parse_reply(reply(
+        'Can do it for 4.2k, turnaround 2 weeks.\n'
+        '\n'
+        '--\n'
+        'Jane Appraiser, MAI - 30 years, 1k+ reports\n'
+        '\n'
+        'On Mon, Jan 5, 2026 at 9:00 AM Orders <orders@firm.example> wrote:\n'
+        '> Order #: ORD-2026-ABC123\n'
+        '> Please quote by $5,000 budget, 21 days\n'
+    ))
+
+    assert parsed['sender'] == 'jane@valuers.example'
+    assert parsed['order_id'] == 'ORD-2026-ABC123'
+    assert (parsed['fee'], parsed['turnaround_days'], parsed['declined']) == (4200.0, 10, False)
+    assert 'wrote:' not in parsed['text'] and 'MAI' not in parsed['text']
+
+
+def test_parse_reply_decline_and_order_from_quoted_rfp():
+    parsed = parse_reply(reply(
+        'Sorry, we have to pass on this one.\n'
+        '\n'
+        '> Order #: ORD-2026-XYZ789\n',
+        subject='Re: Appraisal request'
+    ))
+
+    assert parsed['order_id'] == 'ORD-2026-XYZ789'
+    assert parsed['fee'] is None and parsed['declined']
@@ -0,0 +1,58 @@
+import os
+import smtplib
+import subprocess
+import sys
+from pathlib import Path
+
+from appraisal import outbox
+from appraisal.outbox import Outbox
+from appraisal.storage import REPO_ROOT
+
+
+def message(key=None, to='jane@valuers.example'):
+    return {'to': to, 'subject': 'RFP', 'body': 'Please quote', 'key': key}
+
+
+def test_relative_outbox_path_is_anchored_at_the_repo_root(tmp_path):
+    # A webhook step and a worker started from different directories must share one queue
+    env = dict(
+        os.environ,
+        APPRAISAL_OUTBOX_PATH='.tmp/relative-outbox.db',
+        PYTHONPATH=str(Path(outbox.__file__).parent.parent)
+    )
+    printed = subprocess.run(
+        [sys.executable, '-c', 'from appraisal.outbox import OUTBOX_PATH; print(OUTBOX_PATH)'],
+        cwd=tmp_path, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert printed == str(REPO_ROOT / '.tmp' / 'relative-outbox.db')
+
+
+def test_enqueue_is_idempotent_per_key():
+    box = Outbox(':memory:')
+    assert box.enqueue([message('rfp:ORD-1:APR-1'), message('rfp:ORD-1:APR-2'), message()]) == [True, True, True]
+    assert box.enqueue([message('rfp:ORD-1:APR-1'), message()]) == [False, True]
+    assert box.status()['pending'] == 4
+
+
+def test_claim_leases_and_record_retries_then_dead_letters(monkeypatch):
+    monkeypatch.setattr(outbox, 'OUTBOX_MAX_ATTEMPTS', 2)
+    monkeypatch.setattr(outbox, 'OUTBOX_RETRY_BASE', 0)
+    box = Outbox(':memory:')
+    box.enqueue([message('a'), message('b'), message('c', to='nobody@invalid')])
+
+    claimed = box.claim()
+    assert [m['key'] for m in claimed] == ['a', 'b', 'c'] and box.claim() == []
+    refused = smtplib.SMTPRecipientsRefused({'nobody@invalid': (550, b'No such user')})
+    assert box.record([(claimed[0], None), (claimed[1], OSError('timeout')), (claimed[2], refused)]) == {
+        'sent': 1, 'retried': 1, 'dead': 1
+    }
+
+    # The retried message goes dead once it runs out of attempts
+    retry, = box.claim()
+    assert retry['key'] == 'b' and retry['attempts'] == 2
+    assert box.record([(retry, OSError('timeout'))])['dead'] == 1
+    assert [d['key'] for d in box.dead_letters()] == ['b', 'c']
+
+    assert box.retry_dead([retry['id']]) == 1
+    assert box.status() == {'pending': 1, 'sending': 0, 'sent': 1, 'dead': 1, 'due': 1}
@@ -0,0 +1,42 @@
+from appraisal import pipeline
+from appraisal.sheets_utils import PANEL_COLUMNS, PANEL_SHEET_ID
+from appraisal.storage import get_backend
+
+
+def appraiser(appraiser_id, state):
+    return {
+        'appraiser_id': appraiser_id, 'name': appraiser_id, 'email': f'{appraiser_id.lower()}@example.com',
+        'states': state, 'property_types': 'Office', 'current_workload': '0', 'capacity': '5',
+        'avg_fee': '3500', 'avg_turnaround_days': '10', 'quality_score': '4.5', 'active': 'TRUE',
+    }
+
+
+def test_resume_mails_the_client_panel_the_find_step_searched(monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, 'PIPELINE_DIR', tmp_path)
+    monkeypatch.setenv('CLIENT_PANEL_BANK_XYZ', 'test-client-panel')
+    backend = get_backend()
+    backend.import_rows(PANEL_SHEET_ID, 'Appraiser Panel', [appraiser('APR-MASTER', 'CO')], PANEL_COLUMNS)
+    backend.import_rows('test-client-panel', 'Appraiser Panel', [appraiser('APR-CLIENT', 'CO')], PANEL_COLUMNS)
+
+    mailed = []
+
+    def send_rfp_emails(order_id, dry_run, order_result, appraisers):
+        mailed.append([a['appraiser_id'] for a in appraisers])
+        if len(mailed) == 1:
+            return {'success': False, 'errors': ['SMTP unavailable']}
+        return {'success': True, 'queued_count': len(appraisers)}
+
+    monkeypatch.setattr(pipeline, 'send_rfp_emails', send_rfp_emails)
+
+    first = pipeline.run_intake({
+        'property_address': '1 Main St, Denver, CO 80202',
+        'property_type': 'Office',
+        'client_id': 'BANK-XYZ',
+        'contact_email': 'loans@xyz.example',
+    })
+    assert not first['success'] and first['steps']['find']['result']['panel_source'] == 'client:BANK-XYZ'
+
+    resumed = pipeline.resume(first['order_id'])
+
+    assert resumed['success'] and resumed['steps']['find']['status'] == 'skipped'
+    assert mailed == [['APR-CLIENT'], ['APR-CLIENT']]
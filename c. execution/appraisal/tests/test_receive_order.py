@@ -0,0 +1,67 @@
+import json
+
+from appraisal.receive_order import create_orders, parse_bulk, validate_order
+from appraisal.sheets_utils import ORDERS_SHEET_ID, find_row_by_id
+
+
+def order(**fields):
+    data = {
+        'property_address': '123 Main St, Chicago, IL 60601',
+        'property_type': 'Office',
+        'client_id': 'BANK-001',
+        'contact_email': 'loans@bank.example',
+    }
+    data.update(fields)
+    return data
+
+
+def test_parse_bulk_ndjson():
+    text = '\n'.join([json.dumps(order()), '', '{not json', '[1, 2]', json.dumps(order(urgency='Rush'))])
+    records = parse_bulk(text)
+
+    assert [line for line, _, _ in records] == [1, 3, 4, 5]
+    assert records[0][1]['client_id'] == 'BANK-001' and records[0][2] is None
+    assert records[1][1] is None and records[1][2].startswith('Invalid JSON')
+    assert records[2] == (4, None, 'Expected a JSON object')
+    assert records[3][1]['urgency'] == 'Rush'
+
+
+def test_parse_bulk_csv_skips_empty_cells_and_rows():
+    text = (
+        'property_address,property_type,client_id,contact_email,urgency\n'
+        '"1 Elm St, Austin, TX 78701",Retail,BANK-002,a@b.example,\n'
+        ',,,,\n'
+        '"2 Oak Ave, Reno, NV 89501", Land ,BANK-002,c@d.example,Rush\n'
+    )
+    records = parse_bulk(text, 'csv')
+
+    assert [line for line, _, _ in records] == [2, 4]
+    assert 'urgency' not in records[0][1]
+    assert records[1][1]['property_type'] == 'Land'
+
+
+def test_validate_order_rejects_non_text_fields():
+    is_valid, errors = validate_order(order(property_address=123, contact_email=['x@y.example']))
+    assert not is_valid
+    assert errors == [
+        'Invalid property_address: expected text, got int',
+        'Invalid contact_email: expected text, got list',
+    ]
+    assert validate_order(order(loan_amount=2500000))[0]
+
+
+def test_bad_record_does_not_abort_the_batch():
+    records = [
+        (1, order(), None),
+        (2, {'property_address': 123}, None),
+        (3, order(urgency={'level': 'Rush'}), None),
+        (4, None, 'Invalid JSON: Expecting value'),
+        (5, order(property_type='Hotel'), None),
+    ]
+    result = create_orders(records)
+
+    assert (result['received'], result['created'], result['rejected']) == (5, 2, 3)
+    assert [r['success'] for r in result['results']] == [True, False, False, False, True]
+    assert result['results'][1]['errors'] == ['Invalid property_address: expected text, got int']
+    for order_id in result['order_ids']:
+        assert find_row_by_id(ORDERS_SHEET_ID, 'Orders', 'order_id', order_id)
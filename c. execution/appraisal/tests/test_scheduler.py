@@ -0,0 +1,42 @@
+from appraisal import collect_quotes, pipeline, scheduler
+from appraisal.sheets_utils import ORDERS_COLUMNS, ORDERS_SHEET_ID, QUOTES_COLUMNS, QUOTES_SHEET_ID
+from appraisal.storage import REPO_ROOT, get_backend
+
+
+def test_quotes_due_records_the_summary_step(monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, 'PIPELINE_DIR', tmp_path)
+    monkeypatch.setattr(scheduler, 'AUTO_ENGAGE', False)
+    backend = get_backend()
+    backend.import_rows(ORDERS_SHEET_ID, 'Orders', [{'order_id': 'ORD-SCHED-1', 'status': 'rfp_sent'}], ORDERS_COLUMNS)
+    backend.import_rows(QUOTES_SHEET_ID, 'Quotes', [
+        {'quote_id': 'Q-SCHED-1', 'order_id': 'ORD-SCHED-1', 'appraiser_id': 'APR-1',
+         'fee': '3500', 'turnaround_days': '10'}
+    ], QUOTES_COLUMNS)
+
+    sent = []
+    monkeypatch.setattr(collect_quotes, 'send_summary_to_client',
+                        lambda order_id, **kwargs: sent.append(order_id) or {'success': True})
+    timers = scheduler.Scheduler(':memory:')
+    timer = {'order_id': 'ORD-SCHED-1', 'event': 'quotes_due'}
+
+    assert scheduler.fire(timer, timers)['action'] == 'summary_sent'
+    assert 'summary' in pipeline.load_checkpoint('ORD-SCHED-1')['steps']
+    # Neither a second timer nor pipeline --award mails the client again
+    assert scheduler.fire(timer, timers)['action'] == 'none'
+    assert pipeline.run_award('ORD-SCHED-1', auto=True, dry_run=True)['steps']['summary']['status'] == 'skipped'
+    assert sent == ['ORD-SCHED-1']
+
+
+def test_timers_follow_the_sqlite_store(monkeypatch):
+    monkeypatch.setattr(scheduler, '_scheduler', None)
+    monkeypatch.setattr(scheduler, 'SCHEDULER_PATH', None)
+    assert scheduler.get_scheduler().path == get_backend().path
+
+    monkeypatch.setattr(scheduler, '_scheduler', None)
+    monkeypatch.setattr(scheduler, 'SCHEDULER_PATH', ':memory:')
+    assert scheduler.get_scheduler().path == ':memory:'
+
+    monkeypatch.setattr(scheduler, '_scheduler', None)
+    monkeypatch.setattr(scheduler, 'SCHEDULER_PATH', '.tmp/other-timers.db')
+    monkeypatch.setattr(scheduler, 'Scheduler', lambda path: type('Stub', (), {'path': path}))
+    assert scheduler.get_scheduler().path == str(REPO_ROOT / '.tmp' / 'other-timers.db')